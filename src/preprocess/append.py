@@ -0,0 +1,392 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import pandas as pd
+import pyarrow.parquet as pq
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.preprocess.config import PreprocessConfig, load_config
+from src.preprocess.parallel import ParallelCleaner
+from src.preprocess.splitter import DataSplitter
+from src.preprocess.reporter import DataReporter
+from src.preprocess.quality_stats import QualityStats
+from src.preprocess.catalog import CATALOG_COLS, build_window_catalog, broadcast_to_rows
+from src.preprocess.normalizer import Normalizer
+from src.preprocess.cache import config_hash, describe_input, file_sha256
+from src.preprocess.ingest import iter_frames, read_frame
+from src.preprocess.partitioned import WINDOW_INDEX_FILE
+from src.preprocess.tensors import TENSOR_DIR
+from src.preprocess.perf import PerfRecorder
+from src.preprocess.streaming import ROW_GROUP_ROWS, ParquetSink
+from src.preprocess.generation import (
+    advance_generation, clear_journal, read_generation, read_journal, renormalized, stale_rows, write_journal,
+)
+from src.preprocess.main import check_gates, finalize, load_inputs, write_run_state
+
+logger = logging.getLogger(__name__)
+
+# Outputs extended in place by an append, in the order their rows are appended.
+APPENDED_FILES = ["dataset_clean.parquet", "dataset_model_ready.parquet", "split_manifest.parquet",
+                  "rejection_log.parquet", "window_metrics.parquet"]
+# Split manifest columns ``DataSplitter.check_disjoint`` reads.
+SPLIT_KEYS = ["session_id", "plant_id", "split"]
+
+
+def read_fingerprint(processed_dir: Path) -> Dict[str, Any]:
+    """``data_fingerprint.json`` of the finished run in ``processed_dir``."""
+    fingerprint_path = processed_dir / "data_fingerprint.json"
+    if not fingerprint_path.exists():
+        logger.error(f"No finished run in {processed_dir}; run src.preprocess.main first")
+        sys.exit(1)
+    with open(fingerprint_path) as f:
+        return json.load(f)
+
+
+def load_state(config: PreprocessConfig, processed_dir: Path, reports_dir: Path) -> Dict[str, Any]:
+    """Fingerprint, report, normalization fit and generation of a finished run in ``processed_dir``."""
+    fingerprint = read_fingerprint(processed_dir)
+    if read_journal(processed_dir) is not None:
+        logger.error("An interrupted append has not been finished; rerun src.preprocess.append to finish it")
+        sys.exit(1)
+    if fingerprint["config_hash"] != config_hash(config):
+        logger.error("Existing outputs were produced with a different config; a full rebuild is required")
+        sys.exit(1)
+    if (processed_dir / WINDOW_INDEX_FILE).exists() or (processed_dir / TENSOR_DIR).exists():
+        logger.error("Partitioned or tensor model-ready exports are not extended by an append; "
+                     "remove them or run a full rebuild")
+        sys.exit(1)
+    with open(reports_dir / "data_quality_report.json") as f:
+        report = json.load(f)
+    with open(reports_dir / "unit_conversion_report.json") as f:
+        conversion_meta = json.load(f)
+    with open(processed_dir / "normalization_stats.json") as f:
+        normalizer = Normalizer.from_dict(config, json.load(f))
+    return {
+        "inputs": fingerprint["inputs"],
+        "report": report,
+        "conversion_meta": conversion_meta,
+        "normalizer": normalizer,
+        "generation": read_generation(processed_dir),
+    }
+
+
+def pending_inputs(input_files: List[Path], known: List[Dict[str, Any]],
+                   identities: Optional[Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]]] = None
+                   ) -> List[Dict[str, Any]]:
+    """Fingerprint entries of the input files whose content is not yet part of the outputs.
+
+    Files are identified by the full-content sha256 the fingerprint records.
+    ``identities`` maps file names to their ``(size, mtime_ns)`` and
+    fingerprint entry from earlier calls and is updated in place, so
+    repeated polls only rehash files that are new or whose size or mtime
+    changed. A known file name with a new hash means an input was
+    rewritten, which only a full rebuild can reflect.
+    """
+    identities = {} if identities is None else identities
+    known_ids = {entry["sha256"] for entry in known}
+    known_names = {entry["file"]: entry["sha256"] for entry in known}
+    pending = []
+    for f in input_files:
+        st = f.stat()
+        key = (st.st_size, st.st_mtime_ns)
+        if f.name not in identities or identities[f.name][0] != key:
+            identities[f.name] = (key, describe_input(f, file_sha256(f)))
+        entry = identities[f.name][1]
+        if entry["sha256"] in known_ids:
+            continue
+        if f.name in known_names:
+            logger.error(f"{f.name} changed since it was processed; a full rebuild is required")
+            sys.exit(1)
+        pending.append(entry)
+    return pending
+
+
+def _existing_quality(processed_dir: Path) -> QualityStats:
+    """Window and rejection counters of the existing outputs; clean-row counters are added while copying."""
+    quality = QualityStats()
+    metrics = read_frame(processed_dir / "window_metrics.parquet", columns=["source_id", "session_id", "window_start_ts"])
+    metrics = metrics.astype({"source_id": str, "session_id": str})
+    quality.add_windows(metrics["source_id"].to_numpy(dtype=object))
+    rejections = read_frame(processed_dir / "rejection_log.parquet")
+    if len(rejections):
+        keys = rejections[["session_id", "window_start_ts"]].astype({"session_id": str})
+        sources = keys.merge(metrics, on=["session_id", "window_start_ts"], how="left")["source_id"]
+        quality.add_rejections(rejections["rejection_reason"].astype(str).to_numpy(dtype=object),
+                               sources.to_numpy(dtype=object))
+    return quality
+
+
+def _staged_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.append")
+
+
+def _append_parquet(path: Path, new: pd.DataFrame, on_batch: Optional[Callable[[pd.DataFrame], None]] = None) -> Path:
+    """Write the rows of ``path`` followed by ``new`` to a temporary file next to it.
+
+    Returns the temporary path; the caller renames it over ``path``. The
+    row groups match a single write of the concatenated rows.
+    """
+    tmp = _staged_path(path)
+    sink = ParquetSink(tmp)
+    empty = None
+    for batch in iter_frames(path, batch_rows=ROW_GROUP_ROWS):
+        if on_batch is not None:
+            on_batch(batch)
+        sink.write(batch)
+        empty = batch.iloc[:0]
+    sink.write(new)
+    sink.close(new.iloc[:0] if empty is None else empty)
+    return tmp
+
+
+def _leakage_windows(processed_dir: Path, catalog: pd.DataFrame, splits: pd.Series) -> pd.DataFrame:
+    """Windows of the plants in ``catalog``: the existing ones from the outputs plus the new ones.
+
+    Reads the outputs before the append replaces them, so new windows are not counted twice.
+    """
+    plants = sorted(catalog["plant_id"].astype(str).unique())
+    if not plants:
+        return catalog
+    existing = pq.read_table(processed_dir / "dataset_clean.parquet", columns=CATALOG_COLS,
+                             filters=[("plant_id", "in", plants)]).to_pandas()
+    existing = existing.drop_duplicates(["source_id", "plant_id", "session_id", "window_start_ts"])
+    existing["split"] = existing["plant_id"].astype(str).map(splits).to_numpy()
+    columns = CATALOG_COLS + ["split"]
+    ids = {col: str for col in ["source_id", "plant_id", "session_id"]}
+    if existing.empty:
+        return catalog[columns].astype(ids)
+    return pd.concat([existing[columns].astype(ids), catalog[columns].astype(ids)], ignore_index=True)
+
+
+def _merge_leakage(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    pairs = list(old["overlap_pairs"])
+    seen = {tuple(sorted(pair.items())) for pair in pairs}
+    pairs += [pair for pair in new["overlap_pairs"] if tuple(sorted(pair.items())) not in seen]
+    return {
+        "status": "FAIL" if "FAIL" in (old["status"], new["status"]) else "PASS",
+        "offending_ids": sorted(set(old["offending_ids"]) | set(new["offending_ids"])),
+        "overlap_pairs": pairs,
+    }
+
+
+def append_inputs(config: PreprocessConfig, new_files: List[Path], new_inputs: List[Dict[str, Any]], processed_dir: Path,
+                  reports_dir: Path, workers: int = 1, renormalize: bool = False,
+                  perf: Optional[PerfRecorder] = None):
+    """Clean only ``new_files`` and extend the outputs of the finished run in ``processed_dir``.
+
+    New sessions are cleaned and split on their own, since a plant's split
+    does not depend on other plants. Their rows are appended after the
+    existing ones, the train moments in ``normalization_stats.json`` are
+    extended with the new train rows, and the interval leakage check runs
+    over the new windows and the existing windows of the same plants.
+    Existing model-ready rows keep the normalization they were written
+    with; ``generation.json`` counts the rows that are now stale, and
+    ``renormalize`` rewrites them with the updated statistics.
+
+    The new outputs are staged next to the existing ones and described in
+    a journal before any of them replaces an existing file, so a run that
+    stops part way is finished by ``resume_append``.
+    """
+    perf = perf or PerfRecorder("append")
+    state = load_state(config, processed_dir, reports_dir)
+
+    with perf.stage("ingest") as counts:
+        df_raw, dropped_null_rows = load_inputs(new_files)
+        counts["rows"] = len(df_raw)
+
+    existing_sessions = set(read_frame(processed_dir / "window_metrics.parquet",
+                                       columns=["session_id"])["session_id"].astype(str))
+    repeated = sorted(existing_sessions & set(df_raw["session_id"].astype(str).unique()))
+    if repeated:
+        logger.error(f"Sessions already in the outputs: {repeated[:10]}; appending to a session "
+                     f"requires a full rebuild")
+        sys.exit(1)
+
+    with perf.stage("clean") as counts:
+        with ParallelCleaner(config, workers) as cleaner:
+            df_clean, rejection_log, _ = cleaner.run(df_raw)
+        counts["rows"], counts["windows"] = len(df_raw), cleaner.quality.total_windows
+        counts["workers"] = cleaner.pop_worker_usage()
+        del df_raw
+        window_metrics = cleaner.pop_window_metrics()
+
+    with perf.stage("split") as counts:
+        clean_file = pq.ParquetFile(processed_dir / "dataset_clean.parquet")
+        existing_manifest = read_frame(processed_dir / "split_manifest.parquet")
+        catalog = build_window_catalog(df_clean, first_window_id=len(existing_manifest),
+                                       first_row=clean_file.metadata.num_rows)
+        splitter = DataSplitter(config)
+        split_manifest = splitter.split_data(catalog)
+        catalog["split"] = split_manifest["split"].to_numpy()
+        try:
+            splitter.check_disjoint(pd.concat([existing_manifest[SPLIT_KEYS].astype(str),
+                                               split_manifest[SPLIT_KEYS].astype(str)], ignore_index=True))
+        except AssertionError as e:
+            logger.error(f"New sessions conflict with existing split assignments: {e}")
+            sys.exit(1)
+        plant_splits = existing_manifest.assign(plant_id=existing_manifest["plant_id"].astype(str)) \
+            .drop_duplicates("plant_id").set_index("plant_id")["split"].astype(str)
+        counts["rows"], counts["windows"] = len(df_clean), len(catalog)
+
+    with perf.stage("normalize") as counts:
+        normalizer: Normalizer = state["normalizer"]
+        before = normalizer.to_dict()
+        normalizer.partial_fit(df_clean, broadcast_to_rows(catalog, "split") == "train")
+        normalization_changed = normalizer.to_dict() != before
+        df_model = df_clean.assign(value_norm=normalizer.transform(df_clean))
+        counts["rows"] = len(df_clean)
+
+    with perf.stage("write_outputs") as counts:
+        quality = _existing_quality(processed_dir)
+        new_rows = {
+            "dataset_clean.parquet": (df_clean, quality.add_clean),
+            "dataset_model_ready.parquet": (df_model, None),
+            "split_manifest.parquet": (split_manifest, None),
+            "rejection_log.parquet": (rejection_log, None),
+            "window_metrics.parquet": (window_metrics, None),
+        }
+        for name in APPENDED_FILES:
+            _append_parquet(processed_dir / name, *new_rows[name])
+        counts["rows"] = len(df_clean)
+    quality.merge(cleaner.quality)
+    del df_model
+
+    with perf.stage("report") as counts:
+        windows = _leakage_windows(processed_dir, catalog, plant_splits)
+        reporter = DataReporter(config)
+        reporter.set_extra_stats(dropped_null_rows=state["report"]["dropped_null_rows"] + dropped_null_rows)
+        report = reporter.generate_report(quality, clean_file.schema_arrow.names, windows, state["conversion_meta"])
+        report["leakage_checks"] = _merge_leakage(state["report"]["leakage_checks"], report["leakage_checks"])
+        counts["windows"] = len(windows)
+
+    generation = advance_generation(state["generation"], len(df_clean), normalization_changed)
+    logger.info(f"Generation {generation['generation']}: appending {len(df_clean)} clean rows in "
+                f"{len(catalog)} windows from {len(new_files)} file(s)")
+    # Every output is staged; from here on the journal lets a later run finish the append.
+    write_journal(processed_dir, {
+        "inputs": state["inputs"] + new_inputs,
+        "report": report,
+        "conversion_meta": state["conversion_meta"],
+        "normalization": normalizer.to_dict(),
+        "generation": generation,
+        "renormalize": renormalize,
+    })
+    commit_append(config, processed_dir, reports_dir, perf)
+
+
+def commit_append(config: PreprocessConfig, processed_dir: Path, reports_dir: Path, perf: PerfRecorder):
+    """Move the staged outputs of the journaled append into place and write its run metadata.
+
+    Every step can be repeated, so an append that stopped anywhere after
+    writing its journal is finished by calling this again.
+    """
+    journal = read_journal(processed_dir)
+    for name in APPENDED_FILES:
+        if _staged_path(processed_dir / name).exists():
+            os.replace(_staged_path(processed_dir / name), processed_dir / name)
+    normalizer = Normalizer.from_dict(config, journal["normalization"])
+    normalizer.write(processed_dir / "normalization_stats.json")
+    generation = journal["generation"]
+    if journal["renormalize"]:
+        with perf.stage("renormalize") as counts:
+            counts["rows"] = renormalize_model_ready(normalizer, processed_dir)
+        generation = renormalized(generation)
+    if stale_rows(generation):
+        logger.warning(f"{stale_rows(generation)} model-ready rows were normalized with older train statistics; "
+                       f"rerun with --renormalize to rewrite them")
+    write_run_state(config, journal["report"], journal["conversion_meta"], processed_dir, reports_dir,
+                    journal["inputs"], perf, generation)
+    clear_journal(processed_dir)
+    check_gates(config, journal["report"])
+
+
+def resume_append(config: PreprocessConfig, processed_dir: Path, reports_dir: Path) -> bool:
+    """Finish an append that stopped after writing its journal; returns whether there was one."""
+    journal = read_journal(processed_dir)
+    if journal is None:
+        return False
+    logger.warning(f"Finishing the interrupted append of generation {journal['generation']['generation']}")
+    commit_append(config, processed_dir, reports_dir, PerfRecorder("append"))
+    return True
+
+
+def renormalize_model_ready(normalizer: Normalizer, processed_dir: Path) -> int:
+    """Rewrite ``dataset_model_ready.parquet`` from the clean rows with ``normalizer``; returns the row count."""
+    model_path = processed_dir / "dataset_model_ready.parquet"
+    tmp = model_path.with_name(f".{model_path.name}.renormalize")
+    sink = ParquetSink(tmp)
+    empty = None
+    for batch in iter_frames(processed_dir / "dataset_clean.parquet", batch_rows=ROW_GROUP_ROWS):
+        batch["value_norm"] = normalizer.transform(batch)
+        sink.write(batch)
+        empty = batch.iloc[:0]
+    sink.close(empty if empty is not None else read_frame(model_path).iloc[:0])
+    os.replace(tmp, model_path)
+    return pq.ParquetFile(model_path).metadata.num_rows
+
+
+def renormalize_only(config: PreprocessConfig, processed_dir: Path, reports_dir: Path,
+                     perf: Optional[PerfRecorder] = None):
+    """Bring every model-ready row to the current normalization generation without new inputs."""
+    perf = perf or PerfRecorder("append")
+    state = load_state(config, processed_dir, reports_dir)
+    with perf.stage("renormalize") as counts:
+        counts["rows"] = renormalize_model_ready(state["normalizer"], processed_dir)
+    finalize(config, state["report"], state["conversion_meta"], processed_dir, reports_dir, state["inputs"],
+             perf, renormalized(state["generation"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LBA Preprocessing Pipeline: append new sessions to existing outputs")
+    parser.add_argument("--config", type=str, required=True, help="Path to preprocess.yaml")
+    parser.add_argument("--raw-dir", type=str, default="data/raw", help="Input directory")
+    parser.add_argument("--processed-dir", type=str, default="data/processed", help="Output directory")
+    parser.add_argument("--reports-dir", type=str, default="data/reports", help="Reports directory")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Clean session partitions in this many worker processes")
+    parser.add_argument("--renormalize", action="store_true",
+                        help="Rewrite all model-ready rows with the updated train statistics")
+    parser.add_argument("--watch", type=float, default=None,
+                        help="Keep polling the input directory every this many seconds")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.watch is not None and args.watch <= 0:
+        parser.error("--watch must be positive")
+
+    try:
+        config: PreprocessConfig = load_config(Path(args.config))
+    except Exception as e:
+        logger.error(f"Config load failed: {e}")
+        sys.exit(1)
+
+    raw_dir = Path(args.raw_dir)
+    processed_dir = Path(args.processed_dir)
+    reports_dir = Path(args.reports_dir)
+
+    identities: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+    while True:
+        resume_append(config, processed_dir, reports_dir)
+        input_files = sorted(list(raw_dir.glob("*.parquet")) + list(raw_dir.glob("*.csv")))
+        if args.watch is not None:
+            # Files still being written are picked up on a later poll.
+            settled = time.time() - args.watch
+            input_files = [f for f in input_files if f.stat().st_mtime < settled]
+        new_inputs = pending_inputs(input_files, read_fingerprint(processed_dir)["inputs"], identities)
+        if new_inputs:
+            new_files = [raw_dir / entry["file"] for entry in new_inputs]
+            append_inputs(config, new_files, new_inputs, processed_dir, reports_dir, args.workers, args.renormalize)
+        elif args.renormalize:
+            renormalize_only(config, processed_dir, reports_dir)
+        elif args.watch is None:
+            logger.info(f"No new input files in {raw_dir}")
+        if args.watch is None:
+            return
+        time.sleep(args.watch)
+
+if __name__ == "__main__":
+    main()
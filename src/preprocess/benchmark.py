@@ -0,0 +1,200 @@
+import argparse
+import json
+import logging
+import subprocess
+import sys
+import tempfile
+import yaml
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.preprocess.config import PreprocessConfig, load_config
+from src.preprocess.cache import config_hash
+from src.preprocess.catalog import build_window_catalog
+from src.preprocess.cleaner import DataCleaner
+from src.preprocess.splitter import DataSplitter
+from src.preprocess.reporter import DataReporter
+from src.preprocess.perf import PerfRecorder
+from src.preprocess.synthetic import CampaignSpec, generate_campaign, inject_split_leakage, write_campaign
+from src.preprocess.main import prepare_frame
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Plants per named scale; every plant has 2 sessions of 20 windows.
+SCALES = {"tiny": 4, "small": 16, "medium": 128, "large": 512}
+TARGETS = ["DataCleaner.run", "DataSplitter.split_data", "DataReporter.compute_leakage_checks", "main"]
+BENCHMARK_FAULTS = {
+    "flatline_fraction": 0.02, "drift_fraction": 0.02, "low_snr_fraction": 0.02, "clip_fraction": 0.02,
+    "leakage_fraction": 0.05,
+}
+INPUT_FILES = 4
+
+
+def scale_spec(scale: str) -> CampaignSpec:
+    return CampaignSpec(n_plants=SCALES[scale], sessions_per_plant=2, windows_per_session=20, **BENCHMARK_FAULTS)
+
+
+def _result(stage: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "rows": stage["rows"] // stage["calls"],
+        "windows": stage["windows"] // stage["calls"],
+        "wall_s": stage["wall_s"] / stage["calls"],
+        "rows_per_s": stage["rows_per_s"],
+        "windows_per_s": stage["windows_per_s"],
+        "peak_rss_bytes": stage["peak_rss_bytes"],
+    }
+
+
+def run_benchmark(config: PreprocessConfig, spec: CampaignSpec, work_dir: Path,
+                  repeats: int = 1) -> Dict[str, Dict[str, Any]]:
+    """Time each of ``TARGETS`` on one synthetic campaign, ``repeats`` times each.
+
+    The library targets run in this process on the ingested campaign;
+    their ``peak_rss_bytes`` is this process's RSS, campaign included.
+    ``main`` runs as a subprocess over the campaign written to
+    ``INPUT_FILES`` Parquet files, and its peak is taken from that run's
+    ``perf_report.json``. Wall times are means over the repeats.
+    """
+    rows, windows = generate_campaign(spec, config)
+    raw_dir = work_dir / "raw"
+    write_campaign(rows, raw_dir, INPUT_FILES, spec.seed)
+    df = prepare_frame(rows)
+    del rows
+    leaky_plants = sorted(windows.loc[windows["leaky"], "plant_id"].astype(str).unique())
+    n_rows, n_windows = len(df), len(windows)
+
+    perf = PerfRecorder("benchmark")
+    for _ in range(repeats):
+        frame = df.copy()
+        with perf.stage("DataCleaner.run") as counts:
+            df_clean, _, _ = DataCleaner(config).run(frame)
+            counts["rows"], counts["windows"] = n_rows, n_windows
+        del frame
+
+        catalog = build_window_catalog(df_clean)
+        with perf.stage("DataSplitter.split_data") as counts:
+            split_manifest = DataSplitter(config).split_data(catalog)
+            counts["rows"], counts["windows"] = len(df_clean), len(catalog)
+
+        split_manifest = inject_split_leakage(split_manifest, leaky_plants)
+        with perf.stage("DataReporter.compute_leakage_checks") as counts:
+            DataReporter(config).compute_leakage_checks(df_clean, split_manifest)
+            counts["rows"], counts["windows"] = len(df_clean), len(catalog)
+    del df, df_clean
+
+    config_path = work_dir / "preprocess.yaml"
+    with open(config_path, "w") as f:
+        yaml.dump(config.model_dump(), f)
+    main_peaks = []
+    for _ in range(repeats):
+        with perf.stage("main") as counts:
+            subprocess.run([
+                sys.executable, "-m", "src.preprocess.main", "--config", str(config_path),
+                "--raw-dir", str(raw_dir), "--processed-dir", str(work_dir / "processed"),
+                "--reports-dir", str(work_dir / "reports"),
+            ], check=True, capture_output=True)
+            counts["rows"], counts["windows"] = n_rows, n_windows
+        with open(work_dir / "reports" / "perf_report.json") as f:
+            main_peaks.append(json.load(f)["max_rss_bytes"])
+
+    results = {stage["stage"]: _result(stage) for stage in perf.report()["stages"]}
+    results["main"]["peak_rss_bytes"] = max(main_peaks)
+    return results
+
+
+def find_regressions(results: Dict[str, Dict[str, Dict[str, Any]]], baseline: Dict[str, Dict[str, Dict[str, Any]]],
+                     tolerance: float) -> List[str]:
+    """Targets whose throughput fell below ``baseline / (1 + tolerance)`` or whose peak RSS grew past
+    ``baseline * (1 + tolerance)``. Scales and targets missing from either side are not compared."""
+    regressions = []
+    for scale, targets in results.items():
+        for target, result in targets.items():
+            base = baseline.get(scale, {}).get(target)
+            if base is None:
+                continue
+            if result["rows_per_s"] < base["rows_per_s"] / (1 + tolerance):
+                regressions.append(f"{scale}/{target}: {result['rows_per_s']:.0f} rows/s "
+                                   f"vs baseline {base['rows_per_s']:.0f}")
+            if result["peak_rss_bytes"] > base["peak_rss_bytes"] * (1 + tolerance):
+                regressions.append(f"{scale}/{target}: peak RSS {result['peak_rss_bytes']} B "
+                                   f"vs baseline {base['peak_rss_bytes']} B")
+    return regressions
+
+
+def load_baseline(path: Path, config: PreprocessConfig) -> Optional[Dict[str, Any]]:
+    """Stored baseline results for ``config``, or ``None`` when there is no baseline file."""
+    if not path.exists():
+        return None
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline["config_hash"] != config_hash(config):
+        logger.error(f"Baseline {path} was recorded with a different config")
+        sys.exit(1)
+    return baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LBA Preprocessing Pipeline: synthetic-scale benchmarks")
+    parser.add_argument("--config", type=str, required=True, help="Path to preprocess.yaml")
+    parser.add_argument("--scales", type=str, default="small",
+                        help=f"Comma-separated scales out of {', '.join(SCALES)}")
+    parser.add_argument("--repeats", type=int, default=1, help="Runs of each target per scale")
+    parser.add_argument("--baseline", type=str, default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Allowed fractional throughput loss or peak memory growth against the baseline")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store these results as the baseline of the benchmarked scales")
+    parser.add_argument("--reports-dir", type=str, default="data/reports", help="Reports directory")
+    args = parser.parse_args()
+    scales = args.scales.split(",")
+    unknown = [scale for scale in scales if scale not in SCALES]
+    if unknown:
+        parser.error(f"Unknown scales {unknown}")
+    if args.repeats < 1:
+        parser.error("--repeats must be at least 1")
+    if args.update_baseline and not args.baseline:
+        parser.error("--update-baseline needs --baseline")
+
+    try:
+        config: PreprocessConfig = load_config(Path(args.config))
+    except Exception as e:
+        logger.error(f"Config load failed: {e}")
+        sys.exit(1)
+    baseline_path = Path(args.baseline) if args.baseline else None
+    baseline = load_baseline(baseline_path, config) if baseline_path else None
+
+    results = {}
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as work_dir:
+            results[scale] = run_benchmark(config, scale_spec(scale), Path(work_dir), args.repeats)
+        for target in TARGETS:
+            result = results[scale][target]
+            logger.info(f"{scale}/{target}: {result['wall_s']:.3f} s, {result['rows_per_s']:.0f} rows/s, "
+                        f"peak RSS {result['peak_rss_bytes'] / 2**20:.0f} MiB")
+
+    regressions = find_regressions(results, baseline["results"], args.tolerance) if baseline else []
+    reports_dir = Path(args.reports_dir)
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    with open(reports_dir / "benchmark_report.json", "w") as f:
+        json.dump({"benchmark_version": "1.0.0", "config_hash": config_hash(config), "tolerance": args.tolerance,
+                   "results": results, "regressions": regressions}, f, indent=2)
+
+    if args.update_baseline:
+        stored = baseline["results"] if baseline else {}
+        stored.update(results)
+        with open(baseline_path, "w") as f:
+            json.dump({"benchmark_version": "1.0.0", "config_hash": config_hash(config), "results": stored},
+                      f, indent=2)
+        logger.info(f"Baseline updated for scales {scales} in {baseline_path}")
+        return
+
+    if regressions:
+        for regression in regressions:
+            logger.error(f"Regression: {regression}")
+        logger.error(f"BENCHMARK REGRESSION: {len(regressions)} target(s) beyond tolerance {args.tolerance}")
+        sys.exit(1)
+    logger.info("Benchmarks within tolerance." if baseline else "No baseline to compare against.")
+
+if __name__ == "__main__":
+    main()
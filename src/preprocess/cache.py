@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from src.preprocess.config import PreprocessConfig
+from src.preprocess.streaming import write_parquet
+
+# Bump when cleaner output changes for identical inputs and config.
+CACHE_VERSION = "4"
+
+# Inputs hashed concurrently; hashlib and file reads release the GIL.
+HASH_WORKERS = min(8, os.cpu_count() or 1)
+
+# PreprocessConfig fields that only act after cleaning. Every other field is
+# part of the cleaning key, so a new cleaner setting invalidates the cache by default.
+NON_CLEANING_FIELDS = [
+    "label_event_gap_seconds", "max_rejection_rate_per_source", "min_samples_per_family",
+    "min_samples_per_species", "random_seed", "normalization_scope",
+]
+
+
+def cleaning_fields(config: PreprocessConfig) -> Dict[str, Any]:
+    """The settings of ``config`` that change what DataCleaner produces for one file."""
+    return {name: value for name, value in config.model_dump().items() if name not in NON_CLEANING_FIELDS}
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def hash_files(paths: List[Path], workers: int = HASH_WORKERS) -> List[str]:
+    """``file_sha256`` of every path, in ``paths`` order, hashing up to ``workers`` files at once."""
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        return list(pool.map(file_sha256, paths))
+
+
+def config_hash(config: PreprocessConfig) -> str:
+    return hashlib.md5(str(config.model_dump()).encode()).hexdigest()
+
+
+def cleaning_config_hash(config: PreprocessConfig) -> str:
+    payload = json.dumps({"cache_version": CACHE_VERSION, **cleaning_fields(config)}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class CleaningCache:
+    """Per-input-file cleaning results addressed by file content and cleaning config.
+
+    Each entry is a directory ``<file_sha256>-<cleaning_config_hash>`` holding
+    ``clean.parquet``, ``rejection_log.parquet``, ``window_metrics.parquet``
+    and ``stats.json``. Entries are
+    written to a temporary directory and renamed into place, so a crashed run
+    never leaves a partial entry behind.
+    """
+
+    def __init__(self, cache_dir: Path, config: PreprocessConfig):
+        self.cache_dir = Path(cache_dir)
+        self.config_hash = cleaning_config_hash(config)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _entry_dir(self, file_hash: str) -> Path:
+        return self.cache_dir / f"{file_hash}-{self.config_hash}"
+
+    def load(self, file_hash: str
+             ) -> Optional[Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, Dict[str, Any]]]:
+        entry = self._entry_dir(file_hash)
+        if not entry.is_dir():
+            return None
+        with open(entry / "stats.json") as f:
+            stats = json.load(f)
+        return (pd.read_parquet(entry / "clean.parquet"), pd.read_parquet(entry / "rejection_log.parquet"),
+                pd.read_parquet(entry / "window_metrics.parquet"), stats)
+
+    def store(self, file_hash: str, df_clean: pd.DataFrame, rejection_log: pd.DataFrame,
+              window_metrics: pd.DataFrame, stats: Dict[str, Any]):
+        entry = self._entry_dir(file_hash)
+        tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_dir))
+        try:
+            write_parquet(df_clean, tmp / "clean.parquet")
+            write_parquet(rejection_log, tmp / "rejection_log.parquet")
+            write_parquet(window_metrics, tmp / "window_metrics.parquet")
+            with open(tmp / "stats.json", "w") as f:
+                json.dump(stats, f, indent=2)
+            os.replace(tmp, entry)
+        except OSError:
+            if not entry.is_dir():
+                raise
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp)
+
+
+def describe_input(f: Path, file_hash: str) -> Dict[str, Any]:
+    """Fingerprint entry of one input with its full-content ``file_sha256``."""
+    return {"file": f.name, "sha256": file_hash, "size_bytes": f.stat().st_size}
+
+
+def describe_inputs(input_files: List[Path], file_hashes: List[str]) -> List[Dict[str, Any]]:
+    return [describe_input(f, h) for f, h in zip(input_files, file_hashes)]
+
+
+def write_data_fingerprint(path: Path, inputs: List[Dict[str, Any]], config: PreprocessConfig):
+    dataset = hashlib.sha256("".join(f"{i['file']}:{i['sha256']}\n" for i in inputs).encode()).hexdigest()
+    fingerprint = {
+        "fingerprint_version": "1.0.0",
+        "dataset_sha256": dataset,
+        "inputs": inputs,
+        "config_hash": config_hash(config),
+        "cleaning_config_hash": cleaning_config_hash(config),
+    }
+    with open(path, "w") as f:
+        json.dump(fingerprint, f, indent=2)
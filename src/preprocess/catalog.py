@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from src.preprocess.quality import WINDOW_KEYS
+
+CATALOG_COLS = [
+    "source_id", "plant_id", "session_id", "window_start_ts", "window_end_ts",
+    "label_event_start_ts", "label_event_end_ts", "family_id", "species_id"
+]
+
+
+def build_window_catalog(df: pd.DataFrame, first_window_id: int = 0, first_row: int = 0) -> pd.DataFrame:
+    """One row per window of a window-contiguous frame such as ``DataCleaner`` output.
+
+    Columns are ``window_id`` followed by ``CATALOG_COLS``, ``row_offset`` and
+    ``n_samples``: the window's rows are ``df.iloc[row_offset - first_row:][:n_samples]``.
+    Ids and offsets start at ``first_window_id``/``first_row`` so catalogs of
+    consecutive chunks concatenate into the catalog of the whole dataset.
+    """
+    codes = df.groupby(WINDOW_KEYS, sort=False, observed=True).ngroup().to_numpy()
+    if len(codes) == 0:
+        catalog = df.iloc[:0][CATALOG_COLS].reset_index(drop=True)
+        catalog.insert(0, "window_id", np.zeros(0, dtype=np.int64))
+        catalog["row_offset"] = np.zeros(0, dtype=np.int64)
+        catalog["n_samples"] = np.zeros(0, dtype=np.int64)
+        return catalog
+
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    if len(starts) != codes.max() + 1:
+        raise ValueError("Rows of each window must be contiguous to build the window catalog")
+
+    catalog = df.iloc[starts][CATALOG_COLS].reset_index(drop=True)
+    catalog.insert(0, "window_id", np.arange(first_window_id, first_window_id + len(starts), dtype=np.int64))
+    catalog["row_offset"] = starts.astype(np.int64) + first_row
+    catalog["n_samples"] = np.diff(np.r_[starts, len(df)]).astype(np.int64)
+    return catalog
+
+
+def broadcast_to_rows(catalog: pd.DataFrame, column: str) -> np.ndarray:
+    """Expand a per-window catalog column back to one value per sample row."""
+    return np.repeat(catalog[column].to_numpy(), catalog["n_samples"].to_numpy())
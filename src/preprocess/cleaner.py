@@ -1,17 +1,30 @@
 import numpy as np
 import pandas as pd
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, List
 from src.preprocess.config import PreprocessConfig
+from src.preprocess.quality import (
+    segment_windows, window_metrics, strided_window_metrics, prefix_window_metrics,
+    spectral_window_metrics, segment_spectral_metrics, first_failing_reason, metric_table,
+    empty_metric_table, WINDOW_KEYS
+)
+from src.preprocess.quality_stats import QualityStats
+from src.preprocess.ingest import concat_frames
+from src.preprocess.windowing import SessionWindower
 
 class DataCleaner:
     def __init__(self, config: PreprocessConfig):
         self.config = config
-        self.stats = {
-            "total_windows": 0,
-            "rejected_windows": 0,
-            "reasons": {},
-            "by_source": {}
-        }
+        self.quality = QualityStats()
+        self.window_metrics: List[pd.DataFrame] = []
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return self.quality.to_dict()
+
+    def pop_window_metrics(self) -> pd.DataFrame:
+        """Metric rows of every window judged since the last call, in cleaning order."""
+        parts, self.window_metrics = [part for part in self.window_metrics if not part.empty], []
+        return concat_frames(parts) if parts else empty_metric_table()
 
     def _check_clip_fraction(self, signal: np.ndarray) -> bool:
         if len(signal) == 0:
@@ -42,18 +55,152 @@ class DataCleaner:
         snr = 10 * np.log10(p_signal / p_noise)
         return snr < self.config.snr_db_min
 
-    def run(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]:
-        self.stats["total_windows"] = len(df)
+    def _band_power_ratio(self, signal: np.ndarray, in_band) -> float:
+        signal = signal.astype(np.float64)
+        spectrum = np.fft.rfft(signal - signal.mean())
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        freqs = np.fft.rfftfreq(len(signal), d=1.0 / self.config.target_hz)
+        total = power[1:].sum()
+        return float(power[1:][in_band(freqs[1:])].sum() / total) if total > 0 else 0.0
+
+    def _check_line_noise(self, signal: np.ndarray) -> bool:
+        if self.config.line_noise_ratio_max is None or len(signal) == 0:
+            return False
+        nyquist = self.config.target_hz / 2
+        lines = [f for f in self.config.line_noise_freqs_hz if f < nyquist]
+        half_band = self.config.line_noise_bandwidth_hz / 2
+        ratio = self._band_power_ratio(
+            signal, lambda freqs: np.any([np.abs(freqs - f) <= half_band for f in lines], axis=0)
+        )
+        return ratio > self.config.line_noise_ratio_max
+
+    def _check_out_of_band(self, signal: np.ndarray) -> bool:
+        if self.config.out_of_band_ratio_max is None or len(signal) == 0:
+            return False
+        low, high = self.config.signal_band_min_hz, self.config.signal_band_max_hz
+        ratio = self._band_power_ratio(signal, lambda freqs: (freqs < low) | (freqs > high))
+        return ratio > self.config.out_of_band_ratio_max
+
+    def _check_spikes(self, signal: np.ndarray) -> bool:
+        if self.config.spike_count_max is None or len(signal) == 0:
+            return False
+        signal = signal.astype(np.float64)
+        deviation = np.abs(signal - np.median(signal))
+        mad = np.median(deviation)
+        spikes = np.sum(deviation > self.config.spike_mad_k * 1.4826 * mad)
+        return spikes > self.config.spike_count_max
+
+    def _apply_scaling(self, df: pd.DataFrame) -> Dict[str, Any]:
         conversion_meta = {}
 
         if "source_id" in df.columns and self.config.source_scaling:
-            df["scale_factor"] = df["source_id"].map(self.config.source_scaling).fillna(1.0)
-            df["value_uv"] = df["value"] * df["scale_factor"]
+            df["scale_factor"] = df["source_id"].map(self.config.source_scaling).astype(np.float64).fillna(1.0)
+            df["value_uv"] = df["value"].to_numpy(dtype=np.float64) * df["scale_factor"].to_numpy()
             for src, factor in self.config.source_scaling.items():
                 conversion_meta[src] = {"scale_factor": factor}
         else:
-            df["value_uv"] = df["value"]
+            df["value_uv"] = df["value"].to_numpy(dtype=np.float64)
             conversion_meta["default"] = {"scale_factor": 1.0}
+        return conversion_meta
+
+    @staticmethod
+    def _stored(df: pd.DataFrame) -> pd.DataFrame:
+        """``df`` with ``value_uv`` shrunk to its float32 contract dtype once the checks have run."""
+        if "value_uv" in df.columns and df["value_uv"].dtype == np.float64:
+            df["value_uv"] = df["value_uv"].astype(np.float32)
+        return df
+
+    def run(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]:
+        if "window_start_ts" not in df.columns:
+            return self._run_continuous(df)
+
+        conversion_meta = self._apply_scaling(df)
+
+        order, starts, counts = segment_windows(df)
+        signal = df["value_uv"].to_numpy(dtype=np.float64)[order]
+        metrics = window_metrics(signal, starts, counts, self.config)
+        metrics.update(segment_spectral_metrics(signal, starts, counts, self.config))
+
+        first_rows = order[starts]
+        duration = (
+            df["window_end_ts"].iloc[first_rows] - df["window_start_ts"].iloc[first_rows]
+        ).dt.total_seconds().to_numpy()
+        reasons = first_failing_reason(metrics, duration, self.config)
+        rejected = reasons != ""
+        self.window_metrics.append(metric_table(df.iloc[first_rows], metrics, duration))
+
+        window_sources = df["source_id"].to_numpy()[first_rows]
+        self.quality.add_windows(window_sources)
+        self.quality.add_rejections(reasons[rejected], window_sources[rejected])
+
+        keep = np.repeat(~rejected, counts)
+        if keep.any():
+            df_clean = df.iloc[order[keep]].reset_index(drop=True)
+        else:
+            df_clean = pd.DataFrame(columns=df.columns)
+
+        if rejected.any():
+            rejection_log = df.iloc[first_rows[rejected]].reset_index(drop=True)
+            rejection_log["rejection_reason"] = reasons[rejected]
+        else:
+            rejection_log = pd.DataFrame(columns=["session_id", "window_start_ts", "rejection_reason"])
+
+        self.quality.add_clean(df_clean)
+        return self._stored(df_clean), self._stored(rejection_log), conversion_meta
+
+    def _run_continuous(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]:
+        """Resample continuous session recordings and clean their strided windows.
+
+        Quality metrics are computed on views over each session array; only
+        windows are materialized as rows: clean ones in full, rejected ones
+        as their first row in the rejection log.
+        """
+        conversion_meta = self._apply_scaling(df)
+        windower = SessionWindower(self.config)
+        columns = windower.output_columns(df)
+
+        clean_parts = []
+        rejected_parts = []
+        for session in windower.iter_sessions(df):
+            if session.n_windows == 0:
+                continue
+            self.quality.add_windows(np.repeat(session.source_id, session.n_windows))
+            window_stats = prefix_window_metrics if self.config.incremental_window_stats else strided_window_metrics
+            metrics = window_stats(
+                session.signals["value_uv"], session.win_len, session.stride, session.n_windows, self.config
+            )
+            metrics.update(spectral_window_metrics(session.matrix("value_uv"), self.config))
+            duration = np.full(session.n_windows, float(self.config.window_seconds))
+            reasons = first_failing_reason(metrics, duration, self.config)
+            rejected = reasons != ""
+            all_windows = np.ones(session.n_windows, dtype=bool)
+            self.window_metrics.append(
+                metric_table(session.window_rows(all_windows, WINDOW_KEYS, first_only=True), metrics, duration)
+            )
+
+            self.quality.add_rejections(reasons[rejected], np.repeat(session.source_id, rejected.sum()))
+            if (~rejected).any():
+                clean_parts.append(session.window_rows(~rejected, columns))
+            if rejected.any():
+                first_rows = session.window_rows(rejected, columns, first_only=True)
+                first_rows["rejection_reason"] = reasons[rejected]
+                rejected_parts.append(first_rows)
+
+        if clean_parts:
+            df_clean = pd.concat(clean_parts, ignore_index=True)
+        else:
+            df_clean = pd.DataFrame(columns=columns)
+
+        if rejected_parts:
+            rejection_log = pd.concat(rejected_parts, ignore_index=True)
+        else:
+            rejection_log = pd.DataFrame(columns=["session_id", "window_start_ts", "rejection_reason"])
+
+        self.quality.add_clean(df_clean)
+        return self._stored(df_clean), self._stored(rejection_log), conversion_meta
+
+    def _run_per_group(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]:
+        conversion_meta = self._apply_scaling(df)
 
         clean_rows = []
         rejected_rows = []
@@ -73,12 +220,17 @@ class DataCleaner:
                 rejection_reason = "snr"
             elif self._check_clip_fraction(signal):
                 rejection_reason = "clip"
+            elif self._check_line_noise(signal):
+                rejection_reason = "line_noise"
+            elif self._check_out_of_band(signal):
+                rejection_reason = "out_of_band"
+            elif self._check_spikes(signal):
+                rejection_reason = "spike"
 
+            src = group["source_id"].iloc[0]
+            self.quality.add_windows(np.array([src], dtype=object))
             if rejection_reason:
-                self.stats["rejected_windows"] += 1
-                self.stats["reasons"][rejection_reason] = self.stats["reasons"].get(rejection_reason, 0) + 1
-                src = group["source_id"].iloc[0]
-                self.stats["by_source"][src] = self.stats["by_source"].get(src, 0) + 1
+                self.quality.add_rejections(np.array([rejection_reason]), np.array([src], dtype=object))
                 meta = group.iloc[0].to_dict()
                 meta["rejection_reason"] = rejection_reason
                 rejected_rows.append(meta)
@@ -91,8 +243,9 @@ class DataCleaner:
             df_clean = pd.DataFrame(columns=df.columns)
 
         if rejected_rows:
-            rejection_log = pd.DataFrame(rejected_rows)
+            rejection_log = pd.DataFrame(rejected_rows).astype(df.dtypes.to_dict())
         else:
             rejection_log = pd.DataFrame(columns=["session_id", "window_start_ts", "rejection_reason"])
 
-        return df_clean, rejection_log, conversion_meta
+        self.quality.add_clean(df_clean)
+        return self._stored(df_clean), self._stored(rejection_log), conversion_meta
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Dict
+from pydantic import BaseModel, Field, model_validator
+from typing import Dict, List, Literal, Optional
 from pathlib import Path
 import yaml
 
@@ -11,6 +11,9 @@ class PreprocessConfig(BaseModel):
     window_seconds: int = 60
     stride_seconds: int = 10
     label_event_gap_seconds: int = 10
+    # Continuous inputs only: gaps between samples longer than this end a
+    # segment instead of being interpolated; null bridges every gap.
+    max_gap_seconds: Optional[float] = 1.0
 
     flatline_std_min: float = 1e-6
     drift_slope_max_uv_per_s: float = 10.0
@@ -19,14 +22,38 @@ class PreprocessConfig(BaseModel):
     sensor_min_val: float = -10000.0
     sensor_max_val: float = 10000.0
     clip_fraction_max: float = 0.05
+    incremental_window_stats: bool = False
+
+    # Spectral and spike checks; each is off while its limit is null.
+    line_noise_freqs_hz: List[float] = Field(default_factory=lambda: [50.0, 60.0])
+    line_noise_bandwidth_hz: float = 2.0
+    line_noise_ratio_max: Optional[float] = None
+    signal_band_min_hz: float = 0.0
+    signal_band_max_hz: float = 2.0
+    out_of_band_ratio_max: Optional[float] = None
+    spike_mad_k: float = 6.0
+    spike_count_max: Optional[int] = None
 
     max_rejection_rate_per_source: float = 0.30
     min_samples_per_family: int = 100
     min_samples_per_species: int = 50
     random_seed: int = 42
+    normalization_scope: Literal["global", "source_id", "hardware_id"] = "global"
 
     source_scaling: Dict[str, float] = Field(default_factory=dict)
 
+    @model_validator(mode="after")
+    def check_spectral_bands(self):
+        nyquist = self.target_hz / 2
+        if self.line_noise_ratio_max is not None and not any(f < nyquist for f in self.line_noise_freqs_hz):
+            raise ValueError(
+                f"line_noise_ratio_max is set but no line_noise_freqs_hz lies below the "
+                f"{nyquist} Hz Nyquist frequency of target_hz={self.target_hz}"
+            )
+        if not 0 <= self.signal_band_min_hz < self.signal_band_max_hz:
+            raise ValueError("signal_band_min_hz must be >= 0 and below signal_band_max_hz")
+        return self
+
 def load_config(path: Path) -> PreprocessConfig:
     with open(path) as f:
         data = yaml.safe_load(f)
@@ -0,0 +1,89 @@
+import json
+import os
+import pyarrow.parquet as pq
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+GENERATION_FILE = "generation.json"
+# Written by an append before it replaces any output; removed once the run metadata matches the outputs.
+APPEND_JOURNAL = "append_journal.json"
+
+
+def initial_generation(model_ready_rows: int) -> Dict[str, Any]:
+    """Generation 0: every model-ready row normalized with the statistics of the same run."""
+    return {
+        "generation_version": "1.0.0",
+        "generation": 0,
+        "normalization_generation": 0,
+        "segments": [{"generation": 0, "row_start": 0, "row_end": int(model_ready_rows),
+                      "normalization_generation": 0}],
+    }
+
+
+def read_generation(processed_dir: Path) -> Dict[str, Any]:
+    """The generation state of ``processed_dir``; outputs written without one count as generation 0."""
+    path = processed_dir / GENERATION_FILE
+    if not path.exists():
+        return initial_generation(pq.ParquetFile(processed_dir / "dataset_model_ready.parquet").metadata.num_rows)
+    with open(path) as f:
+        state = json.load(f)
+    return {key: state[key] for key in initial_generation(0)}
+
+
+def advance_generation(state: Dict[str, Any], new_rows: int, normalization_changed: bool) -> Dict[str, Any]:
+    """State after appending ``new_rows`` model-ready rows normalized with the latest statistics.
+
+    The normalization generation moves to the new generation when the
+    append changed the train statistics, which leaves every earlier row
+    normalized with an older fit.
+    """
+    generation = state["generation"] + 1
+    normalization_generation = generation if normalization_changed else state["normalization_generation"]
+    segments = list(state["segments"])
+    if new_rows:
+        start = segments[-1]["row_end"] if segments else 0
+        segments.append({"generation": generation, "row_start": start, "row_end": start + int(new_rows),
+                         "normalization_generation": normalization_generation})
+    return {**state, "generation": generation, "normalization_generation": normalization_generation,
+            "segments": segments}
+
+
+def renormalized(state: Dict[str, Any]) -> Dict[str, Any]:
+    """State after rewriting every model-ready row with the current statistics."""
+    current = state["normalization_generation"]
+    return {**state, "segments": [{**segment, "normalization_generation": current} for segment in state["segments"]]}
+
+
+def stale_rows(state: Dict[str, Any]) -> int:
+    return sum(segment["row_end"] - segment["row_start"] for segment in state["segments"]
+               if segment["normalization_generation"] != state["normalization_generation"])
+
+
+def write_generation(processed_dir: Path, state: Dict[str, Any]):
+    stale = stale_rows(state)
+    with open(processed_dir / GENERATION_FILE, "w") as f:
+        json.dump({**state, "stale_model_ready_rows": stale, "renormalize_required": stale > 0}, f, indent=2)
+
+
+def write_journal(processed_dir: Path, journal: Dict[str, Any]):
+    """Atomically record everything an append needs to finish once its outputs are staged."""
+    path = processed_dir / APPEND_JOURNAL
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(journal, f, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_journal(processed_dir: Path) -> Optional[Dict[str, Any]]:
+    """The journal of an append that stopped before finishing, if any."""
+    path = processed_dir / APPEND_JOURNAL
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def clear_journal(processed_dir: Path):
+    (processed_dir / APPEND_JOURNAL).unlink(missing_ok=True)
@@ -0,0 +1,220 @@
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+# Data contract dtypes (lba_contract_pack_v1_0_5_md/02_data_contract.md). IDs
+# are strings on disk and categoricals in memory; timestamps are parsed by the
+# caller and kept as datetime64[ns, UTC].
+ID_COLS = ["family_id", "species_id", "plant_id", "session_id", "hardware_id", "source_id"]
+TIMESTAMP_COLS = [
+    "timestamp_utc", "window_start_ts", "window_end_ts",
+    "label_event_start_ts", "label_event_end_ts"
+]
+# Window and label-event bounds repeat on every row of a window or session.
+REPEATED_TIMESTAMP_COLS = TIMESTAMP_COLS[1:]
+# Raw values stay float64 through unit scaling and the quality checks: float32
+# steps near 100 (about 7.6e-6) are coarser than flatline_std_min. Only the
+# stored value_uv and value_norm are shrunk.
+FLOAT64_COLS = ["value"]
+FLOAT32_COLS = ["value_uv", "value_norm"]
+INT8_COLS = ["label"]
+
+READ_BATCH_ROWS = 64 * 1024
+
+# Files read ahead concurrently; pyarrow decodes each file on its own threads too.
+READ_WORKERS = min(8, os.cpu_count() or 1)
+
+# pandas' default NA markers, so CSV null-row accounting matches pd.read_csv.
+CSV_NULL_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+# Fixed CSV column types: pyarrow infers types from the first block only, and
+# IDs or timestamps must stay text. Numbers are widened to contract dtypes later.
+_DICTIONARY = pa.dictionary(pa.int32(), pa.string())
+CSV_COLUMN_TYPES = {
+    **{col: _DICTIONARY for col in ID_COLS + REPEATED_TIMESTAMP_COLS},
+    "timestamp_utc": pa.string(),
+    "value": pa.float64(),
+    "label": pa.float64(),
+}
+
+
+def as_sorted_categorical(values: pd.Series) -> pd.Series:
+    """``values`` as a categorical of strings with lexicographically sorted categories.
+
+    Sorted categories make ``groupby(sort=True)`` and ``sort_values`` order
+    rows exactly as they would with plain string IDs. Nulls stay null.
+    """
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype("category")
+    categories = values.cat.categories
+    if categories.dtype != object or not all(isinstance(c, str) for c in categories):
+        values = values.cat.rename_categories(categories.astype(str))
+        categories = values.cat.categories
+    if not categories.is_monotonic_increasing:
+        values = values.cat.reorder_categories(sorted(categories))
+    return values
+
+
+def as_int8(values: pd.Series) -> pd.Series:
+    """``values`` cast to int8; raises ``ValueError`` unless every value is a whole number in range."""
+    numbers = values.to_numpy(dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        bad = ~((numbers == np.round(numbers)) & (numbers >= -128) & (numbers <= 127))
+    if bad.any():
+        raise ValueError(f"{values.name} has {int(bad.sum())} value(s) that are not whole numbers "
+                         f"in the int8 range, first {numbers[bad][0]!r}")
+    return values.astype(np.int8)
+
+
+def apply_contract_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast the contract columns present in ``df`` in place and return it.
+
+    Expects nulls to have been dropped already (``label`` becomes int8, and a
+    label that is not a whole number in the int8 range raises ``ValueError``).
+    """
+    for col in ID_COLS:
+        if col in df.columns:
+            df[col] = as_sorted_categorical(df[col])
+    for col in FLOAT64_COLS:
+        if col in df.columns and df[col].dtype != np.float64:
+            df[col] = df[col].astype(np.float64)
+    for col in FLOAT32_COLS:
+        if col in df.columns and df[col].dtype != np.float32:
+            df[col] = df[col].astype(np.float32)
+    for col in INT8_COLS:
+        if col in df.columns and df[col].dtype != np.int8:
+            df[col] = as_int8(df[col])
+    for col in TIMESTAMP_COLS:
+        if col in df.columns and isinstance(df[col].dtype, pd.DatetimeTZDtype) and df[col].dt.unit != "ns":
+            df[col] = df[col].dt.as_unit("ns")
+    return df
+
+
+def parse_timestamp_column(values: pd.Series) -> pd.Series:
+    """``pd.to_datetime(values, utc=True)`` evaluated once per distinct value.
+
+    Distinct values are parsed in order of first appearance, so the inferred
+    format and any parse error are those of parsing the whole column.
+    """
+    if values.dtype.kind == "M" or isinstance(values.dtype, pd.DatetimeTZDtype):
+        return pd.to_datetime(values, errors="raise", utc=True)
+    codes, uniques = pd.factorize(values)
+    if (codes < 0).any():
+        return pd.to_datetime(values, errors="raise", utc=True)
+    parsed = pd.to_datetime(np.asarray(uniques, dtype=object), errors="raise", utc=True)
+    return pd.Series(parsed.take(codes), index=values.index, name=values.name)
+
+
+def _string_ids(columns: List[str]) -> List[str]:
+    return [col for col in ID_COLS if col in columns]
+
+
+def _parquet_dictionary(schema: pa.Schema, columns: List[str]) -> List[str]:
+    return [
+        c for c in columns
+        if c in ID_COLS + REPEATED_TIMESTAMP_COLS and schema.field(c).type in ("string", "large_string")
+    ]
+
+
+def csv_convert_options(columns: Optional[List[str]] = None) -> pv.ConvertOptions:
+    """pyarrow CSV conversion with the pipeline's column types and null markers, projected to ``columns``."""
+    return pv.ConvertOptions(
+        column_types=CSV_COLUMN_TYPES,
+        include_columns=columns or [],
+        null_values=CSV_NULL_VALUES,
+        strings_can_be_null=True,
+    )
+
+
+def table_to_frame(table: pa.Table) -> pd.DataFrame:
+    """A pyarrow table as a frame with string ID columns held as sorted categoricals."""
+    df = table.to_pandas()
+    for col in _string_ids(df.columns):
+        df[col] = as_sorted_categorical(df[col])
+    return df
+
+
+def read_frame(path: Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read one input file, projected to ``columns``, through pyarrow's multithreaded readers.
+
+    String IDs never materialize as one Python object per row: they are
+    read dictionary-encoded into categoricals, as are the repeated
+    timestamp columns when stored as text.
+    """
+    if path.suffix == ".parquet":
+        schema = pq.read_schema(path)
+        names = columns if columns is not None else schema.names
+        table = pq.read_table(path, columns=columns, read_dictionary=_parquet_dictionary(schema, names))
+    else:
+        table = pv.read_csv(path, convert_options=csv_convert_options(columns))
+    return table_to_frame(table)
+
+
+def prefetch_frames(paths: List[Path], columns: Optional[List[str]] = None,
+                    workers: int = READ_WORKERS) -> Iterator[Tuple[Path, Future]]:
+    """``(path, future of read_frame(path))`` in ``paths`` order, reading up to ``workers`` files ahead.
+
+    Callers take each result before the next one is scheduled, so at most
+    ``workers + 1`` frames are held at once.
+    """
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        queued = iter(paths)
+        pending = deque((p, pool.submit(read_frame, p, columns)) for _, p in zip(range(workers), queued))
+        try:
+            while pending:
+                path, future = pending.popleft()
+                yield path, future
+                nxt = next(queued, None)
+                if nxt is not None:
+                    pending.append((nxt, pool.submit(read_frame, nxt, columns)))
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+def iter_frames(path: Path, columns: Optional[List[str]] = None,
+                batch_rows: int = READ_BATCH_ROWS) -> Iterator[pd.DataFrame]:
+    """``read_frame`` in batches of at most ``batch_rows`` rows.
+
+    Parquet and CSV are both read as pyarrow record batches with the same
+    column types as ``read_frame``.
+    """
+    if path.suffix == ".parquet":
+        pf = pq.ParquetFile(path)
+        names = columns if columns is not None else pf.schema_arrow.names
+        pf = pq.ParquetFile(path, read_dictionary=_parquet_dictionary(pf.schema_arrow, names))
+        batches = pf.iter_batches(batch_size=batch_rows, columns=columns)
+    else:
+        batches = pv.open_csv(path, convert_options=csv_convert_options(columns))
+    for batch in batches:
+        for lo in range(0, batch.num_rows, batch_rows):
+            yield table_to_frame(pa.Table.from_batches([batch.slice(lo, batch_rows)]))
+
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """``pd.concat`` that keeps ID columns categorical across frames.
+
+    Frames read separately carry different category sets, which plain
+    concatenation would silently widen to object dtype.
+    """
+    frames = list(frames)
+    for col in ID_COLS:
+        if not any(col in f.columns and isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames):
+            continue
+        parts = [as_sorted_categorical(f[col]) if col in f.columns else None for f in frames]
+        categories = sorted(set().union(*(p.cat.categories for p in parts if p is not None)))
+        frames = [
+            f.assign(**{col: p.cat.set_categories(categories)}) if p is not None else f
+            for f, p in zip(frames, parts)
+        ]
+    return pd.concat(frames, ignore_index=True)
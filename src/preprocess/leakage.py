@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from typing import Tuple
+
+
+def to_ns(values) -> np.ndarray:
+    """UTC epoch nanoseconds for a column of timestamps."""
+    return pd.DatetimeIndex(pd.to_datetime(values, utc=True)).as_unit("ns").asi8
+
+
+def overlapping_pairs(left_start: np.ndarray, left_end: np.ndarray,
+                      right_start: np.ndarray, right_end: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """All ``(i, j)`` with ``left_start[i] < right_end[j]`` and ``left_end[i] > right_start[j]``.
+
+    Right intervals are sorted by start once; since no right interval is
+    longer than ``max_len``, every match of left interval ``i`` starts in
+    ``(left_start[i] - max_len, left_end[i])``, found by binary search. Cost is
+    O((n + m) log m) plus the candidates in those ranges, which are the true
+    overlaps when interval lengths are uniform (fixed-length windows).
+    """
+    empty = np.zeros(0, dtype=np.int64)
+    if len(left_start) == 0 or len(right_start) == 0:
+        return empty, empty
+
+    order = np.argsort(right_start, kind="stable")
+    rs = right_start[order]
+    re = right_end[order]
+    max_len = max(int((right_end - right_start).max()), 0)
+
+    lo = np.searchsorted(rs, left_start - max_len, side="right")
+    hi = np.searchsorted(rs, left_end, side="left")
+    n_candidates = np.maximum(hi - lo, 0)
+    if n_candidates.sum() == 0:
+        return empty, empty
+
+    li = np.repeat(np.arange(len(left_start)), n_candidates)
+    offsets = np.arange(len(li)) - np.repeat(np.cumsum(n_candidates) - n_candidates, n_candidates)
+    pos = np.repeat(lo, n_candidates) + offsets
+    hit = re[pos] > left_start[li]
+    return li[hit], order[pos[hit]]
+
+
+def overlap_seconds(left_start, left_end, right_start, right_end) -> np.ndarray:
+    return (np.minimum(left_end, right_end) - np.maximum(left_start, right_start)) / 1e9
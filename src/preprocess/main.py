@@ -1,121 +1,438 @@
 import argparse
+import json
 import logging
 import sys
+import tempfile
 import yaml
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
+from concurrent.futures import Future
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 from src.preprocess.config import PreprocessConfig, load_config
 from src.preprocess.cleaner import DataCleaner
+from src.preprocess.parallel import ParallelCleaner
+from src.preprocess.shards import SHARD_STATS_FILE, parse_shard_spec, shard_dir_name, plant_shard
 from src.preprocess.splitter import DataSplitter
 from src.preprocess.reporter import DataReporter
+from src.preprocess.quality_stats import QualityStats
+from src.preprocess.catalog import build_window_catalog, broadcast_to_rows
+from src.preprocess.normalizer import NORM_BLOCK_ROWS, Normalizer
+from src.preprocess.partitioned import write_partitioned
+from src.preprocess.tensors import write_window_tensors
+from src.preprocess.preflight import run_preflight
+from src.preprocess.perf import PerfRecorder
+from src.preprocess.generation import clear_journal, initial_generation, write_generation
+from src.preprocess.cache import (
+    CleaningCache, hash_files, config_hash, describe_inputs, write_data_fingerprint
+)
+from src.preprocess.quality import WINDOW_KEYS, segment_windows, empty_metric_table
+from src.preprocess.ingest import (
+    TIMESTAMP_COLS, REPEATED_TIMESTAMP_COLS, read_frame, prefetch_frames, parse_timestamp_column,
+    apply_contract_dtypes, concat_frames, iter_frames
+)
+from src.preprocess.streaming import (
+    ParquetSink, write_parquet, scan_sessions, plan_chunks, spill_chunks, read_chunk
+)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+MANIFEST_COLS = ["source_id", "plant_id", "session_id", "window_start_ts", "window_end_ts", "split"]
+
 def parse_timestamps(df: pd.DataFrame) -> pd.DataFrame:
-    ts_cols = [
-        "timestamp_utc", "window_start_ts", "window_end_ts",
-        "label_event_start_ts", "label_event_end_ts"
-    ]
-    for col in ts_cols:
+    for col in TIMESTAMP_COLS:
         if col in df.columns:
             try:
-                df[col] = pd.to_datetime(df[col], errors="raise", utc=True)
+                if col in REPEATED_TIMESTAMP_COLS:
+                    df[col] = parse_timestamp_column(df[col])
+                else:
+                    df[col] = pd.to_datetime(df[col], errors="raise", utc=True)
             except Exception as e:
                 logger.error(f"Failed to parse timestamp column {col}: {e}")
                 sys.exit(1)
     return df
 
-def main():
-    parser = argparse.ArgumentParser(description="LBA Preprocessing Pipeline")
-    parser.add_argument("--config", type=str, required=True, help="Path to preprocess.yaml")
-    parser.add_argument("--raw-dir", type=str, default="data/raw", help="Input directory")
-    parser.add_argument("--processed-dir", type=str, default="data/processed", help="Output directory")
-    parser.add_argument("--reports-dir", type=str, default="data/reports", help="Reports directory")
-    args = parser.parse_args()
+def prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Parse timestamps and cast a null-free frame to the data contract dtypes."""
+    df = parse_timestamps(df)
+    try:
+        return apply_contract_dtypes(df)
+    except Exception as e:
+        logger.error(f"Failed to cast columns to contract dtypes: {e}")
+        sys.exit(1)
 
+def load_frame(f: Path, prefetched: Optional[Future] = None) -> pd.DataFrame:
+    """Raw frame of ``f``, taken from ``prefetched`` when it was read ahead."""
     try:
-        config_path = Path(args.config)
-        config: PreprocessConfig = load_config(config_path)
+        return prefetched.result() if prefetched is not None else read_frame(f)
     except Exception as e:
-        logger.error(f"Config load failed: {e}")
+        logger.error(f"Failed to load {f}: {e}")
         sys.exit(1)
 
-    raw_dir = Path(args.raw_dir)
-    processed_dir = Path(args.processed_dir)
-    reports_dir = Path(args.reports_dir)
-    processed_dir.mkdir(parents=True, exist_ok=True)
-    reports_dir.mkdir(parents=True, exist_ok=True)
+def read_input(f: Path, prefetched: Optional[Future] = None) -> Tuple[pd.DataFrame, int]:
+    df = load_frame(f, prefetched)
+    len_before = len(df)
+    df = df.dropna(how="any")
+    return prepare_frame(df), len_before - len(df)
 
+def load_inputs(input_files: List[Path]) -> Tuple[pd.DataFrame, int]:
     all_dfs = []
-    input_files = sorted(list(raw_dir.glob("*.parquet")) + list(raw_dir.glob("*.csv")))
-    if not input_files:
-        logger.error(f"No input files found in {raw_dir}")
-        sys.exit(1)
+    initial_null_count = 0
+    for f, future in prefetch_frames(input_files):
+        df, dropped = read_input(f, future)
+        initial_null_count += dropped
+        all_dfs.append(df)
+
+    return concat_frames(all_dfs), initial_null_count
+
+def clean_with_cache(config: PreprocessConfig, input_files: List[Path], file_hashes: List[str],
+                     cache: CleaningCache):
+    """Clean file by file, reusing cached results for unchanged files.
 
+    Per-file results are reassembled into the global window order of a
+    single ``DataCleaner.run`` over all inputs, which requires every window
+    to live in one input file.
+    """
+    quality = QualityStats()
+    clean_parts, rejection_parts, metric_parts, window_parts = [], [], [], []
+    conversion_meta: Dict[str, Any] = {}
     initial_null_count = 0
-    for f in input_files:
+    misses = 0
+
+    for f, file_hash in zip(input_files, file_hashes):
+        entry = cache.load(file_hash)
+        if entry is None:
+            misses += 1
+            df_raw, dropped = read_input(f)
+            file_cleaner = DataCleaner(config)
+            df_clean, rejection_log, meta = file_cleaner.run(df_raw)
+            del df_raw
+            stats = {
+                "quality_stats": file_cleaner.stats,
+                "conversion_meta": meta,
+                "dropped_null_rows": int(dropped),
+            }
+            window_metrics = file_cleaner.pop_window_metrics()
+            cache.store(file_hash, df_clean, rejection_log, window_metrics, stats)
+            entry = (df_clean, rejection_log, window_metrics, stats)
+
+        df_clean, rejection_log, window_metrics, stats = entry
+        quality.merge(QualityStats.from_dict(stats["quality_stats"]))
+        conversion_meta = stats["conversion_meta"]
+        initial_null_count += stats["dropped_null_rows"]
+        clean_parts.append(df_clean)
+        if not df_clean.empty:
+            window_parts.append(df_clean[WINDOW_KEYS].drop_duplicates())
+        if not rejection_log.empty:
+            rejection_parts.append(rejection_log)
+            window_parts.append(rejection_log[WINDOW_KEYS])
+        if not window_metrics.empty:
+            metric_parts.append(window_metrics)
+
+    logger.info(f"Cleaning cache: {len(input_files) - misses} hit(s), {misses} miss(es)")
+    if window_parts and concat_frames(window_parts).duplicated().any():
+        logger.error("A window spans several input files; per-file caching cannot be used for this data")
+        sys.exit(1)
+
+    non_empty = [part for part in clean_parts if not part.empty]
+    if non_empty:
+        df_clean = apply_contract_dtypes(concat_frames(non_empty))
+        order, _, _ = segment_windows(df_clean)
+        df_clean = df_clean.iloc[order].reset_index(drop=True)
+    else:
+        df_clean = clean_parts[-1]
+    if rejection_parts:
+        rejection_log = apply_contract_dtypes(concat_frames(rejection_parts))
+        order, _, _ = segment_windows(rejection_log)
+        rejection_log = rejection_log.iloc[order].reset_index(drop=True)
+    else:
+        rejection_log = pd.DataFrame(columns=["session_id", "window_start_ts", "rejection_reason"])
+    if metric_parts:
+        window_metrics = concat_frames(metric_parts)
+        order, _, _ = segment_windows(window_metrics)
+        window_metrics = window_metrics.iloc[order].reset_index(drop=True)
+    else:
+        window_metrics = empty_metric_table()
+
+    return df_clean, rejection_log, window_metrics, quality, conversion_meta, initial_null_count
+
+def run_in_memory(config: PreprocessConfig, input_files: List[Path], processed_dir: Path,
+                  file_hashes: List[str], cache: Optional[CleaningCache] = None, workers: int = 1,
+                  partitioned: bool = False, tensors: bool = False, perf: Optional[PerfRecorder] = None
+                  ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    perf = perf or PerfRecorder("in_memory")
+    if cache is None:
+        with perf.stage("ingest") as counts:
+            df_raw, initial_null_count = load_inputs(input_files)
+            counts["rows"] = len(df_raw)
+        with perf.stage("clean") as counts:
+            with ParallelCleaner(config, workers) as cleaner:
+                df_clean, rejection_log, conversion_meta = cleaner.run(df_raw)
+            counts["rows"], counts["windows"] = len(df_raw), cleaner.quality.total_windows
+            counts["workers"] = cleaner.pop_worker_usage()
+            del df_raw
+            quality = cleaner.quality
+            window_metrics = cleaner.pop_window_metrics()
+    else:
+        with perf.stage("ingest_clean_cached") as counts:
+            (df_clean, rejection_log, window_metrics, quality, conversion_meta,
+             initial_null_count) = clean_with_cache(config, input_files, file_hashes, cache)
+            counts["windows"] = quality.total_windows
+
+    with perf.stage("split") as counts:
+        catalog = build_window_catalog(df_clean)
+        splitter = DataSplitter(config)
+        split_manifest = splitter.split_data(catalog)
+        catalog["split"] = split_manifest["split"].to_numpy()
+        counts["rows"], counts["windows"] = len(df_clean), len(catalog)
+
+    with perf.stage("report") as counts:
+        reporter = DataReporter(config)
+        reporter.set_extra_stats(dropped_null_rows=initial_null_count)
+        quality_report = reporter.generate_report(quality, df_clean.columns, catalog, conversion_meta)
+        counts["windows"] = len(catalog)
+
+    with perf.stage("write_clean") as counts:
+        write_parquet(df_clean, processed_dir / "dataset_clean.parquet")
+        counts["rows"] = len(df_clean)
+
+    with perf.stage("normalize") as counts:
+        normalizer = Normalizer(config)
+        normalizer.partial_fit(df_clean, broadcast_to_rows(catalog, "split") == "train")
+        normalizer.write(processed_dir / "normalization_stats.json")
+        df_model = df_clean.assign(value_norm=normalizer.transform(df_clean))
+        counts["rows"] = len(df_clean)
+
+    with perf.stage("write_outputs") as counts:
+        write_parquet(df_model, processed_dir / "dataset_model_ready.parquet")
+        del df_model
+        write_parquet(split_manifest, processed_dir / "split_manifest.parquet")
+        write_parquet(rejection_log, processed_dir / "rejection_log.parquet")
+        write_parquet(window_metrics, processed_dir / "window_metrics.parquet")
+        counts["rows"] = len(df_clean)
+
+    write_exports(config, catalog, processed_dir, partitioned, tensors, perf)
+    return quality_report, conversion_meta
+
+def write_exports(config: PreprocessConfig, catalog: pd.DataFrame, processed_dir: Path,
+                  partitioned: bool, tensors: bool, perf: PerfRecorder):
+    """Optional model-ready layouts derived from ``dataset_model_ready.parquet``."""
+    model_ready_path = processed_dir / "dataset_model_ready.parquet"
+    n_rows = int(catalog["n_samples"].sum())
+    if partitioned:
+        with perf.stage("export_partitioned") as counts:
+            write_partitioned(model_ready_path, catalog, processed_dir)
+            counts["rows"], counts["windows"] = n_rows, len(catalog)
+    if tensors:
+        with perf.stage("export_tensors") as counts:
+            write_window_tensors(model_ready_path, catalog, processed_dir, config)
+            counts["rows"], counts["windows"] = n_rows, len(catalog)
+
+def run_streaming(config: PreprocessConfig, input_files: List[Path], processed_dir: Path,
+                  chunk_rows: int, workers: int = 1, partitioned: bool = False, tensors: bool = False,
+                  perf: Optional[PerfRecorder] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    perf = perf or PerfRecorder("streaming")
+    with perf.stage("scan") as counts:
         try:
-            df = pd.read_parquet(f) if f.suffix == ".parquet" else pd.read_csv(f)
-            len_before = len(df)
-            df = df.dropna(how="any")
-            initial_null_count += (len_before - len(df))
-            all_dfs.append(df)
+            session_index, null_key_rows = scan_sessions(input_files)
         except Exception as e:
-            logger.error(f"Failed to load {f}: {e}")
+            logger.error(f"Failed to scan inputs: {e}")
             sys.exit(1)
+        counts["rows"] = int(session_index["rows"].sum()) + null_key_rows
 
-    df_raw = pd.concat(all_dfs, ignore_index=True)
-    df_raw = parse_timestamps(df_raw)
+    splitter = DataSplitter(config)
+    clean_sink = ParquetSink(processed_dir / "dataset_clean.parquet")
+    manifest_sink = ParquetSink(processed_dir / "split_manifest.parquet")
+    rejection_sink = ParquetSink(processed_dir / "rejection_log.parquet")
+    metrics_sink = ParquetSink(processed_dir / "window_metrics.parquet")
 
-    cleaner = DataCleaner(config)
-    df_clean, rejection_log, conversion_meta = cleaner.run(df_raw)
+    initial_null_count = null_key_rows
+    conversion_meta: Dict[str, Any] = {}
+    clean_columns = None
+    catalog_parts = []
+    n_windows, n_clean_rows = 0, 0
 
-    splitter = DataSplitter(config)
-    split_manifest = splitter.split_data(df_clean)
-
-    reporter = DataReporter(config)
-    reporter.set_extra_stats(dropped_null_rows=initial_null_count)
-    quality_report = reporter.generate_report(
-        df_raw, df_clean, rejection_log, split_manifest, cleaner.stats, conversion_meta
-    )
-
-    df_clean.to_parquet(processed_dir / "dataset_clean.parquet", index=False)
-
-    merge_keys = ["source_id", "plant_id", "session_id", "window_start_ts", "window_end_ts"]
-    df_merged = pd.merge(
-        df_clean,
-        split_manifest[merge_keys + ["split"]],
-        on=merge_keys,
-        how="left"
-    )
-
-    train_vals = df_merged[df_merged["split"] == "train"]["value_uv"].values
-    if len(train_vals) > 0:
-        mean = np.mean(train_vals)
-        std = np.std(train_vals)
-        if std == 0:
-            std = 1.0
-    else:
-        mean, std = 0.0, 1.0
+    spill_dir = tempfile.TemporaryDirectory(prefix=".spill-", dir=processed_dir)
+    with perf.stage("spill") as counts:
+        try:
+            spills, dropped = spill_chunks(input_files, plan_chunks(session_index, chunk_rows), Path(spill_dir.name))
+        except Exception as e:
+            logger.error(f"Failed to split inputs into chunks: {e}")
+            sys.exit(1)
+        initial_null_count += sum(dropped)
+        counts["rows"] = int(session_index["rows"].sum())
+
+    with spill_dir, ParallelCleaner(config, workers) as cleaner:
+        for spill_paths in spills:
+            if not spill_paths:
+                continue
+            with perf.stage("ingest") as counts:
+                try:
+                    df_raw = read_chunk(spill_paths)
+                except Exception as e:
+                    logger.error(f"Failed to load chunk: {e}")
+                    sys.exit(1)
+                df_raw = prepare_frame(df_raw)
+                counts["rows"] = len(df_raw)
+            with perf.stage("clean") as counts:
+                windows_before = cleaner.quality.total_windows
+                df_clean, rejection_log, conversion_meta = cleaner.run(df_raw)
+                counts["rows"], counts["windows"] = len(df_raw), cleaner.quality.total_windows - windows_before
+                counts["workers"] = cleaner.pop_worker_usage()
+                clean_columns = df_clean.columns
+                del df_raw
+            with perf.stage("write_clean"):
+                rejection_sink.write(rejection_log)
+                metrics_sink.write(cleaner.pop_window_metrics())
+            if df_clean.empty:
+                continue
+
+            with perf.stage("split") as counts:
+                catalog = build_window_catalog(df_clean, first_window_id=n_windows, first_row=n_clean_rows)
+                split_manifest = splitter.split_data(catalog)
+                catalog["split"] = split_manifest["split"].to_numpy()
+                counts["rows"], counts["windows"] = len(df_clean), len(catalog)
+            with perf.stage("write_clean") as counts:
+                clean_sink.write(df_clean)
+                manifest_sink.write(split_manifest)
+                counts["rows"] = len(df_clean)
+            n_windows += len(catalog)
+            n_clean_rows += len(df_clean)
+            catalog_parts.append(catalog)
+
+    if clean_columns is None:
+        logger.error("No rows left after dropping nulls")
+        sys.exit(1)
+
+    with perf.stage("write_clean"):
+        clean_sink.close(pd.DataFrame(columns=clean_columns))
+        manifest_sink.close(pd.DataFrame(columns=MANIFEST_COLS))
+        rejection_sink.close(pd.DataFrame(columns=["session_id", "window_start_ts", "rejection_reason"]))
+        metrics_sink.close(empty_metric_table())
+
+    with perf.stage("split"):
+        if catalog_parts:
+            catalog = concat_frames(catalog_parts)
+            splitter.check_disjoint(catalog)
+        else:
+            catalog = build_window_catalog(pd.DataFrame(columns=clean_columns))
+            catalog["split"] = pd.Series(dtype=object)
+
+    with perf.stage("report") as counts:
+        reporter = DataReporter(config)
+        reporter.set_extra_stats(dropped_null_rows=initial_null_count)
+        quality_report = reporter.generate_report(cleaner.quality, clean_columns, catalog, conversion_meta)
+        counts["windows"] = len(catalog)
+
+    with perf.stage("normalize") as counts:
+        # Fit over the written clean rows in the same NORM_BLOCK_ROWS blocks as the in-memory
+        # run, so the moments are merged in the same order regardless of chunk boundaries.
+        is_train = broadcast_to_rows(catalog, "split") == "train"
+        normalizer = Normalizer(config)
+        pos = 0
+        for batch in iter_frames(processed_dir / "dataset_clean.parquet", batch_rows=NORM_BLOCK_ROWS):
+            normalizer.partial_fit(batch, is_train[pos:pos + len(batch)])
+            pos += len(batch)
+        counts["rows"] = pos
+
+    with perf.stage("write_outputs") as counts:
+        normalizer.write(processed_dir / "normalization_stats.json")
+        model_sink = ParquetSink(processed_dir / "dataset_model_ready.parquet")
+        clean_file = pq.ParquetFile(processed_dir / "dataset_clean.parquet")
+        for batch in clean_file.iter_batches(batch_size=chunk_rows):
+            df_batch = batch.to_pandas()
+            df_batch["value_norm"] = normalizer.transform(df_batch)
+            model_sink.write(df_batch)
+        model_sink.close(pd.DataFrame(columns=list(clean_columns) + ["value_norm"]))
+        counts["rows"] = n_clean_rows
+
+    write_exports(config, catalog, processed_dir, partitioned, tensors, perf)
+    return quality_report, conversion_meta
+
+def run_shard(config: PreprocessConfig, input_files: List[Path], processed_dir: Path,
+              inputs: List[Dict[str, Any]], shard: int, n_shards: int, workers: int = 1,
+              perf: Optional[PerfRecorder] = None) -> Path:
+    """Map phase: clean only the plants of ``shard`` and write mergeable partial outputs.
+
+    The shard directory holds the shard's clean rows, window catalog,
+    rejection log and window metrics in global window order, plus ``shard_stats.json`` with
+    quality counters and the ``inputs`` fingerprint entries for ``src.preprocess.reduce``.
+    """
+    perf = perf or PerfRecorder("shard")
+    with perf.stage("ingest") as counts:
+        parts = []
+        initial_null_count = 0
+        for f, future in prefetch_frames(input_files):
+            df = load_frame(f, future)
+            df = df[plant_shard(df["plant_id"], n_shards) == shard]
+            len_before = len(df)
+            df = df.dropna(how="any")
+            initial_null_count += len_before - len(df)
+            parts.append(prepare_frame(df))
+        df_raw = concat_frames(parts)
+        counts["rows"] = len(df_raw)
+
+    with perf.stage("clean") as counts:
+        with ParallelCleaner(config, workers) as cleaner:
+            df_clean, rejection_log, conversion_meta = cleaner.run(df_raw)
+        counts["rows"], counts["windows"] = len(df_raw), cleaner.quality.total_windows
+        counts["workers"] = cleaner.pop_worker_usage()
+        del df_raw
+
+    with perf.stage("write_outputs") as counts:
+        shard_dir = processed_dir / shard_dir_name(shard, n_shards)
+        shard_dir.mkdir(parents=True, exist_ok=True)
+        write_parquet(df_clean, shard_dir / "clean.parquet")
+        write_parquet(build_window_catalog(df_clean), shard_dir / "catalog.parquet")
+        write_parquet(rejection_log, shard_dir / "rejection_log.parquet")
+        write_parquet(cleaner.pop_window_metrics(), shard_dir / "window_metrics.parquet")
+        counts["rows"] = len(df_clean)
+    stats = {
+        "shard": shard,
+        "n_shards": n_shards,
+        "config_hash": config_hash(config),
+        "inputs": inputs,
+        "clean_columns": list(df_clean.columns),
+        "quality_stats": cleaner.stats,
+        "conversion_meta": conversion_meta,
+        "dropped_null_rows": int(initial_null_count),
+    }
+    with open(shard_dir / SHARD_STATS_FILE, "w") as f:
+        json.dump(stats, f, indent=2)
+    return shard_dir
 
-    df_merged["value_norm"] = (df_merged["value_uv"] - mean) / std
-    cols_tier_b = list(df_clean.columns) + ["value_norm"]
-    df_merged[cols_tier_b].to_parquet(processed_dir / "dataset_model_ready.parquet", index=False)
+def finalize(config: PreprocessConfig, quality_report: Dict[str, Any], conversion_meta: Dict[str, Any],
+             processed_dir: Path, reports_dir: Path, inputs: List[Dict[str, Any]],
+             perf: Optional[PerfRecorder] = None, generation: Optional[Dict[str, Any]] = None):
+    """Write the reports and run metadata, then enforce the Gate 0 checks."""
+    write_run_state(config, quality_report, conversion_meta, processed_dir, reports_dir, inputs, perf, generation)
+    check_gates(config, quality_report)
 
-    split_manifest.to_parquet(processed_dir / "split_manifest.parquet", index=False)
-    rejection_log.to_parquet(processed_dir / "rejection_log.parquet", index=False)
+def write_run_state(config: PreprocessConfig, quality_report: Dict[str, Any], conversion_meta: Dict[str, Any],
+                    processed_dir: Path, reports_dir: Path, inputs: List[Dict[str, Any]],
+                    perf: Optional[PerfRecorder] = None, generation: Optional[Dict[str, Any]] = None):
+    """Write the reports, config snapshot, fingerprint and generation state.
 
-    import json
+    ``generation`` defaults to generation 0 over all model-ready rows.
+    """
     with open(reports_dir / "data_quality_report.json", "w") as f:
         json.dump(quality_report, f, indent=2, default=str)
+    if perf is not None:
+        perf.write(reports_dir / "perf_report.json")
     with open(reports_dir / "unit_conversion_report.json", "w") as f:
         json.dump(conversion_meta, f, indent=2)
     with open(processed_dir / "config_snapshot.yaml", "w") as f:
         yaml.dump(config.model_dump(), f)
+    write_data_fingerprint(processed_dir / "data_fingerprint.json", inputs, config)
+    if generation is None:
+        generation = initial_generation(pq.ParquetFile(processed_dir / "dataset_model_ready.parquet").metadata.num_rows)
+    write_generation(processed_dir, generation)
 
+def check_gates(config: PreprocessConfig, quality_report: Dict[str, Any]):
+    """Exit 1 when the run fails a Gate 0 check."""
     if quality_report["leakage_checks"]["status"] == "FAIL":
         logger.error("GATE 0 FAILURE: Leakage detected.")
         sys.exit(1)
@@ -127,5 +444,106 @@ def main():
 
     logger.info("Preprocessing completed successfully.")
 
+def preflight(config: PreprocessConfig, input_files: List[Path], reports_dir: Path):
+    """Write ``preflight_report.json`` and exit 1 if any input fails the schema checks."""
+    report = run_preflight(input_files, config)
+    with open(reports_dir / "preflight_report.json", "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    for warning in report["warnings"]:
+        logger.warning(f"Preflight: {warning}")
+    for error in report["errors"]:
+        logger.error(f"Preflight: {error}")
+    if report["status"] == "FAIL":
+        logger.error(f"PREFLIGHT FAILURE: {len(report['errors'])} error(s)")
+        sys.exit(1)
+    logger.info(f"Preflight passed: {len(input_files)} file(s), {report['total_rows']} row(s)"
+                + ("" if report["rows_exact"] else " (CSV row counts are sampled)"))
+
+def main():
+    parser = argparse.ArgumentParser(description="LBA Preprocessing Pipeline")
+    parser.add_argument("--config", type=str, required=True, help="Path to preprocess.yaml")
+    parser.add_argument("--raw-dir", type=str, default="data/raw", help="Input directory")
+    parser.add_argument("--processed-dir", type=str, default="data/processed", help="Output directory")
+    parser.add_argument("--reports-dir", type=str, default="data/reports", help="Reports directory")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Process session-aligned chunks with bounded memory")
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000,
+                        help="Target rows per streaming chunk (whole sessions are never split)")
+    parser.add_argument("--cache-dir", type=str, default=None,
+                        help="Reuse per-input-file cleaning results stored in this directory")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Clean session partitions in this many worker processes")
+    parser.add_argument("--shard", type=str, default=None,
+                        help="Map phase i/N: clean only plants hashed to shard i; combine with src.preprocess.reduce")
+    parser.add_argument("--partition-model-ready", action="store_true",
+                        help="Also write model-ready rows partitioned by split/source_id with a window index")
+    parser.add_argument("--export-tensors", action="store_true",
+                        help="Also export value_norm per split as (windows x samples) float32 .npy memmaps")
+    parser.add_argument("--preflight", action="store_true",
+                        help="Only check input schemas, nulls, value ranges and source row counts from file metadata")
+    parser.add_argument("--profile", action="store_true",
+                        help="Also dump cProfile stats per pipeline stage to <reports-dir>/profiles")
+    args = parser.parse_args()
+    if args.shard and (args.streaming or args.cache_dir or args.partition_model_ready or args.export_tensors):
+        parser.error("--shard cannot be combined with --streaming, --cache-dir or model-ready exports")
+    if args.streaming and args.cache_dir:
+        parser.error("--cache-dir cannot be combined with --streaming")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.workers > 1 and args.cache_dir:
+        parser.error("--workers cannot be combined with --cache-dir")
+
+    try:
+        config_path = Path(args.config)
+        config: PreprocessConfig = load_config(config_path)
+    except Exception as e:
+        logger.error(f"Config load failed: {e}")
+        sys.exit(1)
+
+    raw_dir = Path(args.raw_dir)
+    processed_dir = Path(args.processed_dir)
+    reports_dir = Path(args.reports_dir)
+    processed_dir.mkdir(parents=True, exist_ok=True)
+    reports_dir.mkdir(parents=True, exist_ok=True)
+
+    input_files = sorted(list(raw_dir.glob("*.parquet")) + list(raw_dir.glob("*.csv")))
+    if not input_files:
+        logger.error(f"No input files found in {raw_dir}")
+        sys.exit(1)
+
+    if args.preflight:
+        preflight(config, input_files, reports_dir)
+        return
+
+    if not args.shard:
+        # A full run replaces whatever an interrupted append left behind.
+        clear_journal(processed_dir)
+    mode = "shard" if args.shard else "streaming" if args.streaming else "in_memory"
+    perf = PerfRecorder(mode, reports_dir / "profiles" if args.profile else None)
+    with perf.stage("hash_inputs"):
+        file_hashes = hash_files(input_files)
+        inputs = describe_inputs(input_files, file_hashes)
+    if args.shard:
+        try:
+            shard, n_shards = parse_shard_spec(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+        shard_dir = run_shard(config, input_files, processed_dir, inputs, shard, n_shards, args.workers, perf)
+        perf.write(reports_dir / f"perf_report_{shard_dir.name}.json")
+        logger.info(f"Shard {shard}/{n_shards} written to {shard_dir}")
+        return
+
+    if args.streaming:
+        quality_report, conversion_meta = run_streaming(config, input_files, processed_dir, args.chunk_rows,
+                                                        args.workers, args.partition_model_ready,
+                                                        args.export_tensors, perf)
+    else:
+        cache = CleaningCache(Path(args.cache_dir), config) if args.cache_dir else None
+        quality_report, conversion_meta = run_in_memory(config, input_files, processed_dir, file_hashes, cache,
+                                                        args.workers, args.partition_model_ready,
+                                                        args.export_tensors, perf)
+
+    finalize(config, quality_report, conversion_meta, processed_dir, reports_dir, inputs, perf)
+
 if __name__ == "__main__":
     main()
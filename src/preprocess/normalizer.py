@@ -0,0 +1,125 @@
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, Tuple
+from src.preprocess.config import PreprocessConfig
+
+GLOBAL_SCOPE_KEY = "__all__"
+
+# Rows folded per step, bounding the float64 temporaries of a fit or transform.
+NORM_BLOCK_ROWS = 1 << 20
+
+Moments = Tuple[int, float, float]
+
+
+def combine_moments(a: Moments, b: Moments) -> Moments:
+    """Chan's parallel update of two ``(count, mean, m2)`` accumulators."""
+    n_a, mean_a, m2_a = a
+    n_b, mean_b, m2_b = b
+    if n_b == 0:
+        return a
+    if n_a == 0:
+        return b
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    return n, mean_a + delta * n_b / n, m2_a + m2_b + delta * delta * n_a * n_b / n
+
+
+def _params(moments: Moments) -> Tuple[float, float]:
+    n, mean, m2 = moments
+    if n == 0:
+        return 0.0, 1.0
+    std = float(np.sqrt(m2 / n))
+    return float(mean), std if std != 0 else 1.0
+
+
+class Normalizer:
+    """Train-only z-score normalization of ``value_uv``.
+
+    ``partial_fit`` folds the train rows of a frame into per-scope
+    ``(count, mean, m2)`` accumulators, so fits of separate chunks or workers
+    combine with ``merge``. With ``normalization_scope`` set to ``source_id``
+    or ``hardware_id`` every value of that column gets its own parameters;
+    values with no train rows fall back to the statistics of all train rows.
+    """
+
+    def __init__(self, config: PreprocessConfig):
+        self.config = config
+        self.scope = config.normalization_scope
+        self.moments: Dict[str, Moments] = {}
+
+    def _scope_codes(self, df: pd.DataFrame) -> Tuple[np.ndarray, list]:
+        if self.scope == "global":
+            return np.zeros(len(df), dtype=np.intp), [GLOBAL_SCOPE_KEY]
+        codes, uniques = pd.factorize(df[self.scope])
+        return codes, [str(u) for u in uniques]
+
+    def partial_fit(self, df: pd.DataFrame, is_train: np.ndarray):
+        codes, keys = self._scope_codes(df)
+        values = df["value_uv"].to_numpy()
+        for lo in range(0, len(df), NORM_BLOCK_ROWS):
+            mask = is_train[lo:lo + NORM_BLOCK_ROWS]
+            block = values[lo:lo + NORM_BLOCK_ROWS][mask].astype(np.float64)
+            block_codes = codes[lo:lo + NORM_BLOCK_ROWS][mask]
+            n = np.bincount(block_codes, minlength=len(keys))
+            with np.errstate(invalid="ignore"):
+                mean = np.bincount(block_codes, weights=block, minlength=len(keys)) / n
+            dev = block - mean[block_codes]
+            m2 = np.bincount(block_codes, weights=dev * dev, minlength=len(keys))
+            for k in np.flatnonzero(n):
+                key = keys[k]
+                self.moments[key] = combine_moments(
+                    self.moments.get(key, (0, 0.0, 0.0)), (int(n[k]), float(mean[k]), float(m2[k]))
+                )
+
+    def merge(self, other: "Normalizer"):
+        for key in sorted(other.moments):
+            self.moments[key] = combine_moments(self.moments.get(key, (0, 0.0, 0.0)), other.moments[key])
+
+    def fallback_moments(self) -> Moments:
+        acc: Moments = (0, 0.0, 0.0)
+        for key in sorted(self.moments):
+            acc = combine_moments(acc, self.moments[key])
+        return acc
+
+    def transform(self, df: pd.DataFrame) -> np.ndarray:
+        """``value_norm`` as float32, looked up per row from the scope column."""
+        codes, keys = self._scope_codes(df)
+        fallback = _params(self.fallback_moments())
+        params = np.array([_params(self.moments[k]) if k in self.moments else fallback for k in keys]).reshape(-1, 2)
+        values = df["value_uv"].to_numpy()
+        out = np.empty(len(df), dtype=np.float32)
+        for lo in range(0, len(df), NORM_BLOCK_ROWS):
+            block_codes = codes[lo:lo + NORM_BLOCK_ROWS]
+            block = values[lo:lo + NORM_BLOCK_ROWS].astype(np.float64)
+            out[lo:lo + NORM_BLOCK_ROWS] = (block - params[block_codes, 0]) / params[block_codes, 1]
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        def entry(moments: Moments) -> Dict[str, Any]:
+            mean, std = _params(moments)
+            return {"count": int(moments[0]), "mean": mean, "std": std, "m2": float(moments[2])}
+
+        return {
+            "normalization_version": "1.0.0",
+            "column": "value_uv",
+            "fit_split": "train",
+            "scope": self.scope,
+            "fallback": entry(self.fallback_moments()),
+            "groups": {key: entry(self.moments[key]) for key in sorted(self.moments)},
+        }
+
+    @classmethod
+    def from_dict(cls, config: PreprocessConfig, data: Dict[str, Any]) -> "Normalizer":
+        """Accumulators of a fit written by ``to_dict``, ready for further ``partial_fit`` calls."""
+        if data["scope"] != config.normalization_scope:
+            raise ValueError(f"normalization stats have scope {data['scope']}, config has {config.normalization_scope}")
+        normalizer = cls(config)
+        for key, entry in data["groups"].items():
+            normalizer.moments[key] = (int(entry["count"]), float(entry["mean"]), float(entry["m2"]))
+        return normalizer
+
+    def write(self, path: Path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
@@ -0,0 +1,160 @@
+import shutil
+import tempfile
+import multiprocessing
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from src.preprocess.config import PreprocessConfig
+from src.preprocess.cleaner import DataCleaner
+from src.preprocess.ingest import concat_frames
+from src.preprocess.perf import merge_usage, task_usage
+from src.preprocess.quality_stats import QualityStats
+from src.preprocess.windowing import SESSION_KEYS
+
+# Partitions per worker: smaller partitions even out uneven session sizes.
+PARTITIONS_PER_WORKER = 4
+
+# Partitions are exchanged as Arrow IPC files; on Linux these live in the
+# RAM-backed /dev/shm and are memory-mapped by the workers.
+SHM_DIR = Path("/dev/shm")
+
+
+def partition_sessions(df: pd.DataFrame, n_parts: int) -> List[np.ndarray]:
+    """Row positions of ``n_parts`` partitions holding whole sessions.
+
+    Sessions are assigned in sorted ``SESSION_KEYS`` order to contiguous,
+    row-balanced partitions, so concatenating per-partition cleaner output
+    in partition order reproduces the window order of a single run. Rows
+    keep their original relative order inside each partition.
+    """
+    session = df.groupby(SESSION_KEYS, sort=True, observed=True).ngroup().to_numpy()
+    rows_per_session = np.bincount(session[session >= 0])
+    rows_before = np.cumsum(rows_per_session) - rows_per_session
+    part_of_session = np.minimum(rows_before * n_parts // max(len(df), 1), n_parts - 1)
+    part = np.where(session >= 0, part_of_session[np.maximum(session, 0)], n_parts - 1)
+    order = np.argsort(part, kind="stable")
+    bounds = np.searchsorted(part[order], np.arange(1, n_parts))
+    return [rows for rows in np.split(order, bounds) if len(rows)]
+
+
+def write_ipc(df: pd.DataFrame, path: Path):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def read_ipc(path: Path) -> pd.DataFrame:
+    with pa.memory_map(str(path), "r") as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def _clean_partition(config: PreprocessConfig, in_path: Path, out_dir: Path
+                     ) -> Tuple[QualityStats, Dict[str, Any], Dict[str, Any]]:
+    with task_usage() as usage:
+        cleaner = DataCleaner(config)
+        df_clean, rejection_log, conversion_meta = cleaner.run(read_ipc(in_path))
+        write_ipc(df_clean, out_dir / f"{in_path.stem}.clean.arrow")
+        write_ipc(rejection_log, out_dir / f"{in_path.stem}.rejected.arrow")
+        write_ipc(cleaner.pop_window_metrics(), out_dir / f"{in_path.stem}.metrics.arrow")
+    return cleaner.quality, conversion_meta, usage
+
+
+class ParallelCleaner:
+    """``DataCleaner`` across a process pool, with output independent of ``workers``.
+
+    ``run`` splits the frame into session partitions, cleans them in worker
+    processes and merges clean windows and rejection rows back in partition
+    order; quality counters of every run accumulate in ``quality`` and window
+    metrics are collected by ``pop_window_metrics`` and the CPU time and
+    peak RSS the workers measure for their tasks by ``pop_worker_usage``. With
+    ``workers <= 1`` it cleans in-process. Use as a context manager so the
+    pool and exchange directory are released.
+    """
+
+    def __init__(self, config: PreprocessConfig, workers: int = 1):
+        self.config = config
+        self.workers = workers
+        self._cleaner = DataCleaner(config)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._tmp: Optional[Path] = None
+        self._runs = 0
+        self._worker_usage: Optional[Dict[str, Any]] = None
+
+    @property
+    def quality(self) -> QualityStats:
+        return self._cleaner.quality
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return self._cleaner.stats
+
+    def pop_window_metrics(self) -> pd.DataFrame:
+        return self._cleaner.pop_window_metrics()
+
+    def pop_worker_usage(self) -> Optional[Dict[str, Any]]:
+        """``task_usage`` totals of the worker tasks since the last call; ``None`` if none ran."""
+        usage, self._worker_usage = self._worker_usage, None
+        return usage
+
+    def __enter__(self) -> "ParallelCleaner":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self._tmp is not None:
+            shutil.rmtree(self._tmp, ignore_errors=True)
+            self._tmp = None
+
+    def run(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]:
+        if self.workers <= 1:
+            return self._cleaner.run(df)
+
+        partitions = partition_sessions(df, self.workers * PARTITIONS_PER_WORKER)
+        if not partitions:
+            return self._cleaner.run(df)
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            self._tmp = Path(tempfile.mkdtemp(prefix="lba-clean-", dir=SHM_DIR if SHM_DIR.is_dir() else None))
+        run_dir = self._tmp / f"run-{self._runs:06d}"
+        run_dir.mkdir()
+        self._runs += 1
+
+        futures = []
+        for i, rows in enumerate(partitions):
+            in_path = run_dir / f"part-{i:05d}.arrow"
+            write_ipc(df.iloc[rows], in_path)
+            futures.append((in_path, self._pool.submit(_clean_partition, self.config, in_path, run_dir)))
+
+        clean_parts, rejection_parts = [], []
+        conversion_meta: Dict[str, Any] = {}
+        for in_path, future in futures:
+            quality, conversion_meta, usage = future.result()
+            self._worker_usage = merge_usage(self._worker_usage, usage)
+            self._cleaner.quality.merge(quality)
+            clean_parts.append(read_ipc(run_dir / f"{in_path.stem}.clean.arrow"))
+            rejection_parts.append(read_ipc(run_dir / f"{in_path.stem}.rejected.arrow"))
+            self._cleaner.window_metrics.append(read_ipc(run_dir / f"{in_path.stem}.metrics.arrow"))
+        shutil.rmtree(run_dir)
+
+        non_empty = [part for part in clean_parts if not part.empty]
+        if non_empty:
+            df_clean = concat_frames(non_empty)
+        else:
+            df_clean = pd.DataFrame(columns=clean_parts[0].columns)
+
+        non_empty = [part for part in rejection_parts if not part.empty]
+        if non_empty:
+            rejection_log = concat_frames(non_empty)
+        else:
+            rejection_log = pd.DataFrame(columns=["session_id", "window_start_ts", "rejection_reason"])
+
+        return df_clean, rejection_log, conversion_meta
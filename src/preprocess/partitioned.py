@@ -0,0 +1,194 @@
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+from src.preprocess.ingest import READ_BATCH_ROWS
+from src.preprocess.leakage import to_ns
+from src.preprocess.streaming import write_parquet
+
+PARTITION_DIR = "model_ready"
+WINDOW_INDEX_FILE = "model_ready_index.parquet"
+INDEX_COLS = ["window_id", "split", "source_id", "file", "row_group", "row_offset", "n_samples"]
+INT_INDEX_COLS = ["window_id", "row_group", "row_offset", "n_samples"]
+
+# Target row-group length of partition files. Row groups only close on window
+# boundaries, so a group holds whole windows and exceeds this only when a
+# single window does.
+WINDOW_ROW_GROUP_ROWS = 64 * 1024
+
+
+def partition_file(split: str, source_id: str) -> str:
+    """Path of a partition file relative to the processed directory.
+
+    ``source_id`` is percent-encoded, so ids holding ``/``, ``\\`` or ``%``
+    always name one directory inside ``PARTITION_DIR``.
+    """
+    return f"{PARTITION_DIR}/split={quote(split, safe='')}/source_id={quote(source_id, safe='')}/part-00000.parquet"
+
+
+def _row_groups(n_samples: np.ndarray, row_group_rows: int) -> np.ndarray:
+    """Row-group number of each window when whole windows are packed in order."""
+    group_of = np.zeros(len(n_samples), dtype=np.int64)
+    current, filled = 0, 0
+    for i, rows in enumerate(n_samples):
+        if filled and filled + rows > row_group_rows:
+            current, filled = current + 1, 0
+        group_of[i] = current
+        filled += rows
+    return group_of
+
+
+def _sorted_windows(windows: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Window order by ``(session_id, window_start_ts)`` and each sorted window's first spilled row.
+
+    ``windows`` lists a partition's windows in spill order, where each
+    window's rows are contiguous.
+    """
+    n_samples = windows["n_samples"].to_numpy()
+    spill_offset = np.cumsum(n_samples) - n_samples
+    start_ns = to_ns(windows["window_start_ts"])
+    order = np.lexsort((windows["window_id"].to_numpy(), start_ns,
+                        windows["session_id"].astype(str).to_numpy()))
+    return order, spill_offset[order]
+
+
+def _take_windows(batches: List[pa.RecordBatch], batch_start: np.ndarray, schema: pa.Schema,
+                  offsets: np.ndarray, lengths: np.ndarray) -> pa.Table:
+    """Rows ``[offset, offset + length)`` of each window, in order, as one contiguous table.
+
+    ``batches`` are the memory-mapped spill batches starting at rows
+    ``batch_start``; only the returned table is materialized.
+    """
+    pieces = []
+    for offset, length in zip(offsets.tolist(), lengths.tolist()):
+        i = int(np.searchsorted(batch_start, offset, side="right")) - 1
+        while length:
+            lo = offset - int(batch_start[i])
+            n = min(length, batches[i].num_rows - lo)
+            pieces.append(batches[i].slice(lo, n))
+            offset, length, i = offset + n, length - n, i + 1
+    return pa.Table.from_batches(pieces, schema=schema).combine_chunks()
+
+
+def write_partitioned(model_ready_path: Path, catalog: pd.DataFrame, processed_dir: Path,
+                      row_group_rows: int = WINDOW_ROW_GROUP_ROWS) -> pd.DataFrame:
+    """Rewrite the model-ready file as one file per ``(split, source_id)`` plus a window index.
+
+    Rows are routed to per-partition Arrow IPC spill files in one pass over
+    ``model_ready_path``, then each partition is sorted by ``(session_id,
+    window_start_ts)`` and written with row groups that never split a window.
+    ``catalog`` is the split-annotated window catalog of the file, in
+    window-id order; peak memory is one row group. The index written to
+    ``WINDOW_INDEX_FILE`` is returned.
+    """
+    processed_dir = Path(processed_dir)
+    out_dir = processed_dir / PARTITION_DIR
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    out_dir.mkdir(parents=True)
+
+    windows = catalog[["window_id", "split", "source_id", "session_id", "window_start_ts", "n_samples"]].copy()
+    windows["split"] = windows["split"].astype(str)
+    windows["source_id"] = windows["source_id"].astype(str)
+    part_codes, partitions = pd.factorize(pd.MultiIndex.from_frame(windows[["split", "source_id"]]), sort=True)
+    row_codes = np.repeat(part_codes, windows["n_samples"].to_numpy())
+
+    spill_dir = Path(tempfile.mkdtemp(prefix=".spill-", dir=out_dir))
+    try:
+        model_file = pq.ParquetFile(model_ready_path)
+        spills: Dict[int, pa.ipc.RecordBatchFileWriter] = {}
+        pos = 0
+        for batch in model_file.iter_batches(batch_size=READ_BATCH_ROWS):
+            codes = row_codes[pos:pos + batch.num_rows]
+            pos += batch.num_rows
+            order = np.argsort(codes, kind="stable")
+            routed, codes = batch.take(pa.array(order)), codes[order]
+            bounds = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1], True])
+            for lo, hi in zip(bounds[:-1], bounds[1:]):
+                code = int(codes[lo])
+                if code not in spills:
+                    spills[code] = pa.ipc.new_file(str(spill_dir / f"{code}.arrow"), batch.schema)
+                spills[code].write_batch(routed.slice(lo, hi - lo))
+        for writer in spills.values():
+            writer.close()
+        if pos != len(row_codes):
+            raise ValueError(f"{model_ready_path} holds {pos} rows but the catalog covers {len(row_codes)}")
+
+        index_parts = []
+        for code, (split, source_id) in enumerate(partitions):
+            part_windows = windows[part_codes == code].reset_index(drop=True)
+            order, first_rows = _sorted_windows(part_windows)
+            sorted_windows = part_windows.iloc[order].reset_index(drop=True)
+            n_samples = sorted_windows["n_samples"].to_numpy()
+            group_of = _row_groups(n_samples, row_group_rows)
+            group_rows = np.bincount(group_of, weights=n_samples).astype(np.int64)
+            group_start = np.cumsum(group_rows) - group_rows
+            file_offset = np.cumsum(n_samples) - n_samples
+            group_bounds = np.r_[0, np.flatnonzero(np.diff(group_of)) + 1, len(group_of)]
+
+            rel_path = partition_file(split, source_id)
+            (processed_dir / rel_path).parent.mkdir(parents=True, exist_ok=True)
+            with pa.memory_map(str(spill_dir / f"{code}.arrow")) as source:
+                reader = pa.ipc.open_file(source)
+                batches = [reader.get_batch(i) for i in range(reader.num_record_batches)]
+                batch_start = np.cumsum([0] + [b.num_rows for b in batches])[:-1]
+                with pq.ParquetWriter(processed_dir / rel_path, reader.schema, compression="snappy",
+                                      use_dictionary=True) as writer:
+                    # One row group in memory at a time; the spill stays memory-mapped.
+                    for lo, hi in zip(group_bounds[:-1], group_bounds[1:]):
+                        table = _take_windows(batches, batch_start, reader.schema,
+                                              first_rows[lo:hi], n_samples[lo:hi])
+                        writer.write_table(table, row_group_size=table.num_rows)
+
+            index_parts.append(pd.DataFrame({
+                "window_id": sorted_windows["window_id"].to_numpy(np.int64),
+                "split": split,
+                "source_id": source_id,
+                "file": rel_path,
+                "row_group": group_of,
+                "row_offset": file_offset - group_start[group_of],
+                "n_samples": n_samples.astype(np.int64),
+            }))
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    if index_parts:
+        index = pd.concat(index_parts, ignore_index=True).sort_values("window_id").reset_index(drop=True)
+    else:
+        index = pd.DataFrame({col: np.zeros(0, dtype=np.int64 if col in INT_INDEX_COLS else object)
+                              for col in INDEX_COLS})
+    write_parquet(index, processed_dir / WINDOW_INDEX_FILE)
+    return index
+
+
+def read_windows(processed_dir: Path, window_ids: Sequence[int],
+                 index: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Rows of ``window_ids``, in the order requested, from the partitioned layout.
+
+    Only the row groups holding the requested windows are read, each once.
+    Pass a previously loaded ``index`` to skip re-reading the sidecar.
+    """
+    processed_dir = Path(processed_dir)
+    if index is None:
+        index = pq.read_table(processed_dir / WINDOW_INDEX_FILE).to_pandas()
+    located = index.set_index("window_id").loc[list(window_ids)]
+
+    groups: Dict[Tuple[str, int], pa.Table] = {}
+    files: Dict[str, pq.ParquetFile] = {}
+    pieces = []
+    for file, row_group, row_offset, n_samples in zip(located["file"], located["row_group"],
+                                                      located["row_offset"], located["n_samples"]):
+        key = (file, int(row_group))
+        if key not in groups:
+            if file not in files:
+                files[file] = pq.ParquetFile(processed_dir / file)
+            groups[key] = files[file].read_row_group(int(row_group))
+        pieces.append(groups[key].slice(int(row_offset), int(n_samples)))
+    if not pieces:
+        raise ValueError("No window ids requested")
+    return pa.concat_tables(pieces).to_pandas()
@@ -0,0 +1,163 @@
+import cProfile
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+# Interval of the background RSS sampler that measures each stage's peak.
+RSS_SAMPLE_SECONDS = 0.02
+
+
+def _rss_bytes() -> Optional[int]:
+    """Current resident set size from ``/proc``, or ``None`` where it is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _max_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _RssSampler:
+    """Polls RSS on a daemon thread and keeps the maximum seen."""
+
+    def __init__(self):
+        self.peak = _rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(RSS_SAMPLE_SECONDS):
+            rss = _rss_bytes()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+
+    def __enter__(self):
+        if self.peak is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread.is_alive():
+            self._stop.set()
+            self._thread.join()
+        rss = _rss_bytes()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+
+@contextmanager
+def task_usage() -> Iterator[Dict[str, Any]]:
+    """CPU seconds and peak RSS of this process over the block, filled in on exit.
+
+    Worker processes wrap each task in it and return the result, since the
+    parent only sees the resource usage of children once they are reaped.
+    """
+    usage: Dict[str, Any] = {}
+    cpu = time.process_time()
+    with _RssSampler() as sampler:
+        yield usage
+    usage["cpu_s"] = time.process_time() - cpu
+    usage["peak_rss_bytes"] = sampler.peak if sampler.peak is not None else _max_rss_bytes()
+
+
+def merge_usage(a: Optional[Dict[str, Any]], b: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Usage of two sets of worker tasks: CPU seconds add up, peak RSS is the larger one."""
+    if a is None or b is None:
+        return a or b
+    return {"cpu_s": a["cpu_s"] + b["cpu_s"], "peak_rss_bytes": max(a["peak_rss_bytes"], b["peak_rss_bytes"])}
+
+
+class PerfRecorder:
+    """Per-stage wall time, CPU time, throughput and peak RSS of one pipeline run.
+
+    ``stage(name)`` may be entered repeatedly (e.g. once per streaming
+    chunk); calls to the same stage accumulate. ``cpu_s`` and
+    ``peak_rss_bytes`` cover this process across all its threads. A stage
+    that ran worker processes sets ``workers`` on the yielded dict to their
+    ``task_usage`` totals, reported as ``worker_cpu_s`` (summed over tasks)
+    and ``worker_peak_rss_bytes`` (the largest single worker); both are null
+    for stages without workers. With ``profile_dir`` set, each stage
+    also runs under its own ``cProfile.Profile``, dumped as
+    ``<profile_dir>/<stage>.prof`` by ``write``.
+    """
+
+    def __init__(self, mode: str, profile_dir: Optional[Path] = None):
+        self.mode = mode
+        self.profile_dir = profile_dir
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Dict[str, Any]]:
+        """Time the block; set ``rows``/``windows`` on the yielded dict to report throughput."""
+        record = self.stages.setdefault(name, {
+            "stage": name, "calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "worker_cpu_s": None,
+            "rows": None, "windows": None, "peak_rss_bytes": None, "worker_peak_rss_bytes": None,
+        })
+        counts: Dict[str, Any] = {}
+        profile = None
+        if self.profile_dir is not None:
+            profile = self._profiles.setdefault(name, cProfile.Profile())
+        wall, cpu = time.perf_counter(), time.process_time()
+        with _RssSampler() as sampler:
+            if profile is not None:
+                profile.enable()
+            try:
+                yield counts
+            finally:
+                if profile is not None:
+                    profile.disable()
+        record["calls"] += 1
+        record["wall_s"] += time.perf_counter() - wall
+        record["cpu_s"] += time.process_time() - cpu
+        workers = counts.get("workers")
+        if workers is not None:
+            record["worker_cpu_s"] = (record["worker_cpu_s"] or 0.0) + workers["cpu_s"]
+            record["worker_peak_rss_bytes"] = max(record["worker_peak_rss_bytes"] or 0, workers["peak_rss_bytes"])
+        for key in ("rows", "windows"):
+            if counts.get(key) is not None:
+                record[key] = (record[key] or 0) + int(counts[key])
+        if sampler.peak is not None:
+            record["peak_rss_bytes"] = max(record["peak_rss_bytes"] or 0, sampler.peak)
+
+    def report(self) -> Dict[str, Any]:
+        stages = []
+        for record in self.stages.values():
+            entry = dict(record)
+            for key in ("rows", "windows"):
+                entry[f"{key}_per_s"] = (
+                    record[key] / record["wall_s"] if record[key] is not None and record["wall_s"] > 0 else None
+                )
+            stages.append(entry)
+        return {
+            "perf_report_version": "1.1.0",
+            "mode": self.mode,
+            "cpu_count": os.cpu_count(),
+            "total_wall_s": time.perf_counter() - self._wall0,
+            "total_cpu_s": time.process_time() - self._cpu0,
+            "max_rss_bytes": max([_max_rss_bytes()] + [r["peak_rss_bytes"] or 0 for r in self.stages.values()]),
+            "max_worker_rss_bytes": max([r["worker_peak_rss_bytes"] for r in self.stages.values()
+                                         if r["worker_peak_rss_bytes"] is not None], default=None),
+            "stages": stages,
+        }
+
+    def write(self, path: Path):
+        """Write ``report()`` as JSON to ``path`` and dump any per-stage profiles."""
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        if self.profile_dir is not None:
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            for name, profile in self._profiles.items():
+                profile.dump_stats(str(self.profile_dir / f"{name}.prof"))
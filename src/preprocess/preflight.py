@@ -0,0 +1,236 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+from pathlib import Path
+from typing import Any, Dict, List
+from src.preprocess.config import PreprocessConfig
+from src.preprocess.ingest import ID_COLS, TIMESTAMP_COLS, READ_WORKERS, csv_convert_options
+
+# Input columns a Tier A run needs. Window bounds are optional together: files
+# without them are continuous recordings that the pipeline windows itself.
+REQUIRED_INPUT_COLS = ["timestamp_utc", "value", "label"] + ID_COLS + ["label_event_start_ts", "label_event_end_ts"]
+WINDOW_BOUND_COLS = ["window_start_ts", "window_end_ts"]
+
+# Rows read from the head of each CSV; CSV has no footer to summarize.
+CSV_SAMPLE_ROWS = 100_000
+
+# Row groups whose source_id statistics do not pin a single source.
+UNATTRIBUTED = "__unattributed__"
+
+
+def _is_text(t: pa.DataType) -> bool:
+    if pa.types.is_dictionary(t):
+        t = t.value_type
+    return pa.types.is_string(t) or pa.types.is_large_string(t)
+
+
+def _type_errors(schema: pa.Schema) -> List[str]:
+    errors = []
+    names = set(schema.names)
+    missing = [col for col in REQUIRED_INPUT_COLS if col not in names]
+    if missing:
+        errors.append(f"missing required columns {missing}")
+    if sum(col in names for col in WINDOW_BOUND_COLS) == 1:
+        errors.append(f"{WINDOW_BOUND_COLS} must be present together")
+    for col in schema.names:
+        t = schema.field(col).type
+        if col == "value" and not (pa.types.is_floating(t) or pa.types.is_integer(t)):
+            errors.append(f"value has non-numeric type {t}")
+        elif col == "label" and not (pa.types.is_integer(t) or pa.types.is_floating(t) or pa.types.is_boolean(t)):
+            errors.append(f"label has non-numeric type {t}")
+        elif col in TIMESTAMP_COLS and not (pa.types.is_timestamp(t) or _is_text(t)):
+            errors.append(f"{col} has type {t}, expected a timestamp or text")
+        elif col in ID_COLS and not (_is_text(t) or pa.types.is_integer(t)):
+            errors.append(f"{col} has type {t}, expected text")
+    return errors
+
+
+def _at_rails(vmin, vmax, factors: List[float], config: PreprocessConfig) -> bool:
+    """Whether ``value`` bounds reach the sensor rails once scaled to µV by any of ``factors``.
+
+    The cleaner checks the rails on ``value * source_scaling[source_id]``, so
+    bounds are scaled the same way; a negative factor swaps them.
+    """
+    for factor in factors:
+        scaled = [v * factor for v in (vmin, vmax) if v is not None]
+        if scaled and (min(scaled) <= config.sensor_min_val or max(scaled) >= config.sensor_max_val):
+            return True
+    return False
+
+
+def _scale_factors(source: str, config: PreprocessConfig) -> List[float]:
+    """The factors ``value`` of ``source`` may be scaled by; every one of them for unattributed rows."""
+    if source == UNATTRIBUTED:
+        return sorted(set(config.source_scaling.values()) | {1.0})
+    return [config.source_scaling.get(source, 1.0)]
+
+
+def inspect_parquet(path: Path, config: PreprocessConfig) -> Dict[str, Any]:
+    """Summarize a Parquet input from its footer alone; no data pages are read.
+
+    Null counts and ``value`` bounds come from row-group statistics (``None``
+    where a writer omitted them; NaN values are not counted as nulls). Rows
+    are attributed to a source only for row groups whose ``source_id``
+    min and max agree.
+    """
+    meta = pq.ParquetFile(path).metadata
+    schema = meta.schema.to_arrow_schema()
+    column_index = {meta.schema.column(i).path: i for i in range(meta.num_columns)}
+    null_counts: Dict[str, Any] = {col: 0 for col in schema.names}
+    rows_by_source: Counter = Counter()
+    rail_sources = set()
+    value_min = value_max = None
+    numeric_value = "value" in schema.names and (
+        pa.types.is_floating(schema.field("value").type) or pa.types.is_integer(schema.field("value").type)
+    )
+
+    for rg in range(meta.num_row_groups):
+        group = meta.row_group(rg)
+        stats = {col: group.column(i).statistics for col, i in column_index.items()}
+        for col in schema.names:
+            s = stats.get(col)
+            if null_counts[col] is None or s is None or not s.has_null_count:
+                null_counts[col] = None
+            else:
+                null_counts[col] += s.null_count
+
+        source = UNATTRIBUTED
+        s = stats.get("source_id")
+        if s is not None and s.has_min_max and s.min == s.max:
+            source = str(s.min)
+        rows_by_source[source] += group.num_rows
+
+        s = stats.get("value")
+        if numeric_value and s is not None and s.has_min_max:
+            value_min = s.min if value_min is None else min(value_min, s.min)
+            value_max = s.max if value_max is None else max(value_max, s.max)
+            if _at_rails(s.min, s.max, _scale_factors(source, config), config):
+                rail_sources.add(source)
+
+    return {
+        "file": path.name,
+        "format": "parquet",
+        "rows": meta.num_rows,
+        "rows_exact": True,
+        "row_groups": meta.num_row_groups,
+        "columns": schema.names,
+        "schema_errors": _type_errors(schema),
+        "null_counts": null_counts,
+        "value_min": value_min,
+        "value_max": value_max,
+        "rows_by_source": dict(sorted(rows_by_source.items())),
+        "rail_sources": sorted(rail_sources),
+    }
+
+
+def inspect_csv(path: Path, config: PreprocessConfig, sample_rows: int = CSV_SAMPLE_ROWS) -> Dict[str, Any]:
+    """Summarize the first ``sample_rows`` rows of a CSV input, read with the pipeline's column types."""
+    summary: Dict[str, Any] = {"file": path.name, "format": "csv"}
+    try:
+        reader = pv.open_csv(path, convert_options=csv_convert_options())
+        batches, rows = [], 0
+        for batch in reader:
+            batches.append(batch)
+            rows += batch.num_rows
+            if rows >= sample_rows:
+                break
+        else:
+            rows = -1
+    except (pa.ArrowInvalid, OSError) as e:
+        return {**summary, "rows": 0, "rows_exact": False, "schema_errors": [f"unreadable: {e}"]}
+
+    table = pa.Table.from_batches(batches, schema=reader.schema).slice(0, sample_rows)
+    rows_by_source: Counter = Counter()
+    rail_sources = set()
+    if "source_id" in table.column_names:
+        sources = table.column("source_id").cast(pa.string())
+        for entry in pc.value_counts(sources).to_pylist():
+            rows_by_source[entry["values"] if entry["values"] is not None else UNATTRIBUTED] += entry["counts"]
+    value_min = value_max = None
+    if "value" in table.column_names:
+        bounds = pc.min_max(table.column("value")).as_py()
+        value_min, value_max = bounds["min"], bounds["max"]
+        if "source_id" in table.column_names:
+            # Scale to µV per row, as the cleaner does; unknown and null sources keep a factor of 1.
+            sources = table.column("source_id").cast(pa.string()).combine_chunks().dictionary_encode()
+            factors = pa.array([config.source_scaling.get(s, 1.0) for s in sources.dictionary.to_pylist()],
+                               type=pa.float64())
+            scale = pc.fill_null(pc.take(factors, sources.indices), 1.0)
+            value_uv = pc.multiply(table.column("value").cast(pa.float64()), scale)
+            at_rails = pc.or_(pc.less_equal(value_uv, config.sensor_min_val),
+                              pc.greater_equal(value_uv, config.sensor_max_val))
+            hit = pc.filter(sources.cast(pa.string()), pc.fill_null(at_rails, False))
+            rail_sources = {s if s is not None else UNATTRIBUTED for s in pc.unique(hit).to_pylist()}
+
+    return {
+        **summary,
+        "rows": table.num_rows,
+        "rows_exact": rows == -1,
+        "columns": reader.schema.names,
+        "schema_errors": _type_errors(reader.schema),
+        "null_counts": {col: table.column(col).null_count for col in table.column_names},
+        "value_min": value_min,
+        "value_max": value_max,
+        "rows_by_source": dict(sorted(rows_by_source.items())),
+        "rail_sources": sorted(rail_sources),
+    }
+
+
+def run_preflight(input_files: List[Path], config: PreprocessConfig,
+                  workers: int = READ_WORKERS) -> Dict[str, Any]:
+    """Metadata-only checks of every input before a full run.
+
+    Schema problems are errors; nulls (which the pipeline drops) and values
+    at or beyond the sensor rails are warnings. Files are inspected
+    concurrently, since footer reads are latency-bound on remote storage.
+    """
+    def inspect(path: Path) -> Dict[str, Any]:
+        if path.suffix != ".parquet":
+            return inspect_csv(path, config)
+        try:
+            return inspect_parquet(path, config)
+        except (pa.ArrowInvalid, OSError) as e:
+            return {"file": path.name, "format": "parquet", "rows": 0, "rows_exact": False,
+                    "schema_errors": [f"unreadable: {e}"]}
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        files = list(pool.map(inspect, input_files))
+
+    errors, warnings = [], []
+    rows_by_source: Counter = Counter()
+    for summary in files:
+        errors += [f"{summary['file']}: {e}" for e in summary["schema_errors"]]
+        if "columns" not in summary:
+            continue
+        rows_by_source.update(summary["rows_by_source"])
+        unknown = sorted(col for col, n in summary["null_counts"].items() if n is None)
+        if unknown:
+            warnings.append(f"{summary['file']}: no null-count statistics for {unknown}")
+        nulls = {col: n for col, n in summary["null_counts"].items() if n}
+        if nulls:
+            warnings.append(f"{summary['file']}: null values {nulls}; these rows will be dropped")
+        if summary["rail_sources"]:
+            warnings.append(
+                f"{summary['file']}: values at or beyond sensor rails "
+                f"[{config.sensor_min_val}, {config.sensor_max_val}] for sources {summary['rail_sources']}"
+            )
+        if summary["rows"] == 0:
+            warnings.append(f"{summary['file']}: no rows")
+
+    windowed = {all(col in summary["columns"] for col in WINDOW_BOUND_COLS) for summary in files if "columns" in summary}
+    if len(windowed) > 1:
+        errors.append(f"some inputs carry {WINDOW_BOUND_COLS} and others do not")
+
+    return {
+        "preflight_version": "1.0.0",
+        "status": "FAIL" if errors else "PASS",
+        "errors": errors,
+        "warnings": warnings,
+        "total_rows": sum(summary["rows"] for summary in files),
+        "rows_exact": all(summary["rows_exact"] for summary in files),
+        "rows_by_source": dict(sorted(rows_by_source.items())),
+        "files": files,
+    }
@@ -0,0 +1,309 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, Tuple
+from src.preprocess.config import PreprocessConfig
+
+WINDOW_KEYS = ["source_id", "plant_id", "session_id", "window_start_ts"]
+QUALITY_REASONS = ("flatline", "drift", "snr", "clip", "line_noise", "out_of_band", "spike")
+METRIC_COLS = [
+    "duration_s", "std", "slope_uv_s", "snr_db", "clip_fraction",
+    "line_noise_ratio", "out_of_band_ratio", "spike_count",
+]
+SPECTRAL_METRICS = METRIC_COLS[5:]
+# Config limits of the SPECTRAL_METRICS checks, in the same order; null disables a check.
+SPECTRAL_LIMITS = ["line_noise_ratio_max", "out_of_band_ratio_max", "spike_count_max"]
+
+
+def segment_windows(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sort rows once into contiguous window segments.
+
+    Returns ``(order, starts, counts)`` where ``df.iloc[order]`` lists the
+    windows in ``groupby(WINDOW_KEYS)`` order with each window's rows kept in
+    their original relative order, and ``starts``/``counts`` delimit each
+    window inside that ordering.
+    """
+    codes = df.groupby(WINDOW_KEYS, sort=True, observed=True).ngroup().to_numpy()
+    order = np.argsort(codes, kind="stable")
+    order = order[codes[order] >= 0]
+    counts = np.bincount(codes[order]) if len(order) else np.zeros(0, dtype=np.int64)
+    starts = np.zeros(len(counts), dtype=np.int64)
+    if len(counts):
+        starts[1:] = np.cumsum(counts)[:-1]
+    return order, starts, counts
+
+
+def _segment_sum(x: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    if len(starts) == 0:
+        return np.zeros(0, dtype=np.float64)
+    return np.add.reduceat(x, starts)
+
+
+def window_metrics(signal: np.ndarray, starts: np.ndarray, counts: np.ndarray,
+                   config: PreprocessConfig) -> Dict[str, np.ndarray]:
+    """Raw quality metrics for every segment of a window-sorted signal.
+
+    Mirrors ``DataCleaner._check_*``: population std, OLS slope over the
+    sample index scaled to uV/s, ``10 log10(var(x) / (var(diff(x)) + 1e-9))``
+    and the fraction of samples at or beyond the sensor rails.
+    """
+    signal = np.asarray(signal, dtype=np.float64)
+    n = counts.astype(np.float64)
+    seg = np.repeat(np.arange(len(counts)), counts)
+    local = np.arange(len(signal)) - starts[seg]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = _segment_sum(signal, starts) / n
+        centered = signal - mean[seg]
+        var = _segment_sum(centered * centered, starts) / n
+
+        # Closed-form OLS against x = 0..n-1: sum(x - x_bar)^2 = n(n^2 - 1) / 12
+        sxx = n * (n * n - 1.0) / 12.0
+        sxy = _segment_sum(local * centered, starts)
+        slope = np.where(sxx > 0, sxy / sxx, 0.0)
+
+        diff = np.zeros_like(signal)
+        diff[:-1] = np.diff(signal)
+        has_next = local < (counts[seg] - 1)
+        diff = np.where(has_next, diff, 0.0)
+        n_diff = n - 1.0
+        diff_mean = _segment_sum(diff, starts) / n_diff
+        diff_centered = np.where(has_next, diff - diff_mean[seg], 0.0)
+        diff_var = _segment_sum(diff_centered * diff_centered, starts) / n_diff
+        diff_var = np.where(n_diff > 0, diff_var, np.nan)
+        snr_db = 10 * np.log10(var / (diff_var + 1e-9))
+
+        clipped = (signal <= config.sensor_min_val) | (signal >= config.sensor_max_val)
+        clip_fraction = _segment_sum(clipped.astype(np.float64), starts) / n
+
+    return {
+        "std": np.sqrt(var),
+        "slope_uv_s": slope * config.target_hz,
+        "snr_db": snr_db,
+        "clip_fraction": clip_fraction,
+    }
+
+
+def _row_median(block: np.ndarray) -> np.ndarray:
+    """``np.median(block, axis=1, keepdims=True)`` from a single-pivot partition.
+
+    For even widths the lower middle value is the maximum of the left part,
+    which avoids ``np.median``'s two-pivot partition.
+    """
+    half = block.shape[1] // 2
+    part = np.partition(block, half, axis=1)
+    upper = part[:, half]
+    if block.shape[1] % 2:
+        return upper[:, None]
+    return ((part[:, :half].max(axis=1) + upper) / 2)[:, None]
+
+
+def spectral_window_metrics(windows: np.ndarray, config: PreprocessConfig,
+                            block_windows: int = 4096) -> Dict[str, np.ndarray]:
+    """Line-noise ratio, out-of-band ratio and spike count of each row of ``(n_windows, n)`` ``windows``.
+
+    One ``rfft`` per block of ``block_windows`` mean-removed windows gives
+    the power spectrum at ``target_hz``. The ratios are the power within
+    ``line_noise_bandwidth_hz / 2`` of each ``line_noise_freqs_hz`` below
+    Nyquist, and outside ``[signal_band_min_hz, signal_band_max_hz]``,
+    over all non-DC power (0 when there is none). The spike count is the
+    number of samples more than ``spike_mad_k`` scaled MADs from the window
+    median. Metrics whose check is disabled are NaN and not computed.
+    """
+    windows = np.asarray(windows)
+    n_windows, n = windows.shape
+    out = {name: np.full(n_windows, np.nan) for name in SPECTRAL_METRICS}
+    spectral = config.line_noise_ratio_max is not None or config.out_of_band_ratio_max is not None
+    if n_windows == 0 or n == 0 or not spectral_checks_enabled(config):
+        return out
+
+    freqs = np.fft.rfftfreq(n, d=1.0 / config.target_hz)
+    line = np.zeros(len(freqs), dtype=bool)
+    for f in config.line_noise_freqs_hz:
+        if f < config.target_hz / 2:
+            line |= np.abs(freqs - f) <= config.line_noise_bandwidth_hz / 2
+    out_of_band = (freqs < config.signal_band_min_hz) | (freqs > config.signal_band_max_hz)
+    line[0] = out_of_band[0] = False
+
+    for lo in range(0, n_windows, block_windows):
+        hi = min(lo + block_windows, n_windows)
+        block = np.asarray(windows[lo:hi], dtype=np.float64)
+        if spectral:
+            spectrum = np.fft.rfft(block - block.mean(axis=1, keepdims=True), axis=1)
+            power = spectrum.real ** 2 + spectrum.imag ** 2
+            total = power[:, 1:].sum(axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                if config.line_noise_ratio_max is not None:
+                    out["line_noise_ratio"][lo:hi] = np.where(total > 0, power[:, line].sum(axis=1) / total, 0.0)
+                if config.out_of_band_ratio_max is not None:
+                    out["out_of_band_ratio"][lo:hi] = np.where(
+                        total > 0, power[:, out_of_band].sum(axis=1) / total, 0.0
+                    )
+        if config.spike_count_max is not None:
+            deviation = np.abs(block - _row_median(block))
+            mad = _row_median(deviation)
+            out["spike_count"][lo:hi] = (deviation > config.spike_mad_k * 1.4826 * mad).sum(axis=1)
+    return out
+
+
+def segment_spectral_metrics(signal: np.ndarray, starts: np.ndarray, counts: np.ndarray,
+                             config: PreprocessConfig) -> Dict[str, np.ndarray]:
+    """``spectral_window_metrics`` for the segments of a window-sorted signal.
+
+    Segments are batched by length, so each distinct window length gets
+    one ``(windows x samples)`` matrix.
+    """
+    out = {name: np.full(len(counts), np.nan) for name in SPECTRAL_METRICS}
+    if not spectral_checks_enabled(config):
+        return out
+    signal = np.asarray(signal, dtype=np.float64)
+    for length in np.unique(counts):
+        selected = np.flatnonzero(counts == length)
+        matrix = signal[starts[selected, None] + np.arange(length)]
+        for name, values in spectral_window_metrics(matrix, config).items():
+            out[name][selected] = values
+    return out
+
+
+def spectral_checks_enabled(config: PreprocessConfig) -> bool:
+    return any(getattr(config, limit) is not None for limit in SPECTRAL_LIMITS)
+
+
+def first_failing_reason(metrics: Dict[str, np.ndarray], duration_s: np.ndarray,
+                         config: PreprocessConfig) -> np.ndarray:
+    """Vectorized flatline -> drift -> snr -> clip -> line_noise -> out_of_band -> spike
+    precedence; "" means clean. Disabled checks never fail."""
+    def above(name: str, limit) -> np.ndarray:
+        if limit is None:
+            return np.zeros(len(duration_s), dtype=bool)
+        return metrics[name] > limit
+
+    with np.errstate(invalid="ignore"):
+        failed = [
+            metrics["std"] < config.flatline_std_min,
+            (duration_s > 0) & (np.abs(metrics["slope_uv_s"]) > config.drift_slope_max_uv_per_s),
+            metrics["snr_db"] < config.snr_db_min,
+            metrics["clip_fraction"] > config.clip_fraction_max,
+            above("line_noise_ratio", config.line_noise_ratio_max),
+            above("out_of_band_ratio", config.out_of_band_ratio_max),
+            above("spike_count", config.spike_count_max),
+        ]
+    return np.select(failed, list(QUALITY_REASONS), default="").astype(object)
+
+
+def metric_table(windows: pd.DataFrame, metrics: Dict[str, np.ndarray], duration_s: np.ndarray) -> pd.DataFrame:
+    """One row per window: its ``WINDOW_KEYS`` and the raw values ``first_failing_reason`` judges."""
+    table = windows[WINDOW_KEYS].reset_index(drop=True)
+    table["duration_s"] = np.asarray(duration_s, dtype=np.float64)
+    for name in METRIC_COLS[1:]:
+        table[name] = metrics[name]
+    return table
+
+
+def empty_metric_table() -> pd.DataFrame:
+    table = pd.DataFrame({key: pd.Series(dtype=object) for key in WINDOW_KEYS})
+    table["window_start_ts"] = pd.Series(dtype="datetime64[ns, UTC]")
+    for name in METRIC_COLS:
+        table[name] = pd.Series(dtype=np.float64)
+    return table
+
+
+def ordered_counts(values: np.ndarray) -> Dict[str, int]:
+    """Value counts keyed in order of first appearance, as plain ints."""
+    if len(values) == 0:
+        return {}
+    uniq, first, counts = np.unique(values, return_index=True, return_counts=True)
+    return {uniq[i]: int(counts[i]) for i in np.argsort(first, kind="stable")}
+
+
+def strided_window_metrics(signal: np.ndarray, win_len: int, stride: int, n_windows: int,
+                           config: PreprocessConfig, block_windows: int = 4096) -> Dict[str, np.ndarray]:
+    """``window_metrics`` for evenly strided windows over one session array.
+
+    Windows are read through ``sliding_window_view`` (the diff signal too),
+    so only one block of ``block_windows`` windows is ever expanded into
+    temporaries.
+    """
+    signal = np.asarray(signal, dtype=np.float64)
+    out = {name: np.empty(n_windows) for name in ["std", "slope_uv_s", "snr_db", "clip_fraction"]}
+    if n_windows == 0:
+        return out
+
+    windows = sliding_window_view(signal, win_len)[::stride][:n_windows]
+    diffs = sliding_window_view(np.diff(signal), win_len - 1)[::stride][:n_windows] if win_len > 1 else None
+    clipped = (signal <= config.sensor_min_val) | (signal >= config.sensor_max_val)
+    clip_csum = np.r_[0, np.cumsum(clipped)]
+    starts = np.arange(n_windows) * stride
+    x = np.arange(win_len) - (win_len - 1) / 2.0
+    sxx = win_len * (win_len * win_len - 1.0) / 12.0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for lo in range(0, n_windows, block_windows):
+            hi = min(lo + block_windows, n_windows)
+            block = windows[lo:hi]
+            var = block.var(axis=1)
+            out["std"][lo:hi] = np.sqrt(var)
+            out["slope_uv_s"][lo:hi] = (block @ x) / sxx * config.target_hz if sxx > 0 else 0.0
+            diff_var = diffs[lo:hi].var(axis=1) if diffs is not None else np.nan
+            out["snr_db"][lo:hi] = 10 * np.log10(var / (diff_var + 1e-9))
+        out["clip_fraction"] = (clip_csum[starts + win_len] - clip_csum[starts]) / win_len
+    return out
+
+
+def prefix_window_metrics(signal: np.ndarray, win_len: int, stride: int, n_windows: int,
+                          config: PreprocessConfig) -> Dict[str, np.ndarray]:
+    """``strided_window_metrics`` in O(1) per window from per-session prefix sums.
+
+    Cumulative sums of x, x^2, j*x (j = sample index), squared first
+    differences, non-zero differences and rail hits are built once, so the
+    cost scales with session length rather than length x overlap. The signal
+    is centred on its session mean first to limit cancellation. Versus the
+    direct computation, variance-type terms differ by roughly
+    ``len(signal) * eps * max|x - mean|^2`` in absolute terms; windows with no
+    sample-to-sample change still get an exact zero std, so flatline
+    detection does not depend on that rounding. Clip fractions are exact.
+    """
+    signal = np.asarray(signal, dtype=np.float64)
+    out = {name: np.empty(n_windows) for name in ["std", "slope_uv_s", "snr_db", "clip_fraction"]}
+    if n_windows == 0:
+        return out
+
+    x = signal - signal.mean()
+    j = np.arange(len(x), dtype=np.float64)
+    d = np.diff(x)
+
+    def prefix(values):
+        return np.r_[0.0, np.cumsum(values)]
+
+    s1, s2, sjx = prefix(x), prefix(x * x), prefix(j * x)
+    sd2 = prefix(d * d)
+    changes = np.r_[0, np.cumsum(d != 0)]
+    clipped = (signal <= config.sensor_min_val) | (signal >= config.sensor_max_val)
+    clips = np.r_[0, np.cumsum(clipped)]
+
+    a = np.arange(n_windows) * stride
+    b = a + win_len
+    n = float(win_len)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sum_x = s1[b] - s1[a]
+        mean = sum_x / n
+        var = np.maximum((s2[b] - s2[a]) / n - mean * mean, 0.0)
+        var = np.where(changes[b - 1] - changes[a] == 0, 0.0, var)
+
+        sxx = n * (n * n - 1.0) / 12.0
+        sxy = (sjx[b] - sjx[a]) - (a + (n - 1) / 2.0) * sum_x
+        slope = sxy / sxx if sxx > 0 else np.zeros(n_windows)
+
+        if win_len > 1:
+            m = n - 1.0
+            diff_mean = (x[b - 1] - x[a]) / m
+            diff_var = np.maximum((sd2[b - 1] - sd2[a]) / m - diff_mean * diff_mean, 0.0)
+        else:
+            diff_var = np.full(n_windows, np.nan)
+
+        out["std"] = np.sqrt(var)
+        out["slope_uv_s"] = slope * config.target_hz
+        out["snr_db"] = 10 * np.log10(var / (diff_var + 1e-9))
+        out["clip_fraction"] = (clips[b] - clips[a]) / n
+    return out
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Tuple
+from src.preprocess.quality import ordered_counts
+
+BALANCE_KEYS = ["family_id", "species_id", "label"]
+
+
+def _add_counts(acc: Dict[Any, int], counts: Dict[Any, int]):
+    for key, n in counts.items():
+        acc[key] = acc.get(key, 0) + int(n)
+
+
+class QualityStats:
+    """Mergeable counters behind ``data_quality_report.json``.
+
+    The cleaner folds in every window it judges and every clean frame it
+    returns, so the report never needs the raw input. Counters are plain
+    sums: results of chunks, cache entries, workers or shards combine with
+    ``merge`` in any order and render the same report.
+    """
+
+    def __init__(self):
+        self.windows_by_source: Dict[str, int] = {}
+        self.rejected_by_source: Dict[str, int] = {}
+        self.reasons: Dict[str, int] = {}
+        self.clean_rows_by_source: Dict[str, int] = {}
+        self.class_balance: Dict[Tuple[str, str, int], int] = {}
+
+    @property
+    def total_windows(self) -> int:
+        return sum(self.windows_by_source.values())
+
+    @property
+    def rejected_windows(self) -> int:
+        return sum(self.rejected_by_source.values())
+
+    def add_windows(self, sources: np.ndarray):
+        """Count judged windows, one entry of ``sources`` per window."""
+        _add_counts(self.windows_by_source, ordered_counts(sources))
+
+    def add_rejections(self, reasons: np.ndarray, sources: np.ndarray):
+        _add_counts(self.reasons, ordered_counts(reasons))
+        _add_counts(self.rejected_by_source, ordered_counts(sources))
+
+    def add_clean(self, df_clean: pd.DataFrame):
+        if df_clean.empty:
+            return
+        counts = df_clean["source_id"].value_counts()
+        _add_counts(self.clean_rows_by_source, {str(k): n for k, n in counts.items() if n})
+        balance = df_clean.groupby(BALANCE_KEYS, observed=True).size()
+        _add_counts(self.class_balance, {(str(f), str(s), int(l)): n for (f, s, l), n in balance.items() if n})
+
+    def merge(self, other: "QualityStats"):
+        _add_counts(self.windows_by_source, other.windows_by_source)
+        _add_counts(self.rejected_by_source, other.rejected_by_source)
+        _add_counts(self.reasons, other.reasons)
+        _add_counts(self.clean_rows_by_source, other.clean_rows_by_source)
+        _add_counts(self.class_balance, other.class_balance)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready counters; ``class_balance`` as ``[family, species, label, rows]`` entries."""
+        return {
+            "total_windows": self.total_windows,
+            "rejected_windows": self.rejected_windows,
+            "reasons": dict(self.reasons),
+            "by_source": dict(self.rejected_by_source),
+            "windows_by_source": dict(self.windows_by_source),
+            "clean_rows_by_source": dict(self.clean_rows_by_source),
+            "class_balance": [[*key, n] for key, n in sorted(self.class_balance.items())],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QualityStats":
+        stats = cls()
+        _add_counts(stats.windows_by_source, data["windows_by_source"])
+        _add_counts(stats.rejected_by_source, data["by_source"])
+        _add_counts(stats.reasons, data["reasons"])
+        _add_counts(stats.clean_rows_by_source, data["clean_rows_by_source"])
+        _add_counts(stats.class_balance, {(f, s, int(l)): n for f, s, l, n in data["class_balance"]})
+        return stats
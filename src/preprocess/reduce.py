@@ -0,0 +1,183 @@
+import argparse
+import json
+import logging
+import sys
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.preprocess.config import PreprocessConfig, load_config
+from src.preprocess.splitter import DataSplitter
+from src.preprocess.reporter import DataReporter
+from src.preprocess.quality_stats import QualityStats
+from src.preprocess.catalog import CATALOG_COLS, build_window_catalog, broadcast_to_rows
+from src.preprocess.cache import config_hash
+from src.preprocess.ingest import READ_BATCH_ROWS, read_frame, iter_frames, concat_frames
+from src.preprocess.normalizer import NORM_BLOCK_ROWS, Normalizer
+from src.preprocess.quality import WINDOW_KEYS, empty_metric_table
+from src.preprocess.streaming import ROW_GROUP_ROWS, ParquetSink, write_parquet
+from src.preprocess.shards import SHARD_STATS_FILE, ShardRows, parse_shard_dir
+from src.preprocess.perf import PerfRecorder
+from src.preprocess.generation import clear_journal
+from src.preprocess.main import finalize, write_exports
+
+logger = logging.getLogger(__name__)
+
+def load_shards(shards_dir: Path, config: PreprocessConfig) -> List[Tuple[Path, Dict[str, Any]]]:
+    """Shard directories with their stats, checked to form one complete, consistent run."""
+    shard_dirs = sorted(p for p in shards_dir.iterdir() if p.is_dir() and parse_shard_dir(p))
+    if not shard_dirs:
+        logger.error(f"No shard outputs found in {shards_dir}")
+        sys.exit(1)
+
+    shards = []
+    for shard_dir in shard_dirs:
+        with open(shard_dir / SHARD_STATS_FILE) as f:
+            shards.append((shard_dir, json.load(f)))
+
+    n_shards = shards[0][1]["n_shards"]
+    if [stats["shard"] for _, stats in shards] != list(range(n_shards)) or \
+            any(stats["n_shards"] != n_shards for _, stats in shards):
+        logger.error(f"Expected exactly shards 0..{n_shards - 1} of {n_shards} in {shards_dir}")
+        sys.exit(1)
+    if any(stats["inputs"] != shards[0][1]["inputs"] for _, stats in shards):
+        logger.error("Shards were produced from different input files")
+        sys.exit(1)
+    if any(stats["config_hash"] != config_hash(config) for _, stats in shards):
+        logger.error("Shards were produced with a different config")
+        sys.exit(1)
+    return shards
+
+def reduce_shards(config: PreprocessConfig, shards: List[Tuple[Path, Dict[str, Any]]],
+                  processed_dir: Path, partitioned: bool = False, tensors: bool = False,
+                  perf: Optional[PerfRecorder] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Combine shard outputs into the artifacts of a single in-memory run.
+
+    Shard catalogs are merged into the global window order and clean rows
+    are streamed from the shards in that order. Normalization is fit in
+    ``NORM_BLOCK_ROWS`` blocks aligned with the single-run fit, and the
+    shards' quality counters are merged for the report.
+    """
+    perf = perf or PerfRecorder("reduce")
+    clean_columns = shards[0][1]["clean_columns"]
+    with perf.stage("split") as counts:
+        catalogs = []
+        for idx, (shard_dir, _) in enumerate(shards):
+            shard_catalog = read_frame(shard_dir / "catalog.parquet")
+            if len(shard_catalog):
+                catalogs.append(shard_catalog.assign(shard=idx))
+
+        if catalogs:
+            merged = concat_frames(catalogs).sort_values(WINDOW_KEYS, kind="stable").reset_index(drop=True)
+            n_samples = merged["n_samples"].to_numpy()
+            catalog = merged[CATALOG_COLS].copy()
+            catalog.insert(0, "window_id", np.arange(len(merged), dtype=np.int64))
+            catalog["row_offset"] = np.cumsum(n_samples) - n_samples
+            catalog["n_samples"] = n_samples
+            shard_of = merged["shard"].to_numpy()
+        else:
+            catalog = build_window_catalog(pd.DataFrame(columns=clean_columns))
+            n_samples = np.zeros(0, dtype=np.int64)
+            shard_of = np.zeros(0, dtype=np.int64)
+
+        splitter = DataSplitter(config)
+        split_manifest = splitter.split_data(catalog)
+        catalog["split"] = split_manifest["split"].to_numpy()
+        write_parquet(split_manifest, processed_dir / "split_manifest.parquet")
+        counts["windows"] = len(catalog)
+
+    with perf.stage("write_clean") as counts:
+        readers = [ShardRows(shard_dir / "clean.parquet") for shard_dir, _ in shards]
+        clean_sink = ParquetSink(processed_dir / "dataset_clean.parquet")
+        run_starts = np.flatnonzero(np.r_[True, shard_of[1:] != shard_of[:-1]]) if len(shard_of) else []
+        for start, rows in zip(run_starts, np.add.reduceat(n_samples, run_starts) if len(shard_of) else []):
+            for lo in range(0, int(rows), READ_BATCH_ROWS):
+                part = readers[shard_of[start]].take(min(READ_BATCH_ROWS, int(rows) - lo))
+                clean_sink.write(part)
+        clean_sink.close(pd.DataFrame(columns=clean_columns))
+
+        rejection_parts = [read_frame(shard_dir / "rejection_log.parquet") for shard_dir, _ in shards]
+        rejection_parts = [part for part in rejection_parts if not part.empty]
+        if rejection_parts:
+            rejection_log = concat_frames(rejection_parts).sort_values(WINDOW_KEYS, kind="stable").reset_index(drop=True)
+        else:
+            rejection_log = pd.DataFrame(columns=["session_id", "window_start_ts", "rejection_reason"])
+        write_parquet(rejection_log, processed_dir / "rejection_log.parquet")
+
+        metric_parts = [read_frame(shard_dir / "window_metrics.parquet") for shard_dir, _ in shards]
+        metric_parts = [part for part in metric_parts if not part.empty]
+        if metric_parts:
+            window_metrics = concat_frames(metric_parts).sort_values(WINDOW_KEYS, kind="stable").reset_index(drop=True)
+        else:
+            window_metrics = empty_metric_table()
+        write_parquet(window_metrics, processed_dir / "window_metrics.parquet")
+        counts["rows"] = int(n_samples.sum())
+
+    clean_path = processed_dir / "dataset_clean.parquet"
+    with perf.stage("normalize") as counts:
+        is_train = broadcast_to_rows(catalog.assign(is_train=catalog["split"] == "train"), "is_train")
+        normalizer = Normalizer(config)
+        pos = 0
+        for batch in iter_frames(clean_path, batch_rows=NORM_BLOCK_ROWS):
+            normalizer.partial_fit(batch, is_train[pos:pos + len(batch)])
+            pos += len(batch)
+        normalizer.write(processed_dir / "normalization_stats.json")
+        counts["rows"] = pos
+
+    with perf.stage("write_outputs") as counts:
+        model_sink = ParquetSink(processed_dir / "dataset_model_ready.parquet")
+        for batch in iter_frames(clean_path, batch_rows=ROW_GROUP_ROWS):
+            batch["value_norm"] = normalizer.transform(batch)
+            model_sink.write(batch)
+        model_sink.close(pd.DataFrame(columns=clean_columns).assign(value_norm=np.zeros(0, dtype=np.float32)))
+        counts["rows"] = pos
+    write_exports(config, catalog, processed_dir, partitioned, tensors, perf)
+
+    with perf.stage("report") as counts:
+        quality = QualityStats()
+        for _, stats in shards:
+            quality.merge(QualityStats.from_dict(stats["quality_stats"]))
+
+        conversion_meta = shards[0][1]["conversion_meta"]
+        reporter = DataReporter(config)
+        reporter.set_extra_stats(dropped_null_rows=sum(int(stats["dropped_null_rows"]) for _, stats in shards))
+        quality_report = reporter.generate_report(quality, clean_columns, catalog, conversion_meta)
+        counts["windows"] = len(catalog)
+    return quality_report, conversion_meta
+
+def main():
+    parser = argparse.ArgumentParser(description="LBA Preprocessing Pipeline: reduce shard outputs")
+    parser.add_argument("--config", type=str, required=True, help="Path to preprocess.yaml")
+    parser.add_argument("--shards-dir", type=str, default=None,
+                        help="Directory holding the shard-*-of-* outputs (default: --processed-dir)")
+    parser.add_argument("--processed-dir", type=str, default="data/processed", help="Output directory")
+    parser.add_argument("--reports-dir", type=str, default="data/reports", help="Reports directory")
+    parser.add_argument("--partition-model-ready", action="store_true",
+                        help="Also write model-ready rows partitioned by split/source_id with a window index")
+    parser.add_argument("--export-tensors", action="store_true",
+                        help="Also export value_norm per split as (windows x samples) float32 .npy memmaps")
+    parser.add_argument("--profile", action="store_true",
+                        help="Also dump cProfile stats per pipeline stage to <reports-dir>/profiles")
+    args = parser.parse_args()
+
+    try:
+        config: PreprocessConfig = load_config(Path(args.config))
+    except Exception as e:
+        logger.error(f"Config load failed: {e}")
+        sys.exit(1)
+
+    processed_dir = Path(args.processed_dir)
+    reports_dir = Path(args.reports_dir)
+    processed_dir.mkdir(parents=True, exist_ok=True)
+    reports_dir.mkdir(parents=True, exist_ok=True)
+
+    perf = PerfRecorder("reduce", reports_dir / "profiles" if args.profile else None)
+    shards = load_shards(Path(args.shards_dir) if args.shards_dir else processed_dir, config)
+    clear_journal(processed_dir)
+    quality_report, conversion_meta = reduce_shards(config, shards, processed_dir, args.partition_model_ready,
+                                                    args.export_tensors, perf)
+    finalize(config, quality_report, conversion_meta, processed_dir, reports_dir, shards[0][1]["inputs"], perf)
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,9 @@ import pandas as pd
 import hashlib
 from typing import Dict, Any
 from src.preprocess.config import PreprocessConfig
+from src.preprocess.leakage import to_ns, overlapping_pairs, overlap_seconds
+from src.preprocess.quality import QUALITY_REASONS
+from src.preprocess.quality_stats import QualityStats
 
 class DataReporter:
     def __init__(self, config: PreprocessConfig):
@@ -13,103 +16,133 @@ class DataReporter:
 
     def compute_leakage_checks(self, df: pd.DataFrame, manifest: pd.DataFrame) -> Dict[str, Any]:
         merge_keys = ["source_id", "plant_id", "session_id", "window_start_ts", "window_end_ts"]
+        label_cols = ["label_event_start_ts", "label_event_end_ts"]
 
-        merged = pd.merge(
-            df,
-            manifest[merge_keys + ["split"]],
+        windows = pd.merge(
+            df[merge_keys + label_cols].drop_duplicates(),
+            manifest[merge_keys + ["split"]].drop_duplicates(),
             on=merge_keys,
             how="inner"
         )
+        return self.check_window_leakage(windows)
+
+    def check_window_leakage(self, windows: pd.DataFrame) -> Dict[str, Any]:
+        windows = windows[["source_id", "plant_id", "window_start_ts", "window_end_ts",
+                           "label_event_start_ts", "label_event_end_ts", "split"]].copy()
+        plant_groups = windows.groupby(["source_id", "plant_id"], sort=True, observed=True)
+        windows["group"] = plant_groups.ngroup()
+        group_plants = [str(plant) for _, plant in plant_groups.size().index]
+
+        gap_ns = int(self.config.label_event_gap_seconds * 1_000_000_000)
+        windows["feat_start"] = to_ns(windows["window_start_ts"])
+        windows["feat_end"] = to_ns(windows["window_end_ts"])
+        windows["lbl_start"] = to_ns(windows["label_event_start_ts"])
+        windows["lbl_end"] = to_ns(windows["label_event_end_ts"])
+
+        features = windows[["group", "split", "feat_start", "feat_end"]].drop_duplicates().reset_index(drop=True)
+        labels = windows[["group", "split", "lbl_start", "lbl_end"]].drop_duplicates().reset_index(drop=True)
+        feature_sets = features.groupby(["group", "split"]).indices
+        label_sets = labels.groupby(["group", "split"]).indices
+        fs, fe = features["feat_start"].to_numpy(), features["feat_end"].to_numpy()
+        ls, le = labels["lbl_start"].to_numpy(), labels["lbl_end"].to_numpy()
 
         leakage_status = "PASS"
         offending_ids = set()
-        overlap_pairs = []
+        hits = []
+
+        def sweep(left_split, right_split, group, right_is_label):
+            li = feature_sets.get((group, left_split))
+            ri = (label_sets if right_is_label else feature_sets).get((group, right_split))
+            if li is None or ri is None:
+                return None
+            left_start, left_end = fs[li] - gap_ns, fe[li] + gap_ns
+            right_start, right_end = (ls[ri], le[ri]) if right_is_label else (fs[ri], fe[ri])
+            i, j = overlapping_pairs(left_start, left_end, right_start, right_end)
+            if len(i) == 0:
+                return None
+            return {
+                "left_id": fs[li][i],
+                "right_id": right_start[j],
+                "left_split": left_split,
+                "right_split": right_split,
+                "overlap_seconds": overlap_seconds(left_start[i], left_end[i], right_start[j], right_end[j]),
+                "overlap_type": "feature_vs_label_event" if right_is_label else "feature_vs_feature_diagnostic",
+            }
 
-        gap = pd.Timedelta(seconds=self.config.label_event_gap_seconds)
         pairs = [("train", "val"), ("train", "test"), ("val", "test")]
-
         for split_a, split_b in pairs:
-            df_a = merged[merged["split"] == split_a]
-            df_b = merged[merged["split"] == split_b]
-            if df_a.empty or df_b.empty:
-                continue
-
-            m_check = pd.merge(df_a, df_b, on=["source_id", "plant_id"], suffixes=("_a", "_b"))
-            if not m_check.empty:
-                feat_start_a = m_check["window_start_ts_a"] - gap
-                feat_end_a = m_check["window_end_ts_a"] + gap
-                lbl_start_b = m_check["label_event_start_ts_b"]
-                lbl_end_b = m_check["label_event_end_ts_b"]
-
-                overlap_mask = (feat_start_a < lbl_end_b) & (feat_end_a > lbl_start_b)
-
-                if overlap_mask.any():
-                    leakage_status = "FAIL"
-                    bad_rows = m_check[overlap_mask]
-                    offending_ids.update(bad_rows["plant_id"].astype(str).unique().tolist())
+            groups = sorted({g for g, s in feature_sets if s in (split_a, split_b)})
+            for group in groups:
+                for left, right in [(split_a, split_b), (split_b, split_a)]:
+                    hit = sweep(left, right, group, right_is_label=True)
+                    if hit is not None:
+                        leakage_status = "FAIL"
+                        offending_ids.add(group_plants[group])
+                        hits.append(hit)
+            for group in groups:
+                hit = sweep(split_a, split_b, group, right_is_label=False)
+                if hit is not None:
+                    hits.append(hit)
 
-                    for _, row in bad_rows.iterrows():
-                        overlap_pairs.append({
-                            "left_id": str(row["window_start_ts_a"]),
-                            "right_id": str(row["label_event_start_ts_b"]),
-                            "left_split": split_a,
-                            "right_split": split_b,
-                            "overlap_seconds": 0.0,
-                            "overlap_type": "feature_vs_label_event"
-                        })
-
-                feat_start_b = m_check["window_start_ts_b"]
-                feat_end_b = m_check["window_end_ts_b"]
-                overlap_mask_ff = (feat_start_a < feat_end_b) & (feat_end_a > feat_start_b)
-                if overlap_mask_ff.any():
-                    bad_rows_ff = m_check[overlap_mask_ff]
-                    for _, row in bad_rows_ff.iterrows():
-                        overlap_pairs.append({
-                            "left_id": str(row["window_start_ts_a"]),
-                            "right_id": str(row["window_start_ts_b"]),
-                            "left_split": split_a,
-                            "right_split": split_b,
-                            "overlap_seconds": 0.0,
-                            "overlap_type": "feature_vs_feature_diagnostic"
-                        })
+        overlap_pairs = []
+        for hit in hits:
+            left_ids = pd.to_datetime(hit["left_id"], utc=True).astype(str)
+            right_ids = pd.to_datetime(hit["right_id"], utc=True).astype(str)
+            for left_id, right_id, seconds in zip(left_ids, right_ids, hit["overlap_seconds"]):
+                overlap_pairs.append({
+                    "left_id": left_id,
+                    "right_id": right_id,
+                    "left_split": hit["left_split"],
+                    "right_split": hit["right_split"],
+                    "overlap_seconds": float(seconds),
+                    "overlap_type": hit["overlap_type"]
+                })
 
         return {
             "status": leakage_status,
-            "offending_ids": list(offending_ids),
+            "offending_ids": sorted(offending_ids),
             "overlap_pairs": overlap_pairs
         }
 
-    def generate_report(self, df_raw, df_clean, rejection_log, split_manifest, cleaner_stats, conversion_meta):
+    def generate_report(self, quality: QualityStats, clean_columns, window_catalog: pd.DataFrame,
+                        conversion_meta: Dict[str, Any]) -> Dict[str, Any]:
+        """Render accumulated ``QualityStats`` plus the window-level leakage checks.
+
+        Rates are rejected windows over the windows judged for that source.
+        Every mapping is emitted in a fixed order, so the report does not
+        depend on how the counters were merged.
+        """
         canonical_cols = {
             "timestamp_utc", "value_uv", "label", "family_id", "species_id",
             "plant_id", "session_id", "hardware_id", "source_id",
             "window_start_ts", "window_end_ts", "label_event_start_ts", "label_event_end_ts"
         }
-        missing_cols = canonical_cols - set(df_clean.columns)
+        missing_cols = canonical_cols - set(clean_columns)
         schema_errors = len(missing_cols)
 
-        leakage = self.compute_leakage_checks(df_clean, split_manifest)
-
         return {
             "report_schema_version": "1.0.0",
             "schema_version": "1.0.6",
-            "total_windows_processed": int(cleaner_stats.get("total_windows", 0)),
-            "rejected_windows_count": int(cleaner_stats.get("rejected_windows", 0)),
-            "rejection_reason_dist": cleaner_stats.get("reasons", {}),
+            "total_windows_processed": quality.total_windows,
+            "rejected_windows_count": quality.rejected_windows,
+            "rejection_reason_dist": {
+                reason: quality.reasons[reason] for reason in QUALITY_REASONS if reason in quality.reasons
+            },
             "rejection_rate_per_source": {
-                k: v / len(df_raw[df_raw["source_id"] == k]) if len(df_raw[df_raw["source_id"] == k]) > 0 else 0
-                for k, v in cleaner_stats.get("by_source", {}).items()
+                src: quality.rejected_by_source.get(src, 0) / n
+                for src, n in sorted(quality.windows_by_source.items()) if n > 0
             },
             "class_balance_by_family_species": {
-                str(k): int(v) for k, v in df_clean.groupby(["family_id", "species_id", "label"]).size().to_dict().items()
+                str(k): v for k, v in sorted(quality.class_balance.items())
             },
             "harmonization_stats_by_source": {
-                src: {"count": int(count)} for src, count in df_clean["source_id"].value_counts().items()
+                src: {"count": count}
+                for src, count in sorted(quality.clean_rows_by_source.items(), key=lambda kv: (-kv[1], kv[0]))
             },
             "schema_validation_errors_count": schema_errors,
             "dropped_null_rows": self.dropped_null_rows,
             "unit_conversion_summary": conversion_meta,
-            "leakage_checks": leakage,
+            "leakage_checks": self.check_window_leakage(window_catalog),
             "config_hash": hashlib.md5(str(self.config.model_dump()).encode()).hexdigest(),
             "seed": self.config.random_seed
         }
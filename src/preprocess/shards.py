@@ -0,0 +1,62 @@
+import hashlib
+import re
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+from src.preprocess.ingest import READ_BATCH_ROWS, iter_frames, concat_frames
+
+SHARD_STATS_FILE = "shard_stats.json"
+_SHARD_DIR = re.compile(r"shard-(\d{5})-of-(\d{5})$")
+
+
+def parse_shard_spec(spec: str) -> Tuple[int, int]:
+    """``"i/N"`` -> ``(i, N)`` with ``0 <= i < N``."""
+    match = re.fullmatch(r"(\d+)/(\d+)", spec)
+    if not match:
+        raise ValueError(f"Shard must look like i/N, got {spec!r}")
+    shard, n_shards = int(match.group(1)), int(match.group(2))
+    if not 0 <= shard < n_shards:
+        raise ValueError(f"Shard index {shard} out of range for {n_shards} shard(s)")
+    return shard, n_shards
+
+
+def shard_dir_name(shard: int, n_shards: int) -> str:
+    return f"shard-{shard:05d}-of-{n_shards:05d}"
+
+
+def parse_shard_dir(path: Path) -> Optional[Tuple[int, int]]:
+    match = _SHARD_DIR.match(path.name)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def plant_shard(plant_ids: pd.Series, n_shards: int) -> np.ndarray:
+    """Stable shard of every row's plant: ``md5(plant_id) mod n_shards``.
+
+    Hashed once per distinct plant. Rows with a null plant go to shard 0,
+    which accounts for them as dropped null rows.
+    """
+    codes, plants = pd.factorize(plant_ids)
+    shard_of_plant = np.fromiter(
+        (int.from_bytes(hashlib.md5(str(p).encode()).digest(), "big") % n_shards for p in plants),
+        dtype=np.int64, count=len(plants),
+    )
+    return np.append(shard_of_plant, 0)[codes]
+
+
+class ShardRows:
+    """Sequential reader handing out the rows of one shard file in order."""
+
+    def __init__(self, path: Path, batch_rows: int = READ_BATCH_ROWS):
+        self._batches: Iterator[pd.DataFrame] = iter_frames(path, batch_rows=batch_rows)
+        self._buffer = pd.DataFrame()
+        self._pos = 0
+
+    def take(self, n_rows: int) -> pd.DataFrame:
+        while len(self._buffer) - self._pos < n_rows:
+            rest = self._buffer.iloc[self._pos:]
+            self._buffer = concat_frames([rest, next(self._batches)]) if len(rest) else next(self._batches)
+            self._pos = 0
+        rows = self._buffer.iloc[self._pos:self._pos + n_rows].reset_index(drop=True)
+        self._pos += n_rows
+        return rows
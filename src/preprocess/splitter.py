@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import hashlib
 from src.preprocess.config import PreprocessConfig
@@ -17,25 +18,47 @@ class DataSplitter:
         else:
             return "test"
 
+    def _split_groups(self, family: np.ndarray, species: np.ndarray, plant: np.ndarray) -> np.ndarray:
+        """``_get_split_group`` for arrays of unique entities: one digest per entity, bucketing vectorized."""
+        seed = self.config.random_seed
+        buckets = np.fromiter(
+            (int.from_bytes(hashlib.md5(f"{f}_{s}_{p}{seed}".encode()).digest(), "big") % 100
+             for f, s, p in zip(family, species, plant)),
+            dtype=np.int64, count=len(plant),
+        )
+        return np.select([buckets < 70, buckets < 85], ["train", "val"], default="test").astype(object)
+
     def split_data(self, df: pd.DataFrame) -> pd.DataFrame:
         entities = df[["family_id", "species_id", "plant_id"]].drop_duplicates()
+        entity_splits = self._split_groups(
+            entities["family_id"].to_numpy(), entities["species_id"].to_numpy(), entities["plant_id"].to_numpy()
+        )
+        # A plant listed under several families/species takes its last entity's split.
+        last = ~entities["plant_id"].duplicated(keep="last").to_numpy()
+        plant_splits = pd.Series(entity_splits[last], index=entities["plant_id"].to_numpy()[last])
 
-        plant_splits = {}
-        for _, row in entities.iterrows():
-            split = self._get_split_group(row["family_id"], row["species_id"], row["plant_id"])
-            plant_splits[row["plant_id"]] = split
-
-        splits = df["plant_id"].map(plant_splits).fillna("train")
+        plant_codes, plants = pd.factorize(df["plant_id"])
+        # Code -1 (null plant) picks the trailing "train" default.
+        split_of_code = np.append(plant_splits.reindex(np.asarray(plants, dtype=object)).to_numpy(dtype=object), "train")
+        splits = split_of_code[plant_codes].astype(object)
         split_manifest = df[["source_id", "plant_id", "session_id", "window_start_ts", "window_end_ts"]].copy()
         split_manifest["split"] = splits
 
-        for a, b in [("train", "val"), ("train", "test"), ("val", "test")]:
-            ids_a = set(split_manifest[split_manifest["split"] == a]["session_id"])
-            ids_b = set(split_manifest[split_manifest["split"] == b]["session_id"])
-            assert ids_a.isdisjoint(ids_b), f"Session Leakage detected between {a} and {b}"
+        self.check_disjoint(split_manifest)
+        return split_manifest
 
-            p_a = set(split_manifest[split_manifest["split"] == a]["plant_id"])
-            p_b = set(split_manifest[split_manifest["split"] == b]["plant_id"])
-            assert p_a.isdisjoint(p_b), f"Plant Leakage detected between {a} and {b}"
+    def check_disjoint(self, split_manifest: pd.DataFrame):
+        split = split_manifest["split"].to_numpy()
+        ids_by_split = {}
+        for col in ["session_id", "plant_id"]:
+            codes, _ = pd.factorize(split_manifest[col])
+            ids_by_split[col] = {name: np.unique(codes[split == name]) for name in ["train", "val", "test"]}
 
-        return split_manifest
+        for a, b in [("train", "val"), ("train", "test"), ("val", "test")]:
+            sessions = ids_by_split["session_id"]
+            shared = np.intersect1d(sessions[a], sessions[b], assume_unique=True)
+            assert len(shared) == 0, f"Session Leakage detected between {a} and {b}"
+
+            plants = ids_by_split["plant_id"]
+            shared = np.intersect1d(plants[a], plants[b], assume_unique=True)
+            assert len(shared) == 0, f"Plant Leakage detected between {a} and {b}"
@@ -0,0 +1,184 @@
+import json
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from src.preprocess.ingest import READ_BATCH_ROWS, iter_frames, concat_frames, table_to_frame
+
+SESSION_KEYS = ["source_id", "plant_id", "session_id"]
+
+# Row-group length used for every processed Parquet artifact, so the streaming
+# writer and the in-memory write_parquet path lay out identical files.
+ROW_GROUP_ROWS = 1024 * 1024
+
+# Chunks whose spill files are written in one pass over the inputs; bounds open files.
+MAX_OPEN_SPILLS = 256
+
+
+def arrow_table(df: pd.DataFrame) -> pa.Table:
+    """Arrow table for a processed artifact, with categorical columns as plain strings.
+
+    Categoricals would otherwise be stored with their (chunk-dependent)
+    category count in the schema metadata. As strings they still land in
+    Parquet dictionary-encoded, and every writer produces the same schema.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    categorical = [i for i, field in enumerate(table.schema) if pa.types.is_dictionary(field.type)]
+    if not categorical:
+        return table
+    for i in categorical:
+        field = table.schema.field(i)
+        table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+    pandas_meta = json.loads(table.schema.metadata[b"pandas"])
+    for col in pandas_meta["columns"]:
+        if col["pandas_type"] == "categorical":
+            col.update(pandas_type="unicode", numpy_type="object", metadata=None)
+    return table.replace_schema_metadata({**table.schema.metadata, b"pandas": json.dumps(pandas_meta).encode()})
+
+
+def write_parquet(df: pd.DataFrame, path: Path, row_group_rows: int = ROW_GROUP_ROWS):
+    """Write a processed artifact in one go; the layout ``ParquetSink`` reproduces."""
+    pq.write_table(arrow_table(df), path, row_group_size=row_group_rows,
+                   compression="snappy", use_dictionary=True)
+
+
+class ParquetSink:
+    """Incrementally writes DataFrames into one Parquet file.
+
+    Appended frames are buffered and flushed in row groups of exactly
+    ``row_group_rows`` rows, which reproduces the layout of a single
+    ``write_parquet(df, path, row_group_rows)`` call over the concatenated
+    frames while holding at most one row group.
+    """
+
+    def __init__(self, path: Path, row_group_rows: int = ROW_GROUP_ROWS):
+        self.path = Path(path)
+        self.row_group_rows = row_group_rows
+        self.rows_written = 0
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._pending: List[pa.Table] = []
+        self._pending_rows = 0
+
+    def write(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        table = arrow_table(df)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema, compression="snappy", use_dictionary=True)
+        self._pending.append(table)
+        self._pending_rows += table.num_rows
+        while self._pending_rows >= self.row_group_rows:
+            self._flush(self.row_group_rows)
+
+    def _flush(self, n_rows: int):
+        buffered = pa.concat_tables(self._pending)
+        self._writer.write_table(buffered.slice(0, n_rows).combine_chunks(), row_group_size=n_rows)
+        rest = buffered.slice(n_rows)
+        self._pending = [rest] if rest.num_rows else []
+        self._pending_rows = rest.num_rows
+        self.rows_written += n_rows
+
+    def close(self, empty_frame: pd.DataFrame):
+        """Finish the file; ``empty_frame`` is written instead if nothing was appended."""
+        if self._writer is None:
+            write_parquet(empty_frame, self.path, self.row_group_rows)
+            return
+        if self._pending_rows:
+            self._flush(self._pending_rows)
+        self._writer.close()
+
+
+def scan_sessions(input_files: List[Path]) -> Tuple[pd.DataFrame, int]:
+    """Key-only pass: row counts per (session, file) and rows with null keys.
+
+    Returns a frame of ``SESSION_KEYS + ["file_idx", "rows"]`` and the number
+    of rows whose key columns contain a null (those never reach a chunk).
+    """
+    parts = []
+    null_key_rows = 0
+    for file_idx, f in enumerate(input_files):
+        for batch in iter_frames(f, columns=SESSION_KEYS):
+            null_key_rows += int(batch.isna().any(axis=1).sum())
+            counts = batch.groupby(SESSION_KEYS, sort=False, observed=True).size().rename("rows").reset_index()
+            counts[SESSION_KEYS] = counts[SESSION_KEYS].astype(object)
+            counts["file_idx"] = file_idx
+            parts.append(counts)
+    if not parts:
+        return pd.DataFrame(columns=SESSION_KEYS + ["file_idx", "rows"]), null_key_rows
+    index = pd.concat(parts, ignore_index=True)
+    index = index.groupby(SESSION_KEYS + ["file_idx"], sort=False)["rows"].sum().reset_index()
+    return index, null_key_rows
+
+
+def plan_chunks(session_index: pd.DataFrame, chunk_rows: int) -> List[pd.DataFrame]:
+    """Group whole sessions, in sorted key order, into chunks of about ``chunk_rows`` rows.
+
+    A session larger than ``chunk_rows`` forms a chunk of its own. Each chunk
+    frame carries ``SESSION_KEYS + ["file_idx"]``.
+    """
+    totals = session_index.groupby(SESSION_KEYS, sort=True)["rows"].sum()
+    chunk_of = np.zeros(len(totals), dtype=np.int64)
+    current, filled = 0, 0
+    for i, rows in enumerate(totals.to_numpy()):
+        if filled and filled + rows > chunk_rows:
+            current, filled = current + 1, 0
+        chunk_of[i] = current
+        filled += rows
+    assignment = pd.Series(chunk_of, index=totals.index, name="chunk").reset_index()
+    located = pd.merge(assignment, session_index[SESSION_KEYS + ["file_idx"]], on=SESSION_KEYS, how="left")
+    return [group.drop(columns="chunk") for _, group in located.groupby("chunk", sort=True)]
+
+
+def spill_chunks(input_files: List[Path], chunks: List[pd.DataFrame], spill_dir: Path,
+                 batch_rows: int = READ_BATCH_ROWS) -> Tuple[List[List[Path]], List[int]]:
+    """Distribute the rows of every chunk's sessions into per-chunk spill files.
+
+    Each input file is read once per group of ``MAX_OPEN_SPILLS`` chunks
+    (once in total for most runs) instead of once per chunk. Rows keep file
+    and row order; rows with a null are dropped. Returns, per chunk, its
+    Arrow IPC spill files in file order and the number of null rows dropped.
+    """
+    spill_dir = Path(spill_dir)
+    paths: List[List[Path]] = [[] for _ in chunks]
+    dropped = [0] * len(chunks)
+    for lo in range(0, len(chunks), MAX_OPEN_SPILLS):
+        group = list(range(lo, min(lo + MAX_OPEN_SPILLS, len(chunks))))
+        owners = pd.concat([chunks[i][SESSION_KEYS].drop_duplicates().assign(chunk=i) for i in group],
+                           ignore_index=True)
+        owner_index = pd.MultiIndex.from_frame(owners[SESSION_KEYS].astype(object))
+        files = sorted(set().union(*(chunks[i]["file_idx"].unique() for i in group)))
+        for file_idx in files:
+            writers: Dict[int, pa.ipc.RecordBatchFileWriter] = {}
+            try:
+                for batch in iter_frames(input_files[file_idx], batch_rows=batch_rows):
+                    keys = pd.MultiIndex.from_frame(batch[SESSION_KEYS].astype(object))
+                    position = owner_index.get_indexer(keys)
+                    owner = np.where(position >= 0, owners["chunk"].to_numpy()[position], -1)
+                    for chunk_idx in np.unique(owner[owner >= 0]):
+                        part = batch[owner == chunk_idx]
+                        len_before = len(part)
+                        part = part.dropna(how="any")
+                        dropped[chunk_idx] += len_before - len(part)
+                        if part.empty:
+                            continue
+                        table = arrow_table(part)
+                        if chunk_idx not in writers:
+                            path = spill_dir / f"chunk-{chunk_idx:06d}-file-{file_idx:06d}.arrow"
+                            writers[chunk_idx] = pa.ipc.new_file(path, table.schema)
+                            paths[chunk_idx].append(path)
+                        writers[chunk_idx].write_table(table)
+            finally:
+                for writer in writers.values():
+                    writer.close()
+    return paths, dropped
+
+
+def read_chunk(spill_paths: List[Path]) -> pd.DataFrame:
+    """The rows of one chunk from its ``spill_chunks`` files, with ID columns categorical."""
+    parts = []
+    for path in spill_paths:
+        with pa.memory_map(str(path)) as source:
+            parts.append(table_to_frame(pa.ipc.open_file(source).read_all()))
+    return concat_frames(parts)
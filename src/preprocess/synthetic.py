@@ -0,0 +1,230 @@
+import argparse
+import logging
+import sys
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from typing import List, Tuple
+
+from src.preprocess.config import PreprocessConfig, load_config
+from src.preprocess.quality import WINDOW_KEYS
+from src.preprocess.streaming import write_parquet
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Injected window faults, each built to fail exactly the cleaner check of the same name.
+FAULTS = ("flatline", "drift", "snr", "clip")
+SPLITS = ("train", "val", "test")
+
+BASE_UV = 100.0
+SINE_UV = 20.0
+SINE_HZ = 0.1
+NOISE_UV = 0.5
+# Low-SNR windows are white noise, which scores about -3 dB.
+WHITE_NOISE_UV = 5.0
+# Drifting windows ramp at this multiple of drift_slope_max_uv_per_s.
+DRIFT_FACTOR = 5.0
+
+
+class CampaignSpec(BaseModel):
+    """Shape and fault mix of a synthetic campaign.
+
+    Sampling rate, window length and overlap come from the
+    ``PreprocessConfig`` the campaign is generated for. Fault fractions are
+    shares of all windows; ``leakage_fraction`` is a share of plants.
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    n_sources: int = Field(2, ge=1)
+    n_families: int = Field(2, ge=1)
+    n_species: int = Field(4, ge=1)
+    n_plants: int = Field(24, ge=1)
+    sessions_per_plant: int = Field(2, ge=1)
+    windows_per_session: int = Field(10, ge=1)
+
+    flatline_fraction: float = Field(0.0, ge=0, le=1)
+    drift_fraction: float = Field(0.0, ge=0, le=1)
+    low_snr_fraction: float = Field(0.0, ge=0, le=1)
+    clip_fraction: float = Field(0.0, ge=0, le=1)
+    leakage_fraction: float = Field(0.0, ge=0, le=1)
+
+    seed: int = 0
+    start: str = "2026-01-01T00:00:00Z"
+
+    @model_validator(mode="after")
+    def check_fractions(self):
+        if self.flatline_fraction + self.drift_fraction + self.low_snr_fraction + self.clip_fraction > 1:
+            raise ValueError("window fault fractions must sum to at most 1")
+        if self.leakage_fraction > 0 and self.sessions_per_plant < 2:
+            raise ValueError("leakage cases need sessions_per_plant >= 2")
+        return self
+
+
+def _categorical(codes: np.ndarray, prefix: str, width: int, n: int) -> pd.Categorical:
+    return pd.Categorical.from_codes(codes, [f"{prefix}{i:0{width}d}" for i in range(n)])
+
+
+def generate_campaign(spec: CampaignSpec, config: PreprocessConfig) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Windowed Tier A input rows plus the fault injected into each window.
+
+    Each session is one continuous recording at ``target_hz`` (a slow sine
+    with white noise) cut into ``windows_per_session`` windows of
+    ``window_seconds`` every ``stride_seconds``, so overlapping windows
+    share timestamps and base values. Faults are applied per window after
+    cutting. Plant ``p`` has species ``p % n_species``, whose family is
+    ``species % n_families``, and source ``p % n_sources``.
+
+    Every plant has one label event, placed well after its last session.
+    For leaky plants it covers the first window of the first session
+    instead, which ``inject_split_leakage`` turns into a cross-split overlap.
+
+    Returns ``(rows, windows)``: ``windows`` holds ``WINDOW_KEYS``, the
+    injected ``fault`` ("" for none) and ``leaky`` per window, in row order.
+    """
+    rng = np.random.default_rng(spec.seed)
+    hz = config.target_hz
+    n = config.window_seconds * hz
+    stride = config.stride_seconds * hz
+    n_plants, n_sessions_per_plant, n_windows_per_session = (
+        spec.n_plants, spec.sessions_per_plant, spec.windows_per_session
+    )
+    n_sessions = n_plants * n_sessions_per_plant
+    n_windows = n_sessions * n_windows_per_session
+    ns_per_sample = 1_000_000_000 // hz
+
+    session_samples = (n_windows_per_session - 1) * stride + n
+    t = np.arange(session_samples) / hz
+    phase = rng.uniform(0, 2 * np.pi, n_sessions)[:, None]
+    sessions = BASE_UV + SINE_UV * np.sin(2 * np.pi * SINE_HZ * t + phase)
+    sessions += rng.normal(0, NOISE_UV, sessions.shape)
+    offsets = np.arange(n_windows_per_session)[:, None] * stride + np.arange(n)
+    values = sessions[:, offsets].reshape(n_windows, n)
+    del sessions
+
+    counts = [round(f * n_windows) for f in (spec.flatline_fraction, spec.drift_fraction,
+                                             spec.low_snr_fraction, spec.clip_fraction)]
+    fault = np.full(n_windows, "", dtype=object)
+    fault[rng.permutation(n_windows)[:sum(counts)]] = np.repeat(FAULTS, counts)
+    values[fault == "flatline"] = BASE_UV
+    values[fault == "drift"] += DRIFT_FACTOR * config.drift_slope_max_uv_per_s * np.arange(n) / hz
+    noisy = fault == "snr"
+    values[noisy] = BASE_UV + rng.normal(0, WHITE_NOISE_UV, (int(noisy.sum()), n))
+    # A centred block at the rail keeps the window's slope and SNR within limits.
+    n_clipped = min(n, int(2 * config.clip_fraction_max * n) + 1)
+    lo = (n - n_clipped) // 2
+    values[fault == "clip", lo:lo + n_clipped] = config.sensor_max_val
+
+    plant = np.repeat(np.arange(n_plants), n_sessions_per_plant * n_windows_per_session)
+    session = np.repeat(np.arange(n_sessions), n_windows_per_session)
+    window = np.tile(np.arange(n_windows_per_session), n_sessions)
+    species = np.arange(n_plants) % spec.n_species
+    source = np.arange(n_plants) % spec.n_sources
+
+    start_ns = pd.Timestamp(spec.start).tz_convert("UTC").value
+    day_ns, minute_ns, second_ns = 86_400 * 10**9, 60 * 10**9, 10**9
+    session_start = (start_ns + (session % n_sessions_per_plant) * day_ns
+                     + np.arange(n_plants).repeat(n_sessions_per_plant)[session] * minute_ns)
+    window_start = session_start + window * stride * ns_per_sample
+    window_end = window_start + config.window_seconds * second_ns
+
+    leaky_plants = np.zeros(n_plants, dtype=bool)
+    leaky_plants[rng.permutation(n_plants)[:round(spec.leakage_fraction * n_plants)]] = True
+    last_end = window_end.reshape(n_plants, -1).max(axis=1)
+    label_start = last_end + 2 * (config.label_event_gap_seconds + config.window_seconds) * second_ns
+    label_start[leaky_plants] = window_start.reshape(n_plants, -1)[leaky_plants, 0]
+    label_end = label_start + config.window_seconds * second_ns
+
+    def per_row(x: np.ndarray) -> np.ndarray:
+        return np.repeat(x, n)
+
+    def timestamps(ns: np.ndarray) -> pd.Series:
+        return pd.Series(pd.to_datetime(ns, utc=True))
+
+    session_names = [f"plant{p:05d}_s{s:02d}" for p in range(n_plants) for s in range(n_sessions_per_plant)]
+    ids = {
+        "family_id": _categorical(per_row((species % spec.n_families)[plant]), "fam", 2, spec.n_families),
+        "species_id": _categorical(per_row(species[plant]), "sp", 3, spec.n_species),
+        "plant_id": _categorical(per_row(plant), "plant", 5, n_plants),
+        "session_id": pd.Categorical.from_codes(per_row(session), session_names),
+        "hardware_id": _categorical(per_row(source[plant]), "hw", 2, spec.n_sources),
+        "source_id": _categorical(per_row(source[plant]), "src", 2, spec.n_sources),
+    }
+    rows = pd.DataFrame({
+        "timestamp_utc": timestamps(per_row(window_start) + np.tile(np.arange(n) * ns_per_sample, n_windows)),
+        "value": values.reshape(-1),
+        "label": per_row((plant % 2).astype(np.int64)),
+        **ids,
+        "window_start_ts": timestamps(per_row(window_start)),
+        "window_end_ts": timestamps(per_row(window_end)),
+        "label_event_start_ts": timestamps(per_row(label_start[plant])),
+        "label_event_end_ts": timestamps(per_row(label_end[plant])),
+    })
+    windows = rows.iloc[::n][WINDOW_KEYS].reset_index(drop=True)
+    windows["fault"] = fault
+    windows["leaky"] = leaky_plants[plant]
+    return rows, windows
+
+
+def inject_split_leakage(split_manifest: pd.DataFrame, leaky_plants: List[str]) -> pd.DataFrame:
+    """Move each leaky plant's last session to the next split, as a session-level split would.
+
+    The plant's label event, which covers its first window, then overlaps
+    features held in another split.
+    """
+    manifest = split_manifest.copy()
+    split = manifest["split"].astype(object).to_numpy()
+    plant = manifest["plant_id"].astype(str).to_numpy()
+    session = manifest["session_id"].astype(str).to_numpy()
+    for name in leaky_plants:
+        mine = plant == name
+        moved = mine & (session == session[mine].max())
+        split[moved] = SPLITS[(SPLITS.index(split[mine][0]) + 1) % len(SPLITS)]
+    manifest["split"] = split
+    return manifest
+
+
+def write_campaign(rows: pd.DataFrame, raw_dir: Path, n_files: int = 1, seed: int = 0) -> List[Path]:
+    """Write whole windows in a seeded random order across ``n_files`` Parquet inputs."""
+    codes = rows.groupby(WINDOW_KEYS, sort=False, observed=True).ngroup().to_numpy()
+    rank = np.random.default_rng(seed).permutation(codes.max() + 1 if len(codes) else 0)
+    order = np.argsort(rank[codes], kind="stable")
+    bounds = np.searchsorted(rank[codes][order], np.linspace(0, len(rank), n_files + 1).round())
+    raw_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(n_files):
+        path = raw_dir / f"synthetic-{i:05d}.parquet"
+        write_parquet(rows.iloc[order[bounds[i]:bounds[i + 1]]], path)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LBA Preprocessing Pipeline: synthetic campaign generator")
+    parser.add_argument("--config", type=str, required=True, help="Path to preprocess.yaml")
+    parser.add_argument("--raw-dir", type=str, default="data/raw", help="Directory to write the input files to")
+    parser.add_argument("--files", type=int, default=1, help="Number of Parquet input files")
+    parser.add_argument("--truth", type=str, default=None,
+                        help="Also write the injected fault of every window to this Parquet file")
+    for name, field in CampaignSpec.model_fields.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=field.annotation, default=field.default)
+    args = parser.parse_args()
+    if args.files < 1:
+        parser.error("--files must be at least 1")
+
+    try:
+        config: PreprocessConfig = load_config(Path(args.config))
+        spec = CampaignSpec(**{name: getattr(args, name) for name in CampaignSpec.model_fields})
+    except Exception as e:
+        logger.error(f"Config load failed: {e}")
+        sys.exit(1)
+
+    rows, windows = generate_campaign(spec, config)
+    paths = write_campaign(rows, Path(args.raw_dir), args.files, spec.seed)
+    if args.truth:
+        write_parquet(windows, Path(args.truth))
+    logger.info(f"Wrote {len(rows)} rows in {len(windows)} windows to {len(paths)} file(s) in {args.raw_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import json
+import logging
+import shutil
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from pathlib import Path
+from typing import Any, Dict
+from src.preprocess.config import PreprocessConfig
+from src.preprocess.catalog import CATALOG_COLS
+from src.preprocess.ingest import READ_BATCH_ROWS
+from src.preprocess.streaming import write_parquet
+
+logger = logging.getLogger(__name__)
+
+TENSOR_DIR = "tensors"
+SPLITS = ["train", "val", "test"]
+# Per-window columns taken from each window's first model-ready row.
+ROW_META_COLS = ["hardware_id", "label"]
+
+
+def window_samples(config: PreprocessConfig) -> int:
+    return config.window_seconds * config.target_hz
+
+
+def write_window_tensors(model_ready_path: Path, catalog: pd.DataFrame, processed_dir: Path,
+                         config: PreprocessConfig) -> Dict[str, Any]:
+    """Export ``value_norm`` of each split as a dense ``(n_windows, window_samples)`` float32 ``.npy``.
+
+    ``<split>_values.npy`` row ``i`` holds the samples of the window in row
+    ``i`` of ``<split>_windows.parquet`` (window id, catalog columns,
+    hardware id and label), in window-id order and in model-ready row order
+    within the window. Windows whose ``n_samples`` differs from
+    ``window_seconds * target_hz`` are left out and listed in
+    ``length_mismatch.parquet``. Arrays are filled through ``np.lib.format.open_memmap``
+    in one batched pass over ``model_ready_path``; the returned manifest is
+    also written to ``tensor_manifest.json``.
+    """
+    out_dir = Path(processed_dir) / TENSOR_DIR
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    out_dir.mkdir(parents=True)
+
+    length = window_samples(config)
+    n_samples = catalog["n_samples"].to_numpy()
+    row_offset = catalog["row_offset"].to_numpy()
+    split = catalog["split"].astype(str).to_numpy()
+    fits = n_samples == length
+
+    # Destination row of every window inside its split's array, -1 when left out.
+    dest = np.full(len(catalog), -1, dtype=np.int64)
+    arrays = {}
+    for name in SPLITS:
+        selected = fits & (split == name)
+        dest[selected] = np.arange(int(selected.sum()))
+        arrays[name] = np.lib.format.open_memmap(
+            out_dir / f"{name}_values.npy", mode="w+", dtype=np.float32, shape=(int(selected.sum()), length)
+        )
+    split_code = pd.Categorical(split, categories=SPLITS).codes
+
+    row_meta = {col: np.empty(len(catalog), dtype=object) for col in ROW_META_COLS}
+    pos = 0
+    model_file = pq.ParquetFile(model_ready_path)
+    for batch in model_file.iter_batches(batch_size=READ_BATCH_ROWS, columns=["value_norm"] + ROW_META_COLS):
+        rows = np.arange(pos, pos + batch.num_rows, dtype=np.int64)
+        pos += batch.num_rows
+        window = np.searchsorted(row_offset, rows, side="right") - 1
+        sample = rows - row_offset[window]
+        first = sample == 0
+        for col in ROW_META_COLS:
+            row_meta[col][window[first]] = batch.column(col).to_numpy(zero_copy_only=False)[first]
+        values = batch.column("value_norm").to_numpy(zero_copy_only=False)
+        for code, name in enumerate(SPLITS):
+            take = (dest[window] >= 0) & (split_code[window] == code)
+            arrays[name][dest[window[take]], sample[take]] = values[take]
+    if pos != int(n_samples.sum()):
+        raise ValueError(f"{model_ready_path} holds {pos} rows but the catalog covers {int(n_samples.sum())}")
+
+    windows = catalog[["window_id"] + CATALOG_COLS + ["split"]].assign(
+        hardware_id=row_meta["hardware_id"],
+        label=row_meta["label"].astype(np.int8) if len(catalog) else np.zeros(0, dtype=np.int8),
+        n_samples=n_samples,
+    )
+    manifest = {"window_samples": length, "value_column": "value_norm", "splits": {}}
+    for name in SPLITS:
+        arrays[name].flush()
+        selected = fits & (split == name)
+        write_parquet(windows[selected].drop(columns=["split", "n_samples"]).reset_index(drop=True),
+                      out_dir / f"{name}_windows.parquet")
+        manifest["splits"][name] = {
+            "windows": int(selected.sum()),
+            "values": f"{name}_values.npy",
+            "metadata": f"{name}_windows.parquet",
+        }
+    del arrays
+
+    mismatched = windows.loc[~fits, ["window_id", "split", "source_id", "session_id", "window_start_ts",
+                                     "n_samples"]].reset_index(drop=True)
+    write_parquet(mismatched, out_dir / "length_mismatch.parquet")
+    manifest["length_mismatch_windows"] = len(mismatched)
+    if len(mismatched):
+        logger.warning(f"{len(mismatched)} window(s) do not hold {length} samples and were left out of the "
+                       f"tensor export; see {out_dir / 'length_mismatch.parquet'}")
+
+    with open(out_dir / "tensor_manifest.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
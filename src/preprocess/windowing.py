@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, Iterator, List
+from src.preprocess.config import PreprocessConfig
+from src.preprocess.leakage import to_ns
+
+SESSION_KEYS = ["source_id", "plant_id", "session_id"]
+RESAMPLED_COLS = ["value", "value_uv"]
+
+
+class SessionWindows:
+    """One contiguous session segment resampled onto a regular grid, with its windows as strided views.
+
+    ``signals`` holds the interpolated ``value``/``value_uv`` arrays and
+    ``hold`` maps every grid point to the last original row at or before it,
+    which carries the categorical columns (label, IDs) by zero-order hold.
+    Window ``k`` covers grid points ``[k * stride, k * stride + win_len)``.
+    """
+
+    def __init__(self, rows: pd.DataFrame, grid_ns: np.ndarray, signals: Dict[str, np.ndarray],
+                 hold: np.ndarray, win_len: int, stride: int, window_ns: int):
+        self.rows = rows
+        self.grid_ns = grid_ns
+        self.signals = signals
+        self.hold = hold
+        self.win_len = win_len
+        self.stride = stride
+        self.window_ns = window_ns
+        self.n_windows = 0 if len(grid_ns) < win_len else (len(grid_ns) - win_len) // stride + 1
+        self.starts = np.arange(self.n_windows, dtype=np.int64) * stride
+
+    @property
+    def source_id(self):
+        return self.rows["source_id"].iloc[0]
+
+    def matrix(self, name: str = "value_uv") -> np.ndarray:
+        """``(n_windows, win_len)`` read-only view over the session array; nothing is copied."""
+        return sliding_window_view(self.signals[name], self.win_len)[::self.stride][:self.n_windows]
+
+    def window_rows(self, selected: np.ndarray, columns: List[str], first_only: bool = False) -> pd.DataFrame:
+        """Materialize the selected windows as long-format rows (or their first rows only)."""
+        starts = self.starts[selected]
+        width = 1 if first_only else self.win_len
+        idx = (starts[:, None] + np.arange(width)).ravel()
+        window_start = np.repeat(self.grid_ns[starts], width)
+
+        out = {}
+        for col in columns:
+            if col == "timestamp_utc":
+                out[col] = pd.to_datetime(self.grid_ns[idx], utc=True)
+            elif col in self.signals:
+                out[col] = self.signals[col][idx].astype(self.rows[col].dtype)
+            elif col == "window_start_ts":
+                out[col] = pd.to_datetime(window_start, utc=True)
+            elif col == "window_end_ts":
+                out[col] = pd.to_datetime(window_start + self.window_ns, utc=True)
+            else:
+                out[col] = self.rows[col].iloc[self.hold[idx]].reset_index(drop=True)
+        return pd.DataFrame(out)
+
+
+class SessionWindower:
+    """Resample continuous per-session recordings to ``target_hz`` and lay out
+    ``window_seconds`` windows every ``stride_seconds``."""
+
+    def __init__(self, config: PreprocessConfig):
+        self.config = config
+        self.period_ns = 1e9 / config.target_hz
+        self.win_len = config.window_seconds * config.target_hz
+        self.stride = config.stride_seconds * config.target_hz
+        self.window_ns = config.window_seconds * 1_000_000_000
+
+    def output_columns(self, df: pd.DataFrame) -> List[str]:
+        return list(df.columns) + ["window_start_ts", "window_end_ts"]
+
+    def resample(self, t_ns: np.ndarray, values: np.ndarray, grid_ns: np.ndarray) -> np.ndarray:
+        # Interpolate on offsets from the first sample: epoch nanoseconds exceed float64 precision.
+        t0 = t_ns[0]
+        return np.interp((grid_ns - t0).astype(np.float64), (t_ns - t0).astype(np.float64),
+                         values.astype(np.float64))
+
+    def iter_sessions(self, df: pd.DataFrame) -> Iterator[SessionWindows]:
+        """Contiguous session segments in sorted key and time order; duplicate timestamps keep their first row.
+
+        A session is cut wherever two consecutive samples are more than
+        ``max_gap_seconds`` apart and wherever ``label`` changes, and each
+        segment gets its own grid. Values are linearly interpolated within a
+        segment, so windows never bridge a long gap or hold two labels;
+        stretches too short for a window yield no windows.
+        """
+        max_gap_ns = None if self.config.max_gap_seconds is None else self.config.max_gap_seconds * 1e9
+        for _, session in df.groupby(SESSION_KEYS, sort=True, observed=True):
+            t = to_ns(session["timestamp_utc"])
+            order = np.argsort(t, kind="stable")
+            t = t[order]
+            keep = np.r_[True, np.diff(t) > 0]
+            t = t[keep]
+            rows = session.iloc[order[keep]].reset_index(drop=True)
+
+            cuts = np.zeros(len(t) - 1, dtype=bool)
+            if max_gap_ns is not None:
+                cuts |= np.diff(t) > max_gap_ns
+            if "label" in rows.columns:
+                labels = rows["label"].to_numpy()
+                cuts |= labels[1:] != labels[:-1]
+            bounds = np.r_[0, np.flatnonzero(cuts) + 1, len(t)]
+            for lo, hi in zip(bounds[:-1], bounds[1:]):
+                yield self._segment(t[lo:hi], rows.iloc[lo:hi].reset_index(drop=True))
+
+    def _segment(self, t: np.ndarray, rows: pd.DataFrame) -> SessionWindows:
+        # Grid ticks sit on whole multiples of the sample period, starting at
+        # the first tick not before the segment's first sample.
+        hz = self.config.target_hz
+        first_tick = (-((-int(t[0]) * hz) // 1_000_000_000) * 1_000_000_000) // hz
+        n_grid = max(int((t[-1] - first_tick) // self.period_ns) + 1, 0)
+        grid_ns = first_tick + np.round(np.arange(n_grid) * self.period_ns).astype(np.int64)
+        signals = {
+            col: self.resample(t, rows[col].to_numpy(), grid_ns)
+            for col in RESAMPLED_COLS if col in rows.columns
+        }
+        hold = np.searchsorted(t, grid_ns, side="right") - 1
+        return SessionWindows(rows, grid_ns, signals, hold, self.win_len, self.stride, self.window_ns)
@@ -0,0 +1,165 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import pytest
+import yaml
+import numpy as np
+import pandas as pd
+from src.preprocess import append
+from src.preprocess.append import APPENDED_FILES, append_inputs, pending_inputs, read_fingerprint
+from src.preprocess.cache import file_sha256
+from src.preprocess.config import PreprocessConfig
+from src.preprocess.generation import APPEND_JOURNAL
+from src.preprocess.ingest import read_frame
+from src.preprocess.synthetic import CampaignSpec, generate_campaign, write_campaign
+
+KEYS = ["source_id", "plant_id", "session_id", "window_start_ts", "timestamp_utc"]
+
+def _run(tmp_path, module, raw, processed, reports, *extra):
+    return subprocess.run([
+        sys.executable, "-m", module, "--config", str(tmp_path / "preprocess.yaml"),
+        "--raw-dir", str(tmp_path / raw), "--processed-dir", str(tmp_path / processed),
+        "--reports-dir", str(tmp_path / reports),
+    ] + list(extra), capture_output=True, text=True)
+
+def _sorted(path, keys):
+    df = read_frame(path)
+    df = df.astype({c: str for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+    return df.sort_values(keys).reset_index(drop=True)
+
+def _generation(tmp_path):
+    return json.loads((tmp_path / "processed/generation.json").read_text())
+
+def test_append_matches_full_rebuild_and_tracks_generation(tmp_path):
+    config = {"random_seed": 42, "max_rejection_rate_per_source": 1.0, "window_seconds": 20, "stride_seconds": 10}
+    with open(tmp_path / "preprocess.yaml", "w") as f:
+        yaml.dump(config, f)
+    rows, _ = generate_campaign(CampaignSpec(n_plants=12, flatline_fraction=0.1, low_snr_fraction=0.05, seed=1),
+                                PreprocessConfig(**config))
+    first = rows["session_id"].astype(str).str.endswith("_s00") & (rows["plant_id"].astype(str) < "plant00008")
+    write_campaign(rows[first], tmp_path / "raw", n_files=2, seed=1)
+
+    result = _run(tmp_path, "src.preprocess.main", "raw", "processed", "reports")
+    assert result.returncode == 0, result.stderr
+    assert _generation(tmp_path)["generation"] == 0 and not _generation(tmp_path)["renormalize_required"]
+
+    later = rows[~first]
+    later.iloc[:len(later) // 2].to_parquet(tmp_path / "raw/new-a.parquet")
+    later.iloc[len(later) // 2:].to_parquet(tmp_path / "raw/new-b.parquet")
+    result = _run(tmp_path, "src.preprocess.append", "raw", "processed", "reports", "--workers", "2")
+    assert result.returncode == 0, result.stderr
+    generation = _generation(tmp_path)
+    assert generation["generation"] == generation["normalization_generation"] == 1
+    assert generation["renormalize_required"]
+    assert generation["stale_model_ready_rows"] == generation["segments"][0]["row_end"] > 0
+
+    result = _run(tmp_path, "src.preprocess.main", "raw", "full", "full_reports")
+    assert result.returncode == 0, result.stderr
+    for name, keys in [("dataset_clean.parquet", KEYS), ("split_manifest.parquet", KEYS[:4]),
+                       ("rejection_log.parquet", ["session_id", "window_start_ts"]),
+                       ("window_metrics.parquet", KEYS[:4])]:
+        pd.testing.assert_frame_equal(_sorted(tmp_path / "processed" / name, keys),
+                                      _sorted(tmp_path / "full" / name, keys))
+    appended = json.loads((tmp_path / "reports/data_quality_report.json").read_text())
+    rebuilt = json.loads((tmp_path / "full_reports/data_quality_report.json").read_text())
+    assert appended == rebuilt
+    fingerprint = json.loads((tmp_path / "processed/data_fingerprint.json").read_text())
+    assert len(fingerprint["inputs"]) == 4
+
+    result = _run(tmp_path, "src.preprocess.append", "raw", "processed", "reports", "--renormalize")
+    assert result.returncode == 0, result.stderr
+    assert _generation(tmp_path)["stale_model_ready_rows"] == 0
+    model_ready = _sorted(tmp_path / "processed/dataset_model_ready.parquet", KEYS)
+    reference = _sorted(tmp_path / "full/dataset_model_ready.parquet", KEYS)
+    np.testing.assert_allclose(model_ready["value_norm"], reference["value_norm"], rtol=1e-6)
+
+def test_append_refuses_known_sessions_and_changed_inputs(tmp_path):
+    config = {"random_seed": 42, "window_seconds": 20, "stride_seconds": 20}
+    with open(tmp_path / "preprocess.yaml", "w") as f:
+        yaml.dump(config, f)
+    rows, _ = generate_campaign(CampaignSpec(n_plants=4, windows_per_session=5, seed=2), PreprocessConfig(**config))
+    paths = write_campaign(rows, tmp_path / "raw", n_files=2, seed=2)
+    assert _run(tmp_path, "src.preprocess.main", "raw", "processed", "reports").returncode == 0
+
+    rows.head(400).to_parquet(tmp_path / "raw/again.parquet")
+    result = _run(tmp_path, "src.preprocess.append", "raw", "processed", "reports")
+    assert result.returncode == 1
+    assert "Sessions already in the outputs" in result.stderr
+    (tmp_path / "raw/again.parquet").unlink()
+
+    original = paths[1].read_bytes()
+    edited = bytearray(original)
+    edited[len(edited) // 2] ^= 1
+    paths[1].write_bytes(bytes(edited))
+    result = _run(tmp_path, "src.preprocess.append", "raw", "processed", "reports")
+    assert result.returncode == 1
+    assert f"{paths[1].name} changed since it was processed" in result.stderr
+    paths[1].write_bytes(original)
+
+    read_frame(paths[0]).head(10).to_parquet(paths[0])
+    result = _run(tmp_path, "src.preprocess.append", "raw", "processed", "reports")
+    assert result.returncode == 1
+    assert "changed since it was processed" in result.stderr
+    assert _generation(tmp_path)["generation"] == 0
+
+def test_interrupted_append_is_finished_by_the_next_run(tmp_path, monkeypatch):
+    config = {"random_seed": 42, "max_rejection_rate_per_source": 1.0, "window_seconds": 20, "stride_seconds": 10}
+    with open(tmp_path / "preprocess.yaml", "w") as f:
+        yaml.dump(config, f)
+    rows, _ = generate_campaign(CampaignSpec(n_plants=6, seed=3), PreprocessConfig(**config))
+    first = rows["plant_id"].astype(str) < "plant00004"
+    write_campaign(rows[first], tmp_path / "raw", n_files=1, seed=3)
+    assert _run(tmp_path, "src.preprocess.main", "raw", "processed", "reports").returncode == 0
+    shutil.copytree(tmp_path / "processed", tmp_path / "reference")
+    shutil.copytree(tmp_path / "reports", tmp_path / "reference_reports")
+    rows[~first].to_parquet(tmp_path / "raw/new.parquet")
+    assert _run(tmp_path, "src.preprocess.append", "raw", "reference", "reference_reports").returncode == 0
+
+    replace = os.replace
+    calls = []
+    def crash_on_third_output(src, dst):
+        calls.append(dst)
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        replace(src, dst)
+    monkeypatch.setattr(os, "replace", crash_on_third_output)
+    new_inputs = pending_inputs([tmp_path / "raw/new.parquet"], read_fingerprint(tmp_path / "processed")["inputs"])
+    with pytest.raises(KeyboardInterrupt):
+        append_inputs(PreprocessConfig(**config), [tmp_path / "raw/new.parquet"], new_inputs,
+                      tmp_path / "processed", tmp_path / "reports")
+    monkeypatch.setattr(os, "replace", replace)
+    assert (tmp_path / "processed" / APPEND_JOURNAL).exists()
+    assert len(read_fingerprint(tmp_path / "processed")["inputs"]) == 1
+
+    result = _run(tmp_path, "src.preprocess.append", "raw", "processed", "reports")
+    assert result.returncode == 0, result.stderr
+    assert "Finishing the interrupted append of generation 1" in result.stderr
+    assert not (tmp_path / "processed" / APPEND_JOURNAL).exists()
+    for name in APPENDED_FILES + ["normalization_stats.json", "data_fingerprint.json", "generation.json"]:
+        assert (tmp_path / "processed" / name).read_bytes() == (tmp_path / "reference" / name).read_bytes(), name
+    assert ((tmp_path / "reports/data_quality_report.json").read_text()
+            == (tmp_path / "reference_reports/data_quality_report.json").read_text())
+
+def test_watch_polls_read_only_new_or_changed_files(tmp_path, monkeypatch):
+    paths = []
+    for i in range(3):
+        paths.append(tmp_path / f"f{i}.csv")
+        paths[-1].write_text(f"value\n{i}\n")
+    reads = []
+    monkeypatch.setattr(append, "file_sha256", lambda f: reads.append(f.name) or file_sha256(f))
+    identities = {}
+    assert len(pending_inputs(paths, [], identities)) == 3
+    known = pending_inputs(paths, [], identities)
+    assert reads == ["f0.csv", "f1.csv", "f2.csv"]
+
+    # Same size, new content: the changed mtime triggers a full rehash, which catches the rewrite.
+    mtime = paths[1].stat().st_mtime_ns
+    paths[1].write_text("value\n9\n")
+    os.utime(paths[1], ns=(mtime + 10**9, mtime + 10**9))
+    with pytest.raises(SystemExit):
+        pending_inputs(paths, known, identities)
+    assert reads[3:] == ["f1.csv"]
+    with pytest.raises(SystemExit):
+        pending_inputs(paths, known)
@@ -0,0 +1,46 @@
+import json
+import subprocess
+import sys
+import yaml
+from src.preprocess.benchmark import TARGETS, find_regressions
+
+def _bench(tmp_path, *extra):
+    return subprocess.run([
+        sys.executable, "-m", "src.preprocess.benchmark", "--config", str(tmp_path / "preprocess.yaml"),
+        "--scales", "tiny", "--baseline", str(tmp_path / "baseline.json"),
+        "--reports-dir", str(tmp_path / "reports"),
+    ] + list(extra), capture_output=True, text=True)
+
+def test_benchmark_records_targets_and_gates_on_baseline(tmp_path):
+    with open(tmp_path / "preprocess.yaml", "w") as f:
+        yaml.dump({"random_seed": 42, "window_seconds": 20, "stride_seconds": 10}, f)
+
+    result = _bench(tmp_path, "--update-baseline")
+    assert result.returncode == 0, result.stderr
+    baseline = json.loads((tmp_path / "baseline.json").read_text())
+    tiny = baseline["results"]["tiny"]
+    assert list(tiny) == TARGETS
+    assert tiny["DataCleaner.run"]["rows"] == 4 * 2 * 20 * 200
+    assert tiny["DataCleaner.run"]["windows"] == 160
+    for target in TARGETS:
+        assert tiny[target]["rows_per_s"] > 0 and tiny[target]["peak_rss_bytes"] > 0
+
+    result = _bench(tmp_path, "--tolerance", "100")
+    assert result.returncode == 0, result.stderr
+    report = json.loads((tmp_path / "reports/benchmark_report.json").read_text())
+    assert report["regressions"] == []
+
+    tiny["DataCleaner.run"]["rows_per_s"] *= 1000
+    (tmp_path / "baseline.json").write_text(json.dumps(baseline))
+    result = _bench(tmp_path)
+    assert result.returncode == 1
+    assert "BENCHMARK REGRESSION" in result.stderr and "tiny/DataCleaner.run" in result.stderr
+
+def test_find_regressions_checks_throughput_and_peak_memory():
+    base = {"s": {"main": {"rows_per_s": 1000.0, "peak_rss_bytes": 100}}}
+    assert find_regressions({"s": {"main": {"rows_per_s": 700.0, "peak_rss_bytes": 140}}}, base, 0.5) == []
+    slow = find_regressions({"s": {"main": {"rows_per_s": 600.0, "peak_rss_bytes": 100}}}, base, 0.5)
+    assert len(slow) == 1 and "rows/s" in slow[0]
+    heavy = find_regressions({"s": {"main": {"rows_per_s": 1000.0, "peak_rss_bytes": 160}}}, base, 0.5)
+    assert len(heavy) == 1 and "peak RSS" in heavy[0]
+    assert find_regressions({"m": {"main": {"rows_per_s": 1.0, "peak_rss_bytes": 10**9}}}, base, 0.5) == []
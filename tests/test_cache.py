@@ -0,0 +1,159 @@
+import subprocess
+import hashlib
+import json
+import sys
+import yaml
+import numpy as np
+import pandas as pd
+from src.preprocess.cache import (
+    NON_CLEANING_FIELDS, cleaning_config_hash, describe_inputs, hash_files, write_data_fingerprint,
+)
+from src.preprocess.config import PreprocessConfig
+
+def _session_file(path, plant, seed):
+    rng = np.random.default_rng(seed)
+    ts = pd.Timestamp("2026-01-01 12:00:00", tz="UTC")
+    t = np.arange(100) / 10.0
+    frames = []
+    for w in range(4):
+        start = ts + pd.Timedelta(seconds=10 * w)
+        values = 100 + 20 * np.sin(2 * np.pi * 0.05 * t) + rng.normal(0, 0.5, 100)
+        if w == 3:
+            values = np.full(100, 100.0)
+        frames.append(pd.DataFrame({
+            "timestamp_utc": start + pd.to_timedelta(t, unit="s"),
+            "value": values, "label": w % 2,
+            "family_id": "f", "species_id": "s",
+            "plant_id": plant, "session_id": f"{plant}_s",
+            "hardware_id": "h", "source_id": "src",
+            "window_start_ts": start,
+            "window_end_ts": start + pd.Timedelta(seconds=10),
+            "label_event_start_ts": ts + pd.Timedelta(seconds=200),
+            "label_event_end_ts": ts + pd.Timedelta(seconds=205),
+        }))
+    pd.concat(frames, ignore_index=True).to_parquet(path)
+
+def _run(tmp_path, name, extra):
+    config_path = tmp_path / "preprocess.yaml"
+    with open(config_path, "w") as f:
+        yaml.dump({"random_seed": 42, "max_rejection_rate_per_source": 1.0}, f)
+    result = subprocess.run([
+        sys.executable, "-m", "src.preprocess.main",
+        "--config", str(config_path),
+        "--raw-dir", str(tmp_path / "raw"),
+        "--processed-dir", str(tmp_path / name / "processed"),
+        "--reports-dir", str(tmp_path / name / "reports"),
+    ] + extra, capture_output=True, text=True, check=True)
+    return tmp_path / name / "processed", result.stderr
+
+def _digest(path):
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+def test_cache_reuses_unchanged_files_and_matches_full_run(tmp_path):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    cache_dir = tmp_path / "cache"
+    _session_file(raw_dir / "a.parquet", "p1", 1)
+    _session_file(raw_dir / "b.parquet", "p2", 2)
+
+    _, log = _run(tmp_path, "first", ["--cache-dir", str(cache_dir)])
+    assert "0 hit(s), 2 miss(es)" in log
+    entries = {p.name: p.stat().st_mtime_ns for p in cache_dir.iterdir()}
+    assert len(entries) == 2
+
+    _session_file(raw_dir / "c.parquet", "p3", 3)
+    cached, log = _run(tmp_path, "second", ["--cache-dir", str(cache_dir)])
+    assert "2 hit(s), 1 miss(es)" in log
+    assert len(list(cache_dir.iterdir())) == 3
+    for name, mtime in entries.items():
+        assert (cache_dir / name).stat().st_mtime_ns == mtime
+
+    full, _ = _run(tmp_path, "full", [])
+    for name in ["dataset_clean.parquet", "rejection_log.parquet", "split_manifest.parquet",
+                 "dataset_model_ready.parquet", "window_metrics.parquet"]:
+        assert _digest(cached / name) == _digest(full / name), name
+
+    fingerprint = json.loads((cached / "data_fingerprint.json").read_text())
+    assert [i["file"] for i in fingerprint["inputs"]] == ["a.parquet", "b.parquet", "c.parquet"]
+    assert fingerprint["inputs"][0]["sha256"] == _digest(raw_dir / "a.parquet")
+    uncached = json.loads((full / "data_fingerprint.json").read_text())
+    assert [i["sha256"] for i in uncached["inputs"]] == [_digest(raw_dir / f"{n}.parquet") for n in "abc"]
+    assert uncached["dataset_sha256"] == fingerprint["dataset_sha256"]
+
+def test_fingerprint_changes_with_a_same_size_edit(tmp_path):
+    (tmp_path / "raw").mkdir()
+    paths = [tmp_path / "raw" / f"f{i}.bin" for i in range(3)]
+    data = bytearray(np.random.default_rng(0).bytes(1 << 20))
+    for path in paths:
+        path.write_bytes(bytes(data))
+    config = PreprocessConfig(random_seed=42)
+    write_data_fingerprint(tmp_path / "before.json", describe_inputs(paths, hash_files(paths, workers=2)), config)
+    data[len(data) // 2] ^= 1
+    paths[1].write_bytes(bytes(data))
+    hashes = hash_files(paths, workers=2)
+    assert hashes == [_digest(path) for path in paths]
+    write_data_fingerprint(tmp_path / "after.json", describe_inputs(paths, hashes), config)
+    before = json.loads((tmp_path / "before.json").read_text())
+    after = json.loads((tmp_path / "after.json").read_text())
+    assert before["inputs"][1]["size_bytes"] == after["inputs"][1]["size_bytes"]
+    assert before["dataset_sha256"] != after["dataset_sha256"]
+
+def test_cache_invalidated_by_cleaning_config(tmp_path):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    cache_dir = tmp_path / "cache"
+    _session_file(raw_dir / "a.parquet", "p1", 1)
+
+    _run(tmp_path, "first", ["--cache-dir", str(cache_dir)])
+    with open(tmp_path / "preprocess.yaml") as f:
+        cfg = yaml.safe_load(f)
+    cfg["snr_db_min"] = 1.0
+    with open(tmp_path / "other.yaml", "w") as f:
+        yaml.dump(cfg, f)
+    subprocess.run([
+        sys.executable, "-m", "src.preprocess.main",
+        "--config", str(tmp_path / "other.yaml"),
+        "--raw-dir", str(raw_dir),
+        "--processed-dir", str(tmp_path / "other/processed"),
+        "--reports-dir", str(tmp_path / "other/reports"),
+        "--cache-dir", str(cache_dir),
+    ], check=True, capture_output=True)
+    assert len(list(cache_dir.iterdir())) == 2
+
+def test_cache_invalidated_by_spectral_settings(tmp_path):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    cache_dir = tmp_path / "cache"
+    _session_file(raw_dir / "a.parquet", "p1", 1)
+    _run(tmp_path, "first", ["--cache-dir", str(cache_dir)])
+
+    with open(tmp_path / "preprocess.yaml") as f:
+        cfg = yaml.safe_load(f)
+    cfg.update({"spike_mad_k": 1.0, "spike_count_max": 0})
+    with open(tmp_path / "spike.yaml", "w") as f:
+        yaml.dump(cfg, f)
+    result = subprocess.run([
+        sys.executable, "-m", "src.preprocess.main",
+        "--config", str(tmp_path / "spike.yaml"),
+        "--raw-dir", str(raw_dir),
+        "--processed-dir", str(tmp_path / "spike/processed"),
+        "--reports-dir", str(tmp_path / "spike/reports"),
+        "--cache-dir", str(cache_dir),
+    ], check=True, capture_output=True, text=True)
+    assert "0 hit(s), 1 miss(es)" in result.stderr
+    report = json.loads((tmp_path / "spike/reports/data_quality_report.json").read_text())
+    assert report["rejection_reason_dist"].get("spike", 0) > 0
+
+def test_cleaning_hash_covers_every_cleaning_field():
+    base = PreprocessConfig()
+    changed = {
+        "line_noise_freqs_hz": [50.0], "line_noise_bandwidth_hz": 1.0, "line_noise_ratio_max": 0.5,
+        "signal_band_min_hz": 0.1, "signal_band_max_hz": 1.0, "out_of_band_ratio_max": 0.5,
+        "spike_mad_k": 3.0, "spike_count_max": 2, "snr_db_min": 1.0, "source_scaling": {"s": 2.0},
+    }
+    for name, value in changed.items():
+        other = base.model_copy(update={name: value})
+        assert cleaning_config_hash(other) != cleaning_config_hash(base), name
+    for name in NON_CLEANING_FIELDS:
+        other = base.model_copy(update={name: "x" if name == "normalization_scope" else 7})
+        assert cleaning_config_hash(other) == cleaning_config_hash(base), name
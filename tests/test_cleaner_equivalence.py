@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from src.preprocess.config import PreprocessConfig
+from src.preprocess.cleaner import DataCleaner
+
+def _make_windows(seed=0):
+    rng = np.random.default_rng(seed)
+    ts_base = pd.Timestamp("2026-01-01 12:00:00", tz="UTC")
+    t = np.arange(100) / 10.0
+    smooth = 100 + 20 * np.sin(2 * np.pi * 0.05 * t)
+    kinds = {
+        "clean": lambda: smooth + rng.normal(0, 0.5, 100),
+        "flatline": lambda: np.full(100, 100.0),
+        "drift": lambda: smooth + 30 * t,
+        "snr": lambda: 100 + rng.normal(0, 5.0, 100),
+        "clip": lambda: np.where((t >= 4.5) & (t < 5.5), 10000.0, smooth),
+    }
+
+    frames = []
+    w = 0
+    for src in ["src_a", "src_b"]:
+        for plant in ["p1", "p2", "p3"]:
+            for sess in ["s1", "s2"]:
+                for kind, gen in kinds.items():
+                    start = ts_base + pd.Timedelta(seconds=10 * w)
+                    frames.append(pd.DataFrame({
+                        "timestamp_utc": start + pd.to_timedelta(t, unit="s"),
+                        "value": gen(),
+                        "label": w % 2,
+                        "family_id": "f", "species_id": "s",
+                        "plant_id": plant, "session_id": f"{plant}_{sess}",
+                        "hardware_id": "h", "source_id": src,
+                        "window_start_ts": start,
+                        "window_end_ts": start + pd.Timedelta(seconds=10),
+                        "label_event_start_ts": ts_base,
+                        "label_event_end_ts": ts_base + pd.Timedelta(seconds=5),
+                    }))
+                    w += 1
+
+    single = frames[0].iloc[:1].copy()
+    single["window_start_ts"] = single["window_start_ts"] + pd.Timedelta(days=1)
+    frames.append(single)
+
+    rng.shuffle(frames)
+    df = pd.concat(frames, ignore_index=True)
+    for col in ["timestamp_utc", "window_start_ts", "window_end_ts", "label_event_start_ts", "label_event_end_ts"]:
+        df[col] = df[col].astype("datetime64[ns, UTC]")
+    return df
+
+def test_batch_engine_matches_per_group_path():
+    config = PreprocessConfig(source_scaling={"src_b": 2.0})
+    df = _make_windows()
+
+    batch = DataCleaner(config)
+    clean_b, rejected_b, meta_b = batch.run(df.copy())
+
+    reference = DataCleaner(config)
+    clean_r, rejected_r, meta_r = reference._run_per_group(df.copy())
+
+    assert batch.stats == reference.stats
+    assert set(batch.stats["reasons"]) == {"flatline", "drift", "snr", "clip"}
+    assert meta_b == meta_r
+    pd.testing.assert_frame_equal(clean_b, clean_r)
+    pd.testing.assert_frame_equal(rejected_b, rejected_r)
+
+def test_batch_engine_handles_all_rejected_and_empty():
+    config = PreprocessConfig()
+    df = _make_windows()
+    df["value"] = 1.0
+
+    batch = DataCleaner(config)
+    clean_b, rejected_b, _ = batch.run(df.copy())
+    reference = DataCleaner(config)
+    clean_r, rejected_r, _ = reference._run_per_group(df.copy())
+
+    assert batch.stats == reference.stats
+    pd.testing.assert_frame_equal(clean_b, clean_r)
+    pd.testing.assert_frame_equal(rejected_b, rejected_r)
+
+    clean_e, rejected_e, _ = DataCleaner(config).run(df.iloc[:0].copy())
+    assert clean_e.empty and rejected_e.empty
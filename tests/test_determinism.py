@@ -5,6 +5,9 @@ import yaml
 import pandas as pd
 import numpy as np
 import sys
+import json
+from src.preprocess.config import PreprocessConfig
+from src.preprocess.synthetic import CampaignSpec, generate_campaign, write_campaign
 
 def test_determinism_execution(tmp_path):
     raw_dir = tmp_path / "data/raw"
@@ -19,16 +22,17 @@ def test_determinism_execution(tmp_path):
     label_start = ts_start + pd.Timedelta(seconds=30)
     label_end = label_start + pd.Timedelta(seconds=5)
     
-    # Create 100 samples with small random variation to pass all gates:
+    # Create 100 samples of a slow oscillation with small noise to pass all gates:
     # - variance > 1e-6 (flatline check)
     # - low drift (< 10 µV/s)
-    # - good SNR (> 3 dB)
+    # - good SNR (> 3 dB; white noise alone scores about -3 dB)
     # - no clipping (values well within -10000 to 10000 range)
     np.random.seed(42)
     num_samples = 100
     base_value = 100.0
-    noise = np.random.normal(0, 5.0, num_samples)  # std=5 >> 1e-6
-    values = base_value + noise  # Mean ~100, std ~5
+    t = np.arange(num_samples) / 10.0
+    noise = np.random.normal(0, 0.5, num_samples)
+    values = base_value + 20 * np.sin(2 * np.pi * 0.5 * t) + noise  # Mean ~100, std ~14
     
     # Create time series for each sample
     time_deltas = [pd.Timedelta(seconds=i * 0.1) for i in range(num_samples)]
@@ -77,3 +81,52 @@ def test_determinism_execution(tmp_path):
     h2 = hashlib.sha256(f1.read_bytes()).hexdigest()
 
     assert h1 == h2
+    assert len(pd.read_parquet(f1)) == num_samples
+
+def _campaign(raw_dir):
+    # Whole windows are shuffled across two files; rows inside a window keep their order.
+    spec = CampaignSpec(n_plants=12, sessions_per_plant=2, windows_per_session=5,
+                        flatline_fraction=0.1, low_snr_fraction=0.05, seed=7)
+    rows, _ = generate_campaign(spec, PreprocessConfig())
+    write_campaign(rows, raw_dir, n_files=2, seed=3)
+
+def test_determinism_across_worker_counts(tmp_path):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    _campaign(raw_dir)
+    config_path = tmp_path / "preprocess.yaml"
+    with open(config_path, "w") as f:
+        yaml.dump({"random_seed": 42, "max_rejection_rate_per_source": 1.0}, f)
+
+    def run(name, extra):
+        subprocess.check_call([
+            sys.executable, "-m", "src.preprocess.main",
+            "--config", str(config_path),
+            "--raw-dir", str(raw_dir),
+            "--processed-dir", str(tmp_path / name / "processed"),
+            "--reports-dir", str(tmp_path / name / "reports"),
+        ] + extra)
+        return tmp_path / name
+
+    runs = [
+        run("w1", ["--workers", "1"]),
+        run("w8", ["--workers", "8"]),
+    ]
+    streaming = [
+        run("s1", ["--streaming", "--chunk-rows", "3000", "--workers", "1"]),
+        run("s8", ["--streaming", "--chunk-rows", "3000", "--workers", "8"]),
+    ]
+    for a, b in [runs, streaming]:
+        for name in ["processed/dataset_clean.parquet", "processed/rejection_log.parquet",
+                     "processed/window_metrics.parquet",
+                     "processed/split_manifest.parquet", "processed/dataset_model_ready.parquet",
+                     "processed/normalization_stats.json", "reports/data_quality_report.json"]:
+            assert (a / name).read_bytes() == (b / name).read_bytes(), name
+        # Identical empty outputs would prove nothing: 18 of the 120 windows are faulty.
+        report = json.loads((a / "reports/data_quality_report.json").read_text())
+        assert report["total_windows_processed"] == 120
+        assert report["rejected_windows_count"] == 18
+        for name, windows in [("dataset_clean.parquet", 102), ("dataset_model_ready.parquet", 102),
+                              ("rejection_log.parquet", 18), ("window_metrics.parquet", 120)]:
+            df = pd.read_parquet(a / "processed" / name)
+            assert df.groupby(["session_id", "window_start_ts"]).ngroups == windows, name
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from src.preprocess.config import PreprocessConfig
+from src.preprocess.normalizer import Normalizer, GLOBAL_SCOPE_KEY
+
+def _rows(n=5_000, seed=0):
+    rng = np.random.default_rng(seed)
+    source = rng.choice(["a", "b", "c"], n)
+    return pd.DataFrame({
+        "value_uv": (rng.normal(50, 10, n) + np.where(source == "b", 1000, 0)).astype(np.float32),
+        "source_id": pd.Categorical(source),
+        "hardware_id": pd.Categorical(np.where(source == "c", "h2", "h1")),
+    }), rng.random(n) < 0.7
+
+def test_chunked_fits_merge_to_the_single_pass_fit():
+    df, is_train = _rows()
+    config = PreprocessConfig()
+    whole = Normalizer(config)
+    whole.partial_fit(df, is_train)
+
+    merged = Normalizer(config)
+    for lo in range(0, len(df), 1_234):
+        part = Normalizer(config)
+        part.partial_fit(df.iloc[lo:lo + 1_234], is_train[lo:lo + 1_234])
+        merged.merge(part)
+
+    train = df["value_uv"].to_numpy(dtype=np.float64)[is_train]
+    n, mean, m2 = merged.moments[GLOBAL_SCOPE_KEY]
+    assert n == whole.moments[GLOBAL_SCOPE_KEY][0] == is_train.sum()
+    np.testing.assert_allclose([mean, np.sqrt(m2 / n)], [train.mean(), train.std()], rtol=1e-12)
+    np.testing.assert_allclose(merged.transform(df), (df["value_uv"] - train.mean()) / train.std(), rtol=1e-5)
+
+def test_scoped_statistics_fall_back_for_scopes_without_train_rows():
+    df, is_train = _rows()
+    is_train &= df["source_id"].to_numpy() != "c"
+    normalizer = Normalizer(PreprocessConfig(normalization_scope="source_id"))
+    normalizer.partial_fit(df, is_train)
+
+    stats = normalizer.to_dict()
+    assert stats["scope"] == "source_id" and sorted(stats["groups"]) == ["a", "b"]
+    values = df["value_uv"].to_numpy(dtype=np.float64)
+    b_train = values[is_train & (df["source_id"].to_numpy() == "b")]
+    assert np.isclose(stats["groups"]["b"]["mean"], b_train.mean())
+    assert np.isclose(stats["fallback"]["mean"], values[is_train].mean())
+
+    norm = normalizer.transform(df)
+    is_b = (df["source_id"] == "b").to_numpy()
+    is_c = (df["source_id"] == "c").to_numpy()
+    np.testing.assert_allclose(norm[is_b], (values[is_b] - b_train.mean()) / b_train.std(), rtol=1e-4)
+    fallback = stats["fallback"]
+    np.testing.assert_allclose(norm[is_c], (values[is_c] - fallback["mean"]) / fallback["std"], rtol=1e-4)
@@ -0,0 +1,165 @@
+import subprocess
+import sys
+import yaml
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from src.preprocess.catalog import build_window_catalog
+from src.preprocess.ingest import read_frame
+from src.preprocess.partitioned import PARTITION_DIR, WINDOW_INDEX_FILE, write_partitioned, read_windows
+from src.preprocess.streaming import write_parquet
+
+def _campaign(raw_dir):
+    rng = np.random.default_rng(3)
+    ts = pd.Timestamp("2026-01-01 12:00:00", tz="UTC")
+    t = np.arange(100) / 10.0
+    frames = []
+    for p in range(12):
+        for s in range(2):
+            for w in range(5):
+                start = ts + pd.Timedelta(hours=p, minutes=10 * s, seconds=10 * w)
+                n = 100 if (p + w) % 3 else 70
+                values = 100 + 20 * np.sin(2 * np.pi * 0.5 * t) + rng.normal(0, 0.5, 100)
+                frames.append(pd.DataFrame({
+                    "timestamp_utc": start + pd.to_timedelta(t[:n], unit="s"),
+                    "value": values[:n], "label": p % 2,
+                    "family_id": "f", "species_id": f"sp{p % 3}",
+                    # Session ids sort against plant order, so partitions must be re-sorted.
+                    "plant_id": f"p{p:02d}", "session_id": f"s{11 - p:02d}_{s}",
+                    "hardware_id": "h", "source_id": f"src{p % 2}",
+                    "window_start_ts": start,
+                    "window_end_ts": start + pd.Timedelta(seconds=10),
+                    "label_event_start_ts": ts + pd.Timedelta(days=5),
+                    "label_event_end_ts": ts + pd.Timedelta(days=5, seconds=5),
+                }))
+    order = rng.permutation(len(frames))
+    pd.concat([frames[i] for i in order], ignore_index=True).to_parquet(raw_dir / "input.parquet")
+
+def _run(tmp_path, name, *extra):
+    subprocess.run([
+        sys.executable, "-m", "src.preprocess.main", "--config", str(tmp_path / "preprocess.yaml"),
+        "--raw-dir", str(tmp_path / "raw"), "--partition-model-ready",
+        "--processed-dir", str(tmp_path / name / "processed"),
+        "--reports-dir", str(tmp_path / name / "reports"),
+    ] + list(extra), check=True, capture_output=True)
+    return tmp_path / name / "processed"
+
+def _setup(tmp_path):
+    (tmp_path / "raw").mkdir()
+    _campaign(tmp_path / "raw")
+    with open(tmp_path / "preprocess.yaml", "w") as f:
+        yaml.dump({"random_seed": 42, "max_rejection_rate_per_source": 1.0}, f)
+
+def test_partitions_are_sorted_and_indexed(tmp_path):
+    _setup(tmp_path)
+    processed = _run(tmp_path, "memory")
+    streamed = _run(tmp_path, "streaming", "--streaming", "--chunk-rows", "900")
+
+    files = sorted(p.relative_to(processed) for p in (processed / PARTITION_DIR).rglob("*.parquet"))
+    assert len(files) >= 4
+    assert files == sorted(p.relative_to(streamed) for p in (streamed / PARTITION_DIR).rglob("*.parquet"))
+    for rel in files + [WINDOW_INDEX_FILE]:
+        assert (processed / rel).read_bytes() == (streamed / rel).read_bytes(), rel
+
+    model = read_frame(processed / "dataset_model_ready.parquet")
+    catalog = build_window_catalog(model)
+    index = read_frame(processed / WINDOW_INDEX_FILE)
+    assert index["window_id"].tolist() == catalog["window_id"].tolist()
+    assert index["n_samples"].tolist() == catalog["n_samples"].tolist()
+    assert sorted(set(index["file"])) == [rel.as_posix() for rel in files]
+
+    for rel in files:
+        part = pq.read_table(processed / rel).to_pandas()
+        split, source = (piece.split("=")[1] for piece in rel.parts[1:3])
+        assert (part["source_id"] == source).all()
+        assert set(index.loc[index["file"] == rel.as_posix(), "split"]) == {split}
+        keys = list(zip(part["session_id"], part["window_start_ts"]))
+        assert keys == sorted(keys)
+
+    wanted = np.random.default_rng(0).choice(len(catalog), size=15, replace=False)
+    fetched = read_windows(processed, wanted)
+    expected = pd.concat([
+        model.iloc[row_offset:row_offset + n]
+        for row_offset, n in zip(catalog["row_offset"].to_numpy()[wanted], catalog["n_samples"].to_numpy()[wanted])
+    ], ignore_index=True)
+    for col in expected.columns:
+        assert fetched[col].astype(str).tolist() == expected[col].astype(str).tolist(), col
+
+def test_window_fetch_reads_only_needed_row_groups(tmp_path, monkeypatch):
+    _setup(tmp_path)
+    processed = _run(tmp_path, "memory")
+    model = read_frame(processed / "dataset_model_ready.parquet")
+    catalog = build_window_catalog(model).assign(
+        split=read_frame(processed / "split_manifest.parquet")["split"].to_numpy()
+    )
+    index = write_partitioned(processed / "dataset_model_ready.parquet", catalog, processed, row_group_rows=250)
+
+    for rel, windows in index.groupby("file"):
+        meta = pq.ParquetFile(processed / rel).metadata
+        group_rows = np.array([meta.row_group(i).num_rows for i in range(meta.num_row_groups)])
+        assert meta.num_row_groups > 1
+        assert (windows["row_offset"] + windows["n_samples"] <= group_rows[windows["row_group"]]).all()
+        assert (windows.groupby("row_group")["n_samples"].sum().to_numpy() == group_rows).all()
+
+    reads = []
+    read_row_group = pq.ParquetFile.read_row_group
+    def spy(self, i, *args, **kwargs):
+        reads.append(i)
+        return read_row_group(self, i, *args, **kwargs)
+    monkeypatch.setattr(pq.ParquetFile, "read_row_group", spy)
+
+    wanted = [7, 3, 50, 8, 3]
+    fetched = read_windows(processed, wanted, index=index)
+    assert len(fetched) == index.set_index("window_id").loc[wanted, "n_samples"].sum()
+    assert len(reads) == len(index.set_index("window_id").loc[wanted].groupby(["file", "row_group"]))
+
+def test_unsafe_source_ids_stay_inside_the_partition_tree(tmp_path):
+    _setup(tmp_path)
+    processed = _run(tmp_path, "memory")
+    model = read_frame(processed / "dataset_model_ready.parquet")
+    renamed = {"src0": "../../../escape", "src1": "a/b%2F"}
+    model["source_id"] = model["source_id"].astype(str).map(renamed)
+    write_parquet(model, processed / "dataset_model_ready.parquet")
+    catalog = build_window_catalog(model).assign(
+        split=read_frame(processed / "split_manifest.parquet")["split"].to_numpy()
+    )
+
+    index = write_partitioned(processed / "dataset_model_ready.parquet", catalog, processed)
+    assert set(index["source_id"]) == set(renamed.values())
+    root = (processed / PARTITION_DIR).resolve()
+    written = [p.resolve() for p in processed.parent.rglob("part-*.parquet")]
+    assert len(written) == index["file"].nunique() and all(root in p.parents for p in written)
+    fetched = read_windows(processed, index["window_id"].tolist()[:10], index=index)
+    assert set(fetched["source_id"]) <= set(renamed.values())
+
+def test_partition_write_holds_one_row_group(tmp_path):
+    # One (split, source) partition of 1M rows; the writer may hold one 1000-row
+    # group plus a read batch, never the partition.
+    script = f"""
+import numpy as np, pandas as pd, pyarrow as pa
+from pathlib import Path
+from src.preprocess.catalog import build_window_catalog
+from src.preprocess.partitioned import write_partitioned
+from src.preprocess.streaming import write_parquet
+n_windows, n = 10_000, 100
+starts = pd.Timestamp("2026-01-01", tz="UTC") + pd.to_timedelta(np.arange(n_windows) * 10, unit="s")
+df = pd.DataFrame({{
+    "source_id": "src", "plant_id": "p", "session_id": "s", "family_id": "f", "species_id": "sp",
+    "window_start_ts": np.repeat(starts, n), "window_end_ts": np.repeat(starts + pd.Timedelta(seconds=10), n),
+    "label_event_start_ts": starts[0], "label_event_end_ts": starts[0],
+    "timestamp_utc": np.repeat(starts, n) + pd.to_timedelta(np.tile(np.arange(n), n_windows) * 100, unit="ms"),
+    "value_norm": np.random.default_rng(0).normal(size=n_windows * n).astype(np.float32),
+}})
+out = Path({str(tmp_path)!r})
+write_parquet(df, out / "model.parquet")
+catalog = build_window_catalog(df).assign(split="train")
+size = pa.Table.from_pandas(df).nbytes
+del df
+pool = pa.default_memory_pool()
+before = pool.max_memory()
+write_partitioned(out / "model.parquet", catalog, out, row_group_rows=1000)
+print(size, pool.max_memory() - before)
+"""
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    size, peak = map(int, result.stdout.split())
+    assert peak < size / 4, (peak, size)
@@ -0,0 +1,92 @@
+import json
+import pstats
+import subprocess
+import sys
+import yaml
+import numpy as np
+import pandas as pd
+
+def _campaign(raw_dir):
+    rng = np.random.default_rng(3)
+    ts = pd.Timestamp("2026-01-01 12:00:00", tz="UTC")
+    t = np.arange(100) / 10.0
+    frames = []
+    for p in range(6):
+        for w in range(4):
+            start = ts + pd.Timedelta(hours=p, seconds=10 * w)
+            frames.append(pd.DataFrame({
+                "timestamp_utc": start + pd.to_timedelta(t, unit="s"),
+                "value": 100 + 20 * np.sin(2 * np.pi * 0.5 * t) + rng.normal(0, 0.5, 100), "label": w % 2,
+                "family_id": "f", "species_id": "s",
+                "plant_id": f"p{p}", "session_id": f"p{p}_s",
+                "hardware_id": "h", "source_id": f"src{p % 2}",
+                "window_start_ts": start,
+                "window_end_ts": start + pd.Timedelta(seconds=10),
+                "label_event_start_ts": ts + pd.Timedelta(days=5),
+                "label_event_end_ts": ts + pd.Timedelta(days=5, seconds=5),
+            }))
+    pd.concat(frames, ignore_index=True).to_parquet(raw_dir / "input.parquet")
+
+def _run(tmp_path, module, *extra):
+    subprocess.run([
+        sys.executable, "-m", module, "--config", str(tmp_path / "preprocess.yaml"),
+        "--processed-dir", str(tmp_path / "processed"), "--reports-dir", str(tmp_path / "reports"),
+    ] + list(extra), check=True, capture_output=True)
+    return json.loads((tmp_path / "reports/perf_report.json").read_text())
+
+def _setup(tmp_path):
+    (tmp_path / "raw").mkdir()
+    _campaign(tmp_path / "raw")
+    with open(tmp_path / "preprocess.yaml", "w") as f:
+        yaml.dump({"random_seed": 42, "max_rejection_rate_per_source": 1.0, "window_seconds": 10}, f)
+
+def test_perf_report_covers_each_stage_with_profiles(tmp_path):
+    _setup(tmp_path)
+    report = _run(tmp_path, "src.preprocess.main", "--raw-dir", str(tmp_path / "raw"), "--profile",
+                  "--export-tensors")
+
+    assert report["mode"] == "in_memory"
+    stages = {entry["stage"]: entry for entry in report["stages"]}
+    assert list(stages) == ["hash_inputs", "ingest", "clean", "split", "report", "write_clean",
+                            "normalize", "write_outputs", "export_tensors"]
+    for entry in stages.values():
+        assert entry["calls"] == 1
+        assert entry["wall_s"] >= 0 and entry["cpu_s"] >= 0
+        assert entry["peak_rss_bytes"] > 0
+    assert stages["ingest"]["rows"] == 2400 and stages["ingest"]["rows_per_s"] > 0
+    assert stages["clean"]["windows"] == 24 and stages["clean"]["windows_per_s"] > 0
+    assert stages["hash_inputs"]["rows"] is None and stages["hash_inputs"]["rows_per_s"] is None
+    assert report["max_rss_bytes"] >= max(entry["peak_rss_bytes"] for entry in stages.values())
+    assert all(entry["worker_cpu_s"] is None for entry in stages.values()) and report["max_worker_rss_bytes"] is None
+
+    for name in stages:
+        assert pstats.Stats(str(tmp_path / "reports/profiles" / f"{name}.prof")).total_calls > 0
+
+def test_streaming_and_reduce_accumulate_stage_calls(tmp_path):
+    _setup(tmp_path)
+    report = _run(tmp_path, "src.preprocess.main", "--raw-dir", str(tmp_path / "raw"),
+                  "--streaming", "--chunk-rows", "500")
+    stages = {entry["stage"]: entry for entry in report["stages"]}
+    assert report["mode"] == "streaming"
+    assert stages["clean"]["calls"] > 1 and stages["clean"]["rows"] == 2400
+    assert not (tmp_path / "reports/profiles").exists()
+
+    # Pool workers stay alive across chunks, so their usage must come from the workers themselves.
+    report = _run(tmp_path, "src.preprocess.main", "--raw-dir", str(tmp_path / "raw"),
+                  "--streaming", "--chunk-rows", "500", "--workers", "2")
+    stages = {entry["stage"]: entry for entry in report["stages"]}
+    assert stages["clean"]["worker_cpu_s"] > 0
+    assert report["max_worker_rss_bytes"] == stages["clean"]["worker_peak_rss_bytes"] > 10 * 2**20
+    assert stages["ingest"]["worker_cpu_s"] is None
+
+    for shard in range(2):
+        subprocess.run([
+            sys.executable, "-m", "src.preprocess.main", "--config", str(tmp_path / "preprocess.yaml"),
+            "--raw-dir", str(tmp_path / "raw"), "--shard", f"{shard}/2",
+            "--processed-dir", str(tmp_path / "processed"), "--reports-dir", str(tmp_path / "reports"),
+        ], check=True, capture_output=True)
+        shard_report = json.loads((tmp_path / f"reports/perf_report_shard-{shard:05d}-of-00002.json").read_text())
+        assert shard_report["mode"] == "shard"
+    report = _run(tmp_path, "src.preprocess.reduce")
+    assert report["mode"] == "reduce"
+    assert {entry["stage"] for entry in report["stages"]} >= {"split", "normalize", "write_outputs"}
@@ -0,0 +1,109 @@
+import json
+import subprocess
+import sys
+import yaml
+import numpy as np
+import pandas as pd
+
+def _frame(source, n_windows, seed):
+    rng = np.random.default_rng(seed)
+    ts = pd.Timestamp("2026-01-01 12:00:00", tz="UTC")
+    t = np.arange(100) / 10.0
+    frames = []
+    for w in range(n_windows):
+        start = ts + pd.Timedelta(seconds=10 * w)
+        frames.append(pd.DataFrame({
+            "timestamp_utc": start + pd.to_timedelta(t, unit="s"),
+            "value": 100 + 20 * np.sin(2 * np.pi * 0.5 * t) + rng.normal(0, 0.5, 100), "label": w % 2,
+            "family_id": "f", "species_id": "s",
+            "plant_id": f"{source}_p{w % 3}", "session_id": f"{source}_p{w % 3}_s",
+            "hardware_id": "h", "source_id": source,
+            "window_start_ts": start,
+            "window_end_ts": start + pd.Timedelta(seconds=10),
+            "label_event_start_ts": ts + pd.Timedelta(days=5),
+            "label_event_end_ts": ts + pd.Timedelta(days=5, seconds=5),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def _preflight(tmp_path, **config):
+    config_path = tmp_path / "preprocess.yaml"
+    with open(config_path, "w") as f:
+        yaml.dump({"random_seed": 42, **config}, f)
+    result = subprocess.run([
+        sys.executable, "-m", "src.preprocess.main", "--config", str(config_path), "--preflight",
+        "--raw-dir", str(tmp_path / "raw"), "--processed-dir", str(tmp_path / "processed"),
+        "--reports-dir", str(tmp_path / "reports"),
+    ], capture_output=True, text=True)
+    return result, json.loads((tmp_path / "reports/preflight_report.json").read_text())
+
+def test_preflight_summarizes_footers_and_csv_sample(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    a = _frame("a", 8, 0)
+    a.loc[5, "value"] = np.nan
+    a.loc[[7, 8], "label"] = np.nan
+    a.to_parquet(raw / "a.parquet", row_group_size=300)
+    b = _frame("b", 4, 1)
+    b.loc[10, "value"] = 10000.0
+    b.to_parquet(raw / "b.parquet")
+    mixed = pd.concat([_frame("c", 2, 2), _frame("d", 2, 3)], ignore_index=True)
+    mixed.to_parquet(raw / "mixed.parquet")
+    _frame("e", 3, 4).to_csv(raw / "e.csv", index=False, date_format="%Y-%m-%d %H:%M:%S.%f%z")
+
+    result, report = _preflight(tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert report["status"] == "PASS" and report["errors"] == []
+    assert report["total_rows"] == 1900
+    assert report["rows_exact"] is True
+    assert report["rows_by_source"] == {"__unattributed__": 400, "a": 800, "b": 400, "e": 300}
+
+    files = {summary["file"]: summary for summary in report["files"]}
+    assert files["a.parquet"]["row_groups"] == 3
+    assert files["a.parquet"]["null_counts"]["value"] == 1
+    assert files["a.parquet"]["null_counts"]["label"] == 2
+    assert files["b.parquet"]["rail_sources"] == ["b"]
+    assert files["b.parquet"]["value_max"] == 10000.0
+    assert files["e.csv"]["rows"] == 300 and files["e.csv"]["rows_exact"] is True
+    assert files["e.csv"]["rows_by_source"] == {"e": 300}
+    assert any("b.parquet" in w and "rails" in w for w in report["warnings"])
+    assert any("a.parquet" in w and "null" in w for w in report["warnings"])
+    assert not (tmp_path / "processed/dataset_clean.parquet").exists()
+
+def test_preflight_rejects_schema_problems(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    _frame("a", 2, 0).drop(columns=["label"]).to_parquet(raw / "a.parquet")
+    _frame("b", 2, 1).drop(columns=["window_start_ts", "window_end_ts"]).to_parquet(raw / "b.parquet")
+    _frame("c", 2, 2).assign(value="high").to_parquet(raw / "c.parquet")
+
+    result, report = _preflight(tmp_path)
+    assert result.returncode == 1
+    assert report["status"] == "FAIL"
+    assert any(e.startswith("a.parquet: missing required columns ['label']") for e in report["errors"])
+    assert any(e.startswith("c.parquet: value has non-numeric type") for e in report["errors"])
+    assert any("others do not" in e for e in report["errors"])
+    assert "PREFLIGHT FAILURE" in result.stderr
+
+def test_preflight_checks_rails_on_scaled_values(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    # Around 100 raw, a at 100x and e at 200x go past the 10000 µV rail; b and f reach 10000 raw but are halved.
+    _frame("a", 2, 0).to_parquet(raw / "a.parquet")
+    b = _frame("b", 2, 1)
+    b.loc[10, "value"] = 10000.0
+    b.to_parquet(raw / "b.parquet")
+    unattributed = pd.concat([_frame("c", 1, 2), _frame("d", 1, 3)], ignore_index=True)
+    unattributed.to_parquet(raw / "cd.parquet")
+    csv = pd.concat([_frame("e", 1, 4), _frame("f", 1, 5)], ignore_index=True)
+    csv.loc[150, "value"] = 10000.0
+    csv.to_csv(raw / "ef.csv", index=False, date_format="%Y-%m-%d %H:%M:%S.%f%z")
+
+    result, report = _preflight(tmp_path, source_scaling={"a": 100.0, "b": 0.5, "e": 200.0, "f": 0.5})
+    assert result.returncode == 0, result.stderr
+    files = {summary["file"]: summary for summary in report["files"]}
+    assert files["a.parquet"]["rail_sources"] == ["a"]
+    assert files["b.parquet"]["rail_sources"] == []
+    assert files["b.parquet"]["value_max"] == 10000.0
+    # Rows of a row group holding several sources could belong to any scaled source.
+    assert files["cd.parquet"]["rail_sources"] == ["__unattributed__"]
+    assert files["ef.csv"]["rail_sources"] == ["e"]
@@ -0,0 +1,67 @@
+import json
+import numpy as np
+import pandas as pd
+from src.preprocess.config import PreprocessConfig
+from src.preprocess.cleaner import DataCleaner
+from src.preprocess.catalog import build_window_catalog
+from src.preprocess.reporter import DataReporter
+from src.preprocess.quality_stats import QualityStats
+
+def _windows(seed=0):
+    rng = np.random.default_rng(seed)
+    ts = pd.Timestamp("2026-01-01 12:00:00", tz="UTC")
+    t = np.arange(100) / 10.0
+    frames = []
+    for w in range(40):
+        start = ts + pd.Timedelta(seconds=10 * w)
+        if w % 4 == 0:
+            values = np.full(100, 100.0)
+        else:
+            values = 100 + 20 * np.sin(2 * np.pi * 0.5 * t) + rng.normal(0, 0.5, 100)
+        n = 100 if w % 3 else 50
+        frames.append(pd.DataFrame({
+            "timestamp_utc": start + pd.to_timedelta(t[:n], unit="s"),
+            "value": values[:n], "label": w % 2,
+            "family_id": "f", "species_id": f"sp{w % 3}",
+            "plant_id": f"p{w % 5}", "session_id": f"p{w % 5}_s",
+            "hardware_id": "h", "source_id": "a" if w < 10 else "b",
+            "window_start_ts": start,
+            "window_end_ts": start + pd.Timedelta(seconds=10),
+            "label_event_start_ts": ts + pd.Timedelta(days=5),
+            "label_event_end_ts": ts + pd.Timedelta(days=5, seconds=5),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def test_rejection_rates_use_per_source_window_totals():
+    df = _windows()
+    cleaner = DataCleaner(PreprocessConfig())
+    df_clean, _, meta = cleaner.run(df.copy())
+
+    quality = cleaner.quality
+    assert quality.windows_by_source == {"a": 10, "b": 30}
+    assert quality.rejected_by_source == {"a": 3, "b": 7}
+    assert sum(quality.clean_rows_by_source.values()) == len(df_clean)
+
+    catalog = build_window_catalog(df_clean).assign(split="train")
+    report = DataReporter(PreprocessConfig()).generate_report(quality, df_clean.columns, catalog, meta)
+    assert report["total_windows_processed"] == 40
+    assert report["rejection_rate_per_source"] == {"a": 0.3, "b": 7 / 30}
+    balance = df_clean.groupby(["family_id", "species_id", "label"], observed=True).size()
+    assert report["class_balance_by_family_species"] == {str(k): int(v) for k, v in balance.items()}
+
+def test_merged_chunks_render_the_single_pass_report():
+    df = _windows()
+    config = PreprocessConfig()
+    whole = DataCleaner(config)
+    df_clean, _, meta = whole.run(df.copy())
+
+    merged = QualityStats()
+    for starts in reversed(np.array_split(df["window_start_ts"].unique(), 4)):
+        part = DataCleaner(config)
+        part.run(df[df["window_start_ts"].isin(starts)].reset_index(drop=True))
+        merged.merge(QualityStats.from_dict(json.loads(json.dumps(part.stats))))
+
+    catalog = build_window_catalog(df_clean).assign(split="train")
+    reporter = DataReporter(config)
+    expected = reporter.generate_report(whole.quality, df_clean.columns, catalog, meta)
+    assert json.dumps(reporter.generate_report(merged, df_clean.columns, catalog, meta)) == json.dumps(expected)
@@ -0,0 +1,87 @@
+import subprocess
+import sys
+import yaml
+import numpy as np
+import pandas as pd
+from src.preprocess.shards import plant_shard
+
+def _campaign(raw_dir):
+    rng = np.random.default_rng(11)
+    ts = pd.Timestamp("2026-01-01 12:00:00", tz="UTC")
+    t = np.arange(100) / 10.0
+    frames = []
+    for p in range(10):
+        for s in range(2):
+            for w in range(4):
+                start = ts + pd.Timedelta(hours=p, minutes=10 * s, seconds=10 * w)
+                values = 100 + 20 * np.sin(2 * np.pi * 0.5 * t) + rng.normal(0, 0.5, 100)
+                if (p + w) % 5 == 0:
+                    values = np.full(100, 100.0)
+                frames.append(pd.DataFrame({
+                    "timestamp_utc": start + pd.to_timedelta(t, unit="s"),
+                    "value": values, "label": p % 2,
+                    "family_id": "f", "species_id": f"sp{p % 3}",
+                    "plant_id": f"p{p:02d}", "session_id": f"p{p:02d}_s{s}",
+                    "hardware_id": "h", "source_id": f"src{p % 3}",
+                    "window_start_ts": start,
+                    "window_end_ts": start + pd.Timedelta(seconds=10),
+                    "label_event_start_ts": ts + pd.Timedelta(days=5),
+                    "label_event_end_ts": ts + pd.Timedelta(days=5, seconds=5),
+                }))
+    order = rng.permutation(len(frames))
+    df = pd.concat([frames[i] for i in order], ignore_index=True)
+    df.loc[df.index[:7], "value"] = np.nan
+    df.iloc[: len(df) // 2].to_parquet(raw_dir / "a.parquet")
+    df.iloc[len(df) // 2:].to_parquet(raw_dir / "b.parquet")
+
+def _main(config_path, module, *extra):
+    subprocess.run([sys.executable, "-m", module, "--config", str(config_path)] + list(extra),
+                   check=True, capture_output=True)
+
+def test_shards_reduce_to_single_process_run(tmp_path):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    _campaign(raw_dir)
+    config_path = tmp_path / "preprocess.yaml"
+    with open(config_path, "w") as f:
+        yaml.dump({"random_seed": 42, "max_rejection_rate_per_source": 1.0}, f)
+
+    single = tmp_path / "single"
+    _main(config_path, "src.preprocess.main", "--raw-dir", str(raw_dir),
+          "--processed-dir", str(single / "processed"), "--reports-dir", str(single / "reports"))
+
+    sharded = tmp_path / "sharded"
+    for i in range(3):
+        _main(config_path, "src.preprocess.main", "--raw-dir", str(raw_dir), "--shard", f"{i}/3",
+              "--processed-dir", str(sharded / "processed"), "--reports-dir", str(sharded / "reports"))
+    _main(config_path, "src.preprocess.reduce",
+          "--processed-dir", str(sharded / "processed"), "--reports-dir", str(sharded / "reports"))
+
+    for name in ["processed/dataset_clean.parquet", "processed/dataset_model_ready.parquet",
+                 "processed/rejection_log.parquet", "processed/split_manifest.parquet",
+                 "processed/window_metrics.parquet",
+                 "processed/normalization_stats.json", "processed/data_fingerprint.json",
+                 "reports/data_quality_report.json", "reports/unit_conversion_report.json"]:
+        assert (single / name).read_bytes() == (sharded / name).read_bytes(), name
+
+def test_reduce_refuses_incomplete_shard_sets(tmp_path):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    _campaign(raw_dir)
+    config_path = tmp_path / "preprocess.yaml"
+    with open(config_path, "w") as f:
+        yaml.dump({"random_seed": 42, "max_rejection_rate_per_source": 1.0}, f)
+    _main(config_path, "src.preprocess.main", "--raw-dir", str(raw_dir), "--shard", "1/3",
+          "--processed-dir", str(tmp_path / "processed"), "--reports-dir", str(tmp_path / "reports"))
+
+    result = subprocess.run([sys.executable, "-m", "src.preprocess.reduce", "--config", str(config_path),
+                             "--processed-dir", str(tmp_path / "processed"),
+                             "--reports-dir", str(tmp_path / "reports")], capture_output=True, text=True)
+    assert result.returncode == 1
+    assert "Expected exactly shards 0..2 of 3" in result.stderr
+
+def test_plant_shards_are_stable_and_cover_all_shards():
+    plants = pd.Series([f"plant_{i}" for i in range(200)] + [None])
+    shards = plant_shard(plants, 4)
+    assert set(shards[:-1]) == {0, 1, 2, 3} and shards[-1] == 0
+    assert (plant_shard(plants.astype("category"), 4) == shards).all()
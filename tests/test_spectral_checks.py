@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pydantic import ValidationError
+from src.preprocess.config import PreprocessConfig
+from src.preprocess.cleaner import DataCleaner
+from src.preprocess.sweep import THRESHOLDS, sweep_thresholds
+
+FS = 250
+
+def _windows(kinds, seed=0):
+    rng = np.random.default_rng(seed)
+    ts = pd.Timestamp("2026-01-01 12:00:00", tz="UTC")
+    t = np.arange(2 * FS) / FS
+    base = lambda: 100 + 20 * np.sin(2 * np.pi * 1.0 * t) + rng.normal(0, 0.5, len(t))
+    signals = {
+        "clean": base,
+        "line": lambda: base() + 10 * np.sin(2 * np.pi * 50.0 * t),
+        "band": lambda: base() + 10 * np.sin(2 * np.pi * 20.0 * t),
+        "spike": lambda: base() + np.where(np.isin(np.arange(len(t)), [140, 380]), 100.0, 0.0),
+    }
+    frames = []
+    for w, kind in enumerate(kinds):
+        start = ts + pd.Timedelta(seconds=2 * w)
+        frames.append(pd.DataFrame({
+            "timestamp_utc": start + pd.to_timedelta(t, unit="s"),
+            "value": signals[kind](), "label": w % 2,
+            "family_id": "f", "species_id": "s",
+            "plant_id": f"p{w % 3}", "session_id": f"p{w % 3}_s",
+            "hardware_id": "h", "source_id": f"src{w % 2}",
+            "window_start_ts": start,
+            "window_end_ts": start + pd.Timedelta(seconds=2),
+            "label_event_start_ts": ts + pd.Timedelta(days=5),
+            "label_event_end_ts": ts + pd.Timedelta(days=5, seconds=5),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def _config(**overrides):
+    return PreprocessConfig(target_hz=FS, window_seconds=2, stride_seconds=2,
+                            drift_slope_max_uv_per_s=1000.0, **overrides)
+
+def test_batched_spectral_checks_match_per_window_reference():
+    df = _windows(["clean", "line", "band", "clean", "line", "band", "clean", "spike"] * 2)
+    config = _config(line_noise_ratio_max=0.1, out_of_band_ratio_max=0.1, spike_count_max=10)
+
+    batch = DataCleaner(config)
+    clean_b, rejected_b, _ = batch.run(df.copy())
+    reference = DataCleaner(config)
+    clean_r, rejected_r, _ = reference._run_per_group(df.copy())
+
+    assert batch.stats == reference.stats
+    assert batch.stats["reasons"] == {"line_noise": 4, "out_of_band": 6}
+    pd.testing.assert_frame_equal(clean_b, clean_r)
+    pd.testing.assert_frame_equal(rejected_b, rejected_r)
+
+    metrics = batch.pop_window_metrics()
+    assert metrics["line_noise_ratio"].notna().all() and metrics["spike_count"].notna().all()
+
+def test_spike_count_uses_median_absolute_deviation():
+    df = _windows(["clean", "spike", "clean", "spike"])
+    cleaner = DataCleaner(_config(spike_count_max=1, spike_mad_k=3.0))
+    _, rejection_log, _ = cleaner.run(df.copy())
+    assert rejection_log["rejection_reason"].tolist() == ["spike", "spike"]
+
+    disabled = DataCleaner(_config())
+    disabled.run(df.copy())
+    assert disabled.stats["reasons"] == {}
+    assert disabled.pop_window_metrics()[["line_noise_ratio", "out_of_band_ratio", "spike_count"]].isna().all().all()
+
+def test_continuous_sessions_get_spectral_checks():
+    df = _windows(["clean", "clean", "line", "line"]).drop(columns=["window_start_ts", "window_end_ts"])
+    df["plant_id"], df["session_id"], df["source_id"] = "p", "p_s", "src"
+    cleaner = DataCleaner(_config(line_noise_ratio_max=0.1))
+    _, rejection_log, _ = cleaner.run(df.copy())
+    assert cleaner.stats["reasons"]["line_noise"] >= 2
+    assert set(rejection_log["rejection_reason"]) == {"line_noise"}
+
+def test_line_noise_check_needs_line_frequency_below_nyquist():
+    with pytest.raises(ValidationError):
+        PreprocessConfig(line_noise_ratio_max=0.1)
+    with pytest.raises(ValidationError):
+        PreprocessConfig(spike_window=3)
+    with pytest.raises(ValidationError):
+        _config(signal_band_min_hz=5.0, signal_band_max_hz=1.0)
+
+def test_sweep_replays_spectral_rejections():
+    df = _windows(["clean", "line", "band", "spike"] * 3)
+    config = _config(line_noise_ratio_max=0.1, out_of_band_ratio_max=0.1, spike_count_max=10)
+    cleaner = DataCleaner(config)
+    cleaner.run(df.copy())
+
+    grid = {name: [getattr(config, name)] for name in THRESHOLDS}
+    grid["out_of_band_ratio_max"] = [0.1, None]
+    enabled, disabled = sweep_thresholds(cleaner.pop_window_metrics(), grid, 1.0)
+    assert enabled["rejection_reason_dist"] == cleaner.stats["reasons"] == {"line_noise": 3, "out_of_band": 6}
+    assert disabled["thresholds"]["out_of_band_ratio_max"] is None
+    assert disabled["rejection_reason_dist"] == {"line_noise": 3}
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.preprocess.config import PreprocessConfig
+from src.preprocess.splitter import DataSplitter
+
+def _manifest_rows(n_plants=300, seed=0):
+    rng = np.random.default_rng(seed)
+    plants = [f"plant_{i}" for i in range(n_plants)]
+    rows = []
+    for i, plant in enumerate(plants):
+        for w in range(int(rng.integers(1, 4))):
+            rows.append({
+                "family_id": f"fam_{i % 7}", "species_id": f"sp_{i % 11}", "plant_id": plant,
+                "source_id": "src", "session_id": f"{plant}_s{w % 2}",
+                "window_start_ts": pd.Timestamp("2026-01-01", tz="UTC") + pd.Timedelta(minutes=w),
+                "window_end_ts": pd.Timestamp("2026-01-01", tz="UTC") + pd.Timedelta(minutes=w + 1),
+            })
+    df = pd.DataFrame(rows).sample(frac=1.0, random_state=seed).reset_index(drop=True)
+    for col in ["family_id", "species_id", "plant_id", "source_id", "session_id"]:
+        df[col] = df[col].astype("category")
+    return df
+
+@pytest.mark.parametrize("seed", [0, 42, 1234])
+def test_batched_assignment_matches_per_entity_hash(seed):
+    df = _manifest_rows(seed=seed)
+    splitter = DataSplitter(PreprocessConfig(random_seed=seed))
+    manifest = splitter.split_data(df)
+
+    expected = [
+        splitter._get_split_group(f, s, p)
+        for f, s, p in zip(df["family_id"], df["species_id"], df["plant_id"])
+    ]
+    assert manifest["split"].tolist() == expected
+    assert set(expected) == {"train", "val", "test"}
+
+def test_plant_under_several_entities_takes_last_entity_split():
+    df = _manifest_rows(n_plants=40)
+    df["family_id"] = df["family_id"].astype(object)
+    df.loc[df["plant_id"] == "plant_3", "family_id"] = ["fam_a", "fam_b", "fam_c"][:int((df["plant_id"] == "plant_3").sum())]
+    splitter = DataSplitter(PreprocessConfig())
+
+    entities = df[["family_id", "species_id", "plant_id"]].drop_duplicates()
+    plant_splits = {}
+    for _, row in entities.iterrows():
+        plant_splits[row["plant_id"]] = splitter._get_split_group(row["family_id"], row["species_id"], row["plant_id"])
+    assert splitter.split_data(df)["split"].tolist() == df["plant_id"].map(plant_splits).tolist()
+
+def test_disjointness_check_flags_shared_sessions_and_plants():
+    splitter = DataSplitter(PreprocessConfig())
+    manifest = splitter.split_data(_manifest_rows())
+    splitter.check_disjoint(manifest)
+
+    leaked = manifest.copy()
+    leaked["split"] = leaked["split"].astype(object)
+    train = leaked[leaked["split"] == "train"]
+    victim = train.index[train["session_id"].duplicated()][0]
+    leaked.loc[victim, "split"] = "test"
+    with pytest.raises(AssertionError, match="Session Leakage detected between train and test"):
+        splitter.check_disjoint(leaked)
+
+    shared_plant = leaked.copy()
+    shared_plant["session_id"] = np.arange(len(shared_plant)).astype(str)
+    with pytest.raises(AssertionError, match="Plant Leakage detected between train and test"):
+        splitter.check_disjoint(shared_plant)
@@ -0,0 +1,134 @@
+import subprocess
+import hashlib
+import sys
+import yaml
+import numpy as np
+import pandas as pd
+from src.preprocess import streaming
+from src.preprocess.streaming import ParquetSink, write_parquet, scan_sessions, plan_chunks, spill_chunks, read_chunk
+
+def _window(rng, start, plant, session, source, kind="clean"):
+    t = np.arange(100) / 10.0
+    values = 100 + 20 * np.sin(2 * np.pi * 0.05 * t) + rng.normal(0, 0.5, 100)
+    if kind == "flatline":
+        values = np.full(100, 100.0)
+    return pd.DataFrame({
+        "timestamp_utc": start + pd.to_timedelta(t, unit="s"),
+        "value": values,
+        "label": 1,
+        "family_id": "f", "species_id": "s",
+        "plant_id": plant, "session_id": session,
+        "hardware_id": "h", "source_id": source,
+        "window_start_ts": start,
+        "window_end_ts": start + pd.Timedelta(seconds=10),
+        "label_event_start_ts": start + pd.Timedelta(seconds=2),
+        "label_event_end_ts": start + pd.Timedelta(seconds=4),
+    })
+
+def _write_raw(raw_dir):
+    rng = np.random.default_rng(7)
+    ts = pd.Timestamp("2026-01-01 12:00:00.05", tz="UTC")
+    files = {"a.parquet": [], "b.parquet": [], "c.csv": []}
+    names = list(files)
+    for i in range(24):
+        plant = f"p{i % 6}"
+        session = f"{plant}_s{i % 2}"
+        source = "src_a" if i % 3 else "src_b"
+        kind = "flatline" if i % 7 == 0 else "clean"
+        start = ts + pd.Timedelta(seconds=10 * i)
+        files[names[i % 3]].append(_window(rng, start, plant, session, source, kind))
+    for name, frames in files.items():
+        df = pd.concat(frames, ignore_index=True)
+        df.loc[5, "value"] = np.nan
+        if name.endswith(".csv"):
+            df.to_csv(raw_dir / name, index=False)
+        else:
+            df.to_parquet(raw_dir / name)
+
+def _run(tmp_path, raw_dir, name, extra):
+    processed_dir = tmp_path / name / "processed"
+    config_path = tmp_path / "preprocess.yaml"
+    with open(config_path, "w") as f:
+        yaml.dump({"random_seed": 42}, f)
+    subprocess.check_call([
+        sys.executable, "-m", "src.preprocess.main",
+        "--config", str(config_path),
+        "--raw-dir", str(raw_dir),
+        "--processed-dir", str(processed_dir),
+        "--reports-dir", str(tmp_path / name / "reports"),
+    ] + extra)
+    return processed_dir
+
+def test_streaming_outputs_byte_identical(tmp_path):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    _write_raw(raw_dir)
+
+    in_memory = _run(tmp_path, raw_dir, "memory", [])
+    streaming = _run(tmp_path, raw_dir, "stream", ["--streaming", "--chunk-rows", "250"])
+
+    for name in ["dataset_clean.parquet", "rejection_log.parquet", "split_manifest.parquet",
+                 "window_metrics.parquet", "dataset_model_ready.parquet", "normalization_stats.json"]:
+        h1 = hashlib.sha256((in_memory / name).read_bytes()).hexdigest()
+        h2 = hashlib.sha256((streaming / name).read_bytes()).hexdigest()
+        assert h1 == h2, name
+
+    clean = pd.read_parquet(streaming / "dataset_clean.parquet")
+    model_ready = pd.read_parquet(streaming / "dataset_model_ready.parquet")
+    assert len(model_ready) == len(clean)
+    assert np.isfinite(model_ready["value_norm"]).all()
+
+    report_m = yaml.safe_load((tmp_path / "memory/reports/data_quality_report.json").read_text())
+    report_s = yaml.safe_load((tmp_path / "stream/reports/data_quality_report.json").read_text())
+    for key in ["total_windows_processed", "rejected_windows_count", "rejection_reason_dist",
+                "rejection_rate_per_source", "dropped_null_rows", "class_balance_by_family_species"]:
+        assert report_m[key] == report_s[key], key
+    assert report_m["leakage_checks"]["status"] == report_s["leakage_checks"]["status"]
+
+def test_parquet_sink_matches_single_write(tmp_path):
+    df = pd.DataFrame({
+        "session_id": pd.Categorical([f"s{i // 10}" for i in range(50)]),
+        "value_uv": np.arange(50, dtype=np.float32),
+    })
+    write_parquet(df, tmp_path / "single.parquet", row_group_rows=7)
+
+    sink = ParquetSink(tmp_path / "sink.parquet", row_group_rows=7)
+    for start in range(0, 50, 11):
+        # Chunks carry their own category sets, as separately read chunks do.
+        part = df.iloc[start:start + 11].reset_index(drop=True)
+        sink.write(part.assign(session_id=part["session_id"].cat.remove_unused_categories()))
+    sink.close(df.iloc[:0])
+
+    assert (tmp_path / "single.parquet").read_bytes() == (tmp_path / "sink.parquet").read_bytes()
+
+def test_spill_reads_each_input_once_per_chunk_group(tmp_path, monkeypatch):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    _write_raw(raw_dir)
+    input_files = sorted(raw_dir.iterdir())
+    session_index, _ = scan_sessions(input_files)
+    chunks = plan_chunks(session_index, 250)
+    assert len(chunks) > 3
+
+    reads = []
+    iter_frames = streaming.iter_frames
+    monkeypatch.setattr(streaming, "iter_frames", lambda path, **kw: reads.append(path.name) or iter_frames(path, **kw))
+    spill_dir = tmp_path / "spill"
+    spill_dir.mkdir()
+    spills, dropped = spill_chunks(input_files, chunks, spill_dir)
+    assert sorted(reads) == ["a.parquet", "b.parquet", "c.csv"]
+    assert sum(dropped) == 3
+
+    frames = [read_chunk(paths) for paths in spills]
+    assert sum(len(f) for f in frames) + sum(dropped) == session_index["rows"].sum()
+    for chunk, frame in zip(chunks, frames):
+        keys = set(map(tuple, frame[streaming.SESSION_KEYS].astype(str).to_numpy()))
+        assert keys == set(map(tuple, chunk[streaming.SESSION_KEYS].astype(str).drop_duplicates().to_numpy()))
+        assert not frame.isna().any().any()
+
+    reads.clear()
+    monkeypatch.setattr(streaming, "MAX_OPEN_SPILLS", 2)
+    other = tmp_path / "other"
+    other.mkdir()
+    spill_chunks(input_files, chunks, other)
+    assert len(reads) <= 3 * -(-len(chunks) // 2)
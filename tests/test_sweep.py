@@ -0,0 +1,74 @@
+import json
+import subprocess
+import sys
+import yaml
+import numpy as np
+import pandas as pd
+
+def _write_raw(raw_dir):
+    rng = np.random.default_rng(5)
+    ts = pd.Timestamp("2026-01-01 12:00:00", tz="UTC")
+    t = np.arange(100) / 10.0
+    smooth = 100 + 20 * np.sin(2 * np.pi * 0.5 * t)
+    kinds = [
+        lambda: smooth + rng.normal(0, 0.5, 100),
+        lambda: np.full(100, 100.0),
+        lambda: smooth + 30 * t,
+        lambda: 100 + rng.normal(0, 5.0, 100),
+        lambda: np.where((t >= 4.5) & (t < 5.5), 10000.0, smooth),
+    ]
+    frames = []
+    for w in range(60):
+        start = ts + pd.Timedelta(seconds=10 * w)
+        kind = 0 if w % 3 else w % len(kinds)
+        frames.append(pd.DataFrame({
+            "timestamp_utc": start + pd.to_timedelta(t, unit="s"),
+            "value": kinds[kind](), "label": w % 2,
+            "family_id": "f", "species_id": "s",
+            "plant_id": f"p{w % 6}", "session_id": f"p{w % 6}_s",
+            "hardware_id": "h", "source_id": f"src{w % 2}",
+            "window_start_ts": start,
+            "window_end_ts": start + pd.Timedelta(seconds=10),
+            "label_event_start_ts": ts + pd.Timedelta(days=5),
+            "label_event_end_ts": ts + pd.Timedelta(days=5, seconds=5),
+        }))
+    pd.concat(frames, ignore_index=True).to_parquet(raw_dir / "input.parquet")
+
+def _pipeline(tmp_path, name, overrides):
+    config_path = tmp_path / f"{name}.yaml"
+    with open(config_path, "w") as f:
+        yaml.dump({"random_seed": 42, "max_rejection_rate_per_source": 1.0, **overrides}, f)
+    subprocess.run([
+        sys.executable, "-m", "src.preprocess.main", "--config", str(config_path),
+        "--raw-dir", str(tmp_path / "raw"),
+        "--processed-dir", str(tmp_path / name / "processed"),
+        "--reports-dir", str(tmp_path / name / "reports"),
+    ], check=True, capture_output=True)
+    report = json.loads((tmp_path / name / "reports/data_quality_report.json").read_text())
+    return config_path, report
+
+def test_sweep_points_match_full_runs(tmp_path):
+    (tmp_path / "raw").mkdir()
+    _write_raw(tmp_path / "raw")
+    config_path, base = _pipeline(tmp_path, "base", {})
+    _, relaxed = _pipeline(tmp_path, "relaxed", {"snr_db_min": -10.0, "drift_slope_max_uv_per_s": 50.0})
+
+    subprocess.run([
+        sys.executable, "-m", "src.preprocess.sweep", "--config", str(config_path),
+        "--processed-dir", str(tmp_path / "base/processed"),
+        "--reports-dir", str(tmp_path / "sweep"),
+        "--snr-db-min=-10,3", "--drift-slope-max-uv-per-s", "10,50", "--clip-fraction-max", "0.01,0.5",
+    ], check=True, capture_output=True)
+    sweep = json.loads((tmp_path / "sweep/threshold_sweep.json").read_text())
+    assert sweep["windows"] == base["total_windows_processed"] == 60
+    assert len(sweep["points"]) == 8
+
+    points = {(p["thresholds"]["snr_db_min"], p["thresholds"]["drift_slope_max_uv_per_s"],
+               p["thresholds"]["clip_fraction_max"]): p for p in sweep["points"]}
+    for key, report in [((3.0, 10.0, 0.01), base), ((-10.0, 50.0, 0.01), relaxed)]:
+        point = points[key]
+        assert point["rejected_windows_count"] == report["rejected_windows_count"]
+        assert point["rejection_reason_dist"] == report["rejection_reason_dist"]
+        assert point["rejection_rate_per_source"] == report["rejection_rate_per_source"]
+    assert set(base["rejection_reason_dist"]) == {"flatline", "drift", "snr", "clip"}
+    assert "clip" not in points[(3.0, 10.0, 0.5)]["rejection_reason_dist"]
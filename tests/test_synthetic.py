@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pydantic import ValidationError
+from src.preprocess.config import PreprocessConfig
+from src.preprocess.cleaner import DataCleaner
+from src.preprocess.catalog import build_window_catalog
+from src.preprocess.splitter import DataSplitter
+from src.preprocess.reporter import DataReporter
+from src.preprocess.ingest import read_frame
+from src.preprocess.main import prepare_frame
+from src.preprocess.synthetic import CampaignSpec, generate_campaign, inject_split_leakage, write_campaign
+
+def _spec(**overrides):
+    return CampaignSpec(n_plants=12, sessions_per_plant=2, windows_per_session=5, **overrides)
+
+def test_injected_faults_fail_their_own_checks():
+    config = PreprocessConfig(window_seconds=20, stride_seconds=5)
+    spec = _spec(flatline_fraction=0.1, drift_fraction=0.05, low_snr_fraction=0.1, clip_fraction=0.05, seed=3)
+    rows, windows = generate_campaign(spec, config)
+    again, _ = generate_campaign(spec, config)
+    pd.testing.assert_frame_equal(rows, again)
+
+    assert len(windows) == 120 and len(rows) == 120 * 200
+    assert windows["fault"].value_counts().to_dict() == {"": 84, "flatline": 12, "snr": 12, "drift": 6, "clip": 6}
+    assert rows.groupby("plant_id", observed=True)["species_id"].nunique().max() == 1
+    assert rows.groupby("species_id", observed=True)["family_id"].nunique().max() == 1
+
+    # Consecutive windows overlap by window_seconds - stride_seconds and share those timestamps.
+    first = rows[rows["session_id"] == "plant00000_s00"]
+    starts = first["window_start_ts"].drop_duplicates()
+    assert (starts.diff().dropna() == pd.Timedelta(seconds=5)).all()
+    assert first["timestamp_utc"].nunique() == (4 * 5 + 20) * 10
+
+    cleaner = DataCleaner(config)
+    _, rejection_log, _ = cleaner.run(prepare_frame(rows))
+    faulty = windows[windows["fault"] != ""]
+    assert cleaner.stats["reasons"] == faulty["fault"].value_counts().to_dict()
+    judged = rejection_log.merge(faulty, on=["session_id", "window_start_ts"])
+    assert len(judged) == len(rejection_log) == len(faulty)
+    assert (judged["rejection_reason"] == judged["fault"]).all()
+
+def test_leaky_plants_fail_leakage_check_after_session_split(tmp_path):
+    config = PreprocessConfig(window_seconds=20, stride_seconds=20)
+    rows, windows = generate_campaign(_spec(leakage_fraction=0.25), config)
+    leaky = sorted(windows.loc[windows["leaky"], "plant_id"].astype(str).unique())
+    assert len(leaky) == 3
+
+    paths = write_campaign(rows, tmp_path, n_files=3, seed=1)
+    written = pd.concat([read_frame(p) for p in paths], ignore_index=True)
+    assert len(written) == len(rows)
+    assert written.groupby(["session_id", "window_start_ts"], observed=True).ngroup().is_monotonic_increasing is False
+
+    clean, _, _ = DataCleaner(config).run(prepare_frame(rows))
+    manifest = DataSplitter(config).split_data(build_window_catalog(clean))
+    reporter = DataReporter(config)
+    assert reporter.compute_leakage_checks(clean, manifest)["status"] == "PASS"
+    checks = reporter.compute_leakage_checks(clean, inject_split_leakage(manifest, leaky))
+    assert checks["status"] == "FAIL"
+    assert checks["offending_ids"] == leaky
+
+def test_campaign_spec_rejects_impossible_mixes():
+    with pytest.raises(ValidationError):
+        CampaignSpec(flatline_fraction=0.6, clip_fraction=0.6)
+    with pytest.raises(ValidationError):
+        CampaignSpec(sessions_per_plant=1, leakage_fraction=0.1)
+    with pytest.raises(ValidationError):
+        CampaignSpec(n_plant=3)
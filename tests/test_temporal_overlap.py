@@ -1,6 +1,8 @@
+import numpy as np
 import pandas as pd
 from src.preprocess.config import PreprocessConfig
 from src.preprocess.reporter import DataReporter
+from src.preprocess.leakage import overlapping_pairs
 
 def test_temporal_overlap_fail_check():
     config = PreprocessConfig(label_event_gap_seconds=5, random_seed=42)
@@ -74,3 +76,69 @@ def test_temporal_overlap_pass_check():
     checks = reporter.compute_leakage_checks(df, manifest)
     assert checks["status"] == "PASS"
     assert len(checks["offending_ids"]) == 0
+
+def test_temporal_overlap_reports_seconds_and_reverse_direction():
+    config = PreprocessConfig(label_event_gap_seconds=5, random_seed=42)
+    ts_base = pd.Timestamp("2026-01-01 12:00:00", tz="UTC")
+    sec = lambda s: ts_base + pd.Timedelta(seconds=s)
+
+    # Only the test window's expanded interval [1935, 2005] reaches the train
+    # label event [2000, 2060]; the train window is far from every event.
+    df = pd.DataFrame([
+        {"session_id": "s1", "plant_id": "p1", "source_id": "src",
+         "window_start_ts": sec(0), "window_end_ts": sec(60),
+         "label_event_start_ts": sec(2000), "label_event_end_ts": sec(2060)},
+        {"session_id": "s2", "plant_id": "p1", "source_id": "src",
+         "window_start_ts": sec(1940), "window_end_ts": sec(2000),
+         "label_event_start_ts": sec(5000), "label_event_end_ts": sec(5060)},
+    ] * 3)
+    manifest = df[["source_id", "plant_id", "session_id", "window_start_ts", "window_end_ts"]].copy()
+    manifest["split"] = ["train", "test"] * 3
+
+    checks = DataReporter(config).compute_leakage_checks(df, manifest)
+    assert checks["status"] == "FAIL"
+    assert checks["offending_ids"] == ["p1"]
+    label_hits = [p for p in checks["overlap_pairs"] if p["overlap_type"] == "feature_vs_label_event"]
+    assert label_hits == [{
+        "left_id": str(sec(1940)), "right_id": str(sec(2000)),
+        "left_split": "test", "right_split": "train",
+        "overlap_seconds": 5.0, "overlap_type": "feature_vs_label_event",
+    }]
+
+def test_feature_overlap_is_diagnostic_only():
+    config = PreprocessConfig(label_event_gap_seconds=5, random_seed=42)
+    ts_base = pd.Timestamp("2026-01-01 12:00:00", tz="UTC")
+    sec = lambda s: ts_base + pd.Timedelta(seconds=s)
+
+    df = pd.DataFrame([
+        {"session_id": "s1", "plant_id": "p1", "source_id": "src",
+         "window_start_ts": sec(0), "window_end_ts": sec(60),
+         "label_event_start_ts": sec(5000), "label_event_end_ts": sec(5010)},
+        {"session_id": "s2", "plant_id": "p1", "source_id": "src",
+         "window_start_ts": sec(50), "window_end_ts": sec(110),
+         "label_event_start_ts": sec(9000), "label_event_end_ts": sec(9010)},
+    ])
+    manifest = df[["source_id", "plant_id", "session_id", "window_start_ts", "window_end_ts"]].copy()
+    manifest["split"] = ["train", "val"]
+
+    checks = DataReporter(config).compute_leakage_checks(df, manifest)
+    assert checks["status"] == "PASS"
+    assert checks["offending_ids"] == []
+    assert [p["overlap_type"] for p in checks["overlap_pairs"]] == ["feature_vs_feature_diagnostic"]
+    assert checks["overlap_pairs"][0]["overlap_seconds"] == 15.0
+
+def test_overlapping_pairs_matches_brute_force():
+    rng = np.random.default_rng(3)
+    left_start = rng.integers(0, 1000, 200)
+    left_end = left_start + rng.integers(0, 80, 200)
+    right_start = rng.integers(0, 1000, 150)
+    right_end = right_start + rng.integers(0, 120, 150)
+
+    i, j = overlapping_pairs(left_start, left_end, right_start, right_end)
+    expected = {
+        (a, b)
+        for a in range(200) for b in range(150)
+        if left_start[a] < right_end[b] and left_end[a] > right_start[b]
+    }
+    assert set(zip(i.tolist(), j.tolist())) == expected
+    assert len(i) == len(expected)
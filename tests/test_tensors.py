@@ -0,0 +1,80 @@
+import json
+import subprocess
+import sys
+import yaml
+import numpy as np
+import pandas as pd
+from src.preprocess.catalog import build_window_catalog
+from src.preprocess.ingest import read_frame
+
+def _campaign(raw_dir):
+    rng = np.random.default_rng(8)
+    ts = pd.Timestamp("2026-01-01 12:00:00", tz="UTC")
+    t = np.arange(100) / 10.0
+    frames = []
+    for p in range(10):
+        for w in range(6):
+            start = ts + pd.Timedelta(hours=p, seconds=10 * w)
+            n = 80 if (p + w) % 7 == 0 else 100
+            values = 100 + 20 * np.sin(2 * np.pi * 0.5 * t) + rng.normal(0, 0.5, 100)
+            frames.append(pd.DataFrame({
+                "timestamp_utc": start + pd.to_timedelta(t[:n], unit="s"),
+                "value": values[:n], "label": w % 2,
+                "family_id": "f", "species_id": f"sp{p % 3}",
+                "plant_id": f"p{p}", "session_id": f"p{p}_s",
+                "hardware_id": f"h{p % 2}", "source_id": f"src{p % 2}",
+                "window_start_ts": start,
+                "window_end_ts": start + pd.Timedelta(seconds=10),
+                "label_event_start_ts": ts + pd.Timedelta(days=5),
+                "label_event_end_ts": ts + pd.Timedelta(days=5, seconds=5),
+            }))
+    order = rng.permutation(len(frames))
+    pd.concat([frames[i] for i in order], ignore_index=True).to_parquet(raw_dir / "input.parquet")
+
+def _run(tmp_path, name, *extra):
+    subprocess.run([
+        sys.executable, "-m", "src.preprocess.main", "--config", str(tmp_path / "preprocess.yaml"),
+        "--raw-dir", str(tmp_path / "raw"), "--export-tensors",
+        "--processed-dir", str(tmp_path / name / "processed"),
+        "--reports-dir", str(tmp_path / name / "reports"),
+    ] + list(extra), check=True, capture_output=True)
+    return tmp_path / name / "processed"
+
+def test_split_tensors_match_model_ready_windows(tmp_path):
+    (tmp_path / "raw").mkdir()
+    _campaign(tmp_path / "raw")
+    with open(tmp_path / "preprocess.yaml", "w") as f:
+        yaml.dump({"random_seed": 42, "max_rejection_rate_per_source": 1.0, "window_seconds": 10}, f)
+    processed = _run(tmp_path, "memory")
+    streamed = _run(tmp_path, "streaming", "--streaming", "--chunk-rows", "700")
+
+    names = sorted(p.name for p in (processed / "tensors").iterdir())
+    assert names == sorted(p.name for p in (streamed / "tensors").iterdir())
+    for name in names:
+        assert (processed / "tensors" / name).read_bytes() == (streamed / "tensors" / name).read_bytes(), name
+
+    model = read_frame(processed / "dataset_model_ready.parquet")
+    catalog = build_window_catalog(model).assign(
+        split=read_frame(processed / "split_manifest.parquet")["split"].astype(str).to_numpy()
+    )
+    manifest = json.loads((processed / "tensors/tensor_manifest.json").read_text())
+    assert manifest["window_samples"] == 100
+
+    exported = []
+    for split in ["train", "val", "test"]:
+        values = np.load(processed / "tensors" / f"{split}_values.npy", mmap_mode="r")
+        windows = read_frame(processed / "tensors" / f"{split}_windows.parquet")
+        assert values.dtype == np.float32 and values.shape == (len(windows), 100)
+        assert manifest["splits"][split]["windows"] == len(windows)
+        expected = catalog[(catalog["split"] == split) & (catalog["n_samples"] == 100)]
+        assert windows["window_id"].tolist() == expected["window_id"].tolist()
+        for i, (row_offset, label) in enumerate(zip(expected["row_offset"], windows["label"])):
+            rows = model.iloc[row_offset:row_offset + 100]
+            np.testing.assert_array_equal(values[i], rows["value_norm"].to_numpy())
+            assert label == rows["label"].iloc[0]
+        exported += windows["window_id"].tolist()
+
+    mismatched = read_frame(processed / "tensors/length_mismatch.parquet")
+    assert len(mismatched) == manifest["length_mismatch_windows"] > 0
+    assert (mismatched["n_samples"] == 80).all()
+    assert sorted(exported + mismatched["window_id"].tolist()) == catalog["window_id"].tolist()
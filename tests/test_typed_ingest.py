@@ -0,0 +1,180 @@
+import subprocess
+import sys
+import yaml
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from src.preprocess.ingest import (
+    ID_COLS, TIMESTAMP_COLS, read_frame, iter_frames, apply_contract_dtypes, parse_timestamp_column
+)
+from src.preprocess.cleaner import DataCleaner
+from src.preprocess.config import PreprocessConfig
+from src.preprocess.main import prepare_frame
+from src.preprocess.streaming import write_parquet
+
+def _recording(n_sessions=40, n=2_000, seed=0):
+    rng = np.random.default_rng(seed)
+    ts = pd.Timestamp("2026-01-01 12:00:00", tz="UTC")
+    frames = []
+    for s in range(n_sessions):
+        plant = f"Glycine_max_plant_{s // 4:03d}"
+        start = ts + pd.Timedelta(hours=s)
+        t = np.arange(n) / 10.0
+        window = start + pd.to_timedelta((t // 10) * 10, unit="s")
+        frames.append(pd.DataFrame({
+            "timestamp_utc": start + pd.to_timedelta(t, unit="s"),
+            "value": 100 + 20 * np.sin(2 * np.pi * 0.05 * t) + rng.normal(0, 0.5, n),
+            "label": s % 2,
+            "family_id": "Fabaceae", "species_id": "Glycine_max",
+            "plant_id": plant, "session_id": f"{plant}_session_{s:04d}",
+            "hardware_id": "Needle_AgCl", "source_id": "lab_recordings_2025",
+            "window_start_ts": window,
+            "window_end_ts": window + pd.Timedelta(seconds=10),
+            "label_event_start_ts": start + pd.Timedelta(days=30),
+            "label_event_end_ts": start + pd.Timedelta(days=30, seconds=5),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def test_typed_frame_is_smaller_in_memory_and_on_disk(tmp_path):
+    _recording().to_parquet(tmp_path / "raw.parquet", index=False)
+
+    untyped = pd.read_parquet(tmp_path / "raw.parquet")
+    typed = apply_contract_dtypes(read_frame(tmp_path / "raw.parquet"))
+
+    assert typed["value"].dtype == np.float64 and typed["label"].dtype == np.int8
+    assert all(isinstance(typed[c].dtype, pd.CategoricalDtype) for c in ID_COLS)
+    assert typed["timestamp_utc"].dtype == "datetime64[ns, UTC]"
+    pd.testing.assert_frame_equal(typed.astype(untyped.dtypes.to_dict()), untyped, check_exact=False, rtol=1e-6)
+
+    untyped_bytes = untyped.memory_usage(deep=True).sum()
+    typed_bytes = typed.memory_usage(deep=True).sum()
+    assert typed_bytes * 5 < untyped_bytes
+
+    untyped.to_parquet(tmp_path / "untyped.parquet", index=False)
+    write_parquet(typed, tmp_path / "typed.parquet")
+    untyped_size = (tmp_path / "untyped.parquet").stat().st_size
+    typed_size = (tmp_path / "typed.parquet").stat().st_size
+    assert typed_size < untyped_size
+
+    column = pq.ParquetFile(tmp_path / "typed.parquet").metadata.row_group(0).column
+    names = typed.columns.tolist()
+    for col in ID_COLS:
+        assert "RLE_DICTIONARY" in column(names.index(col)).encodings, col
+
+def test_pipeline_outputs_use_contract_dtypes(tmp_path):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    _recording(n_sessions=8, n=400).to_parquet(raw_dir / "a.parquet", index=False)
+    config_path = tmp_path / "preprocess.yaml"
+    with open(config_path, "w") as f:
+        yaml.dump({"random_seed": 42, "max_rejection_rate_per_source": 1.0}, f)
+    subprocess.run([
+        sys.executable, "-m", "src.preprocess.main",
+        "--config", str(config_path),
+        "--raw-dir", str(raw_dir),
+        "--processed-dir", str(tmp_path / "processed"),
+        "--reports-dir", str(tmp_path / "reports"),
+    ], check=True, capture_output=True)
+
+    schema = pq.read_schema(tmp_path / "processed/dataset_model_ready.parquet")
+    assert str(schema.field("value").type) == "double"
+    assert str(schema.field("value_uv").type) == "float"
+    assert str(schema.field("value_norm").type) == "float"
+    assert str(schema.field("label").type) == "int8"
+    assert str(schema.field("timestamp_utc").type) == "timestamp[ns, tz=UTC]"
+    for col in ID_COLS:
+        assert str(schema.field(col).type) == "string", col
+
+    clean = read_frame(tmp_path / "processed/dataset_clean.parquet")
+    assert all(isinstance(clean[c].dtype, pd.CategoricalDtype) for c in ID_COLS)
+    assert clean["session_id"].is_monotonic_increasing
+
+def test_csv_ingest_matches_pandas_reader(tmp_path):
+    df = _recording(n_sessions=6, n=500)
+    df["plant_id"] = df["plant_id"].str.replace("Glycine_max_plant_", "")
+    df.loc[[3, 40], "value"] = np.nan
+    df.loc[7, "source_id"] = None
+    df.to_csv(tmp_path / "raw.csv", index=False, date_format="%Y-%m-%d %H:%M:%S.%f%z")
+    with open(tmp_path / "raw.csv", "a") as f:
+        f.write("2026-01-01 12:00:00.000000+0000,NA,0,f,s,p,sess,h,src,null,,N/A,None\n")
+
+    reference = pd.read_csv(tmp_path / "raw.csv", dtype={col: str for col in ID_COLS})
+    frame = read_frame(tmp_path / "raw.csv")
+    assert frame["plant_id"].cat.categories.tolist() == sorted(reference["plant_id"].dropna().unique())
+    assert frame.isna().sum().to_dict() == reference.isna().sum().to_dict()
+    assert len(frame.dropna(how="any")) == len(reference.dropna(how="any")) == len(df) - 3
+
+    batches = list(iter_frames(tmp_path / "raw.csv", batch_rows=256))
+    assert max(len(b) for b in batches) <= 256
+    pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True).astype(object), frame.astype(object))
+
+    for col in TIMESTAMP_COLS:
+        parsed = parse_timestamp_column(frame[col].dropna())
+        pd.testing.assert_series_equal(parsed, pd.to_datetime(reference[col].dropna(), utc=True),
+                                       check_categorical=False)
+
+def test_repeated_timestamp_parse_keeps_whole_column_errors():
+    values = pd.Series(["2026-01-01 12:00:00+00:00"] * 3 + ["2026-01-01 12:00:00.5+00:00", "bad"])
+    for column in [values.iloc[:4], values]:
+        try:
+            expected = pd.to_datetime(column, utc=True)
+        except ValueError as e:
+            expected = type(e)
+        try:
+            got = parse_timestamp_column(column.astype("category"))
+        except ValueError as e:
+            got = type(e)
+        if isinstance(expected, type):
+            assert got is expected
+        else:
+            pd.testing.assert_series_equal(got, expected)
+
+def test_unparseable_window_timestamp_fails_the_run(tmp_path):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    df = _recording(n_sessions=2, n=200).astype({"window_start_ts": str})
+    df.loc[150, "window_start_ts"] = "not a timestamp"
+    df.to_csv(raw_dir / "raw.csv", index=False, date_format="%Y-%m-%d %H:%M:%S.%f%z")
+    config_path = tmp_path / "preprocess.yaml"
+    with open(config_path, "w") as f:
+        yaml.dump({"random_seed": 42}, f)
+
+    result = subprocess.run([
+        sys.executable, "-m", "src.preprocess.main", "--config", str(config_path),
+        "--raw-dir", str(raw_dir), "--processed-dir", str(tmp_path / "processed"),
+        "--reports-dir", str(tmp_path / "reports"),
+    ], capture_output=True, text=True)
+    assert result.returncode == 1
+    assert "Failed to parse timestamp column window_start_ts" in result.stderr
+
+def test_quality_checks_see_float64_values(tmp_path):
+    # Noise of std 1.5e-6 around 100 passes flatline_std_min = 1e-6, but it is
+    # finer than float32 steps there (7.6e-6), which would round most of it away.
+    df = _recording(n_sessions=1, n=100)
+    df["value"] = 100 + np.random.default_rng(1).normal(0, 1.5e-6, len(df))
+    df.to_parquet(tmp_path / "raw.parquet", index=False)
+
+    cleaner = DataCleaner(PreprocessConfig(window_seconds=10))
+    clean, rejection_log, _ = cleaner.run(prepare_frame(read_frame(tmp_path / "raw.parquet")))
+    metrics = cleaner.pop_window_metrics()
+    np.testing.assert_allclose(metrics["std"], df["value"].std(ddof=0), rtol=1e-6)
+    assert "flatline" not in cleaner.stats["reasons"]
+    assert rejection_log["value_uv"].dtype == np.float32
+
+def test_non_integer_labels_fail_the_run(tmp_path):
+    config_path = tmp_path / "preprocess.yaml"
+    with open(config_path, "w") as f:
+        yaml.dump({"random_seed": 42}, f)
+    for name, label in [("fraction", 0.5), ("overflow", 300)]:
+        raw_dir = tmp_path / name
+        raw_dir.mkdir()
+        df = _recording(n_sessions=2, n=200).astype({"label": np.float64})
+        df.loc[150, "label"] = label
+        df.to_parquet(raw_dir / "raw.parquet", index=False)
+        result = subprocess.run([
+            sys.executable, "-m", "src.preprocess.main", "--config", str(config_path),
+            "--raw-dir", str(raw_dir), "--processed-dir", str(tmp_path / name / "processed"),
+            "--reports-dir", str(tmp_path / name / "reports"),
+        ], capture_output=True, text=True)
+        assert result.returncode == 1, name
+        assert "label has 1 value(s) that are not whole numbers in the int8 range" in result.stderr, name
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.preprocess.config import PreprocessConfig
+from src.preprocess.catalog import build_window_catalog, broadcast_to_rows
+from src.preprocess.splitter import DataSplitter
+
+def _samples(windows_per_plant=3, n=4):
+    ts = pd.Timestamp("2026-01-01 12:00:00", tz="UTC")
+    rows = []
+    for plant in ["p1", "p2"]:
+        for w in range(windows_per_plant):
+            start = ts + pd.Timedelta(seconds=60 * w)
+            for i in range(n + w):
+                rows.append({
+                    "timestamp_utc": start + pd.Timedelta(seconds=i),
+                    "value_uv": float(i),
+                    "family_id": "f", "species_id": "s",
+                    "plant_id": plant, "session_id": f"{plant}_s",
+                    "source_id": "src",
+                    "window_start_ts": start,
+                    "window_end_ts": start + pd.Timedelta(seconds=60),
+                    "label_event_start_ts": ts,
+                    "label_event_end_ts": ts + pd.Timedelta(seconds=5),
+                })
+    return pd.DataFrame(rows)
+
+def test_catalog_is_window_granular_with_offsets():
+    df = _samples()
+    catalog = build_window_catalog(df, first_window_id=10, first_row=100)
+
+    assert len(catalog) == 6
+    assert catalog["window_id"].tolist() == list(range(10, 16))
+    assert catalog["n_samples"].sum() == len(df)
+    for _, w in catalog.iterrows():
+        rows = df.iloc[w["row_offset"] - 100:w["row_offset"] - 100 + w["n_samples"]]
+        assert (rows["window_start_ts"] == w["window_start_ts"]).all()
+        assert (rows["plant_id"] == w["plant_id"]).all()
+
+    catalog["split"] = np.where(catalog["plant_id"] == "p1", "train", "test")
+    assert (broadcast_to_rows(catalog, "split") == np.where(df["plant_id"] == "p1", "train", "test")).all()
+
+def test_split_manifest_from_catalog_has_contract_columns():
+    catalog = build_window_catalog(_samples())
+    manifest = DataSplitter(PreprocessConfig()).split_data(catalog)
+
+    assert list(manifest.columns) == [
+        "source_id", "plant_id", "session_id", "window_start_ts", "window_end_ts", "split"
+    ]
+    assert len(manifest) == len(catalog)
+    assert not manifest.duplicated(["session_id", "window_start_ts"]).any()
+
+def test_catalog_rejects_interleaved_windows():
+    df = _samples()
+    with pytest.raises(ValueError):
+        build_window_catalog(df.iloc[np.r_[0:2, 10:12, 2:10]])
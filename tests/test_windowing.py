@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+from src.preprocess.config import PreprocessConfig
+from src.preprocess.cleaner import DataCleaner
+from src.preprocess.ingest import apply_contract_dtypes
+from src.preprocess.leakage import to_ns
+from src.preprocess.quality import prefix_window_metrics, strided_window_metrics
+from src.preprocess.windowing import SessionWindower
+
+def _continuous(seed=0):
+    rng = np.random.default_rng(seed)
+    ts = pd.Timestamp("2026-01-01 12:00:00", tz="UTC")
+    frames = []
+    for plant, seconds in [("p1", 95.0), ("p2", 61.3)]:
+        t = np.sort(rng.uniform(0, seconds, int(seconds * 20)))
+        values = 100 + 20 * np.sin(2 * np.pi * 0.05 * t) + rng.normal(0, 0.2, len(t))
+        if plant == "p1":
+            values[(t > 40) & (t < 60)] = 100.0
+        frames.append(pd.DataFrame({
+            "timestamp_utc": ts + pd.to_timedelta(t, unit="s"),
+            "value": values,
+            "label": (t > 30).astype(np.int64),
+            "family_id": "f", "species_id": "s",
+            "plant_id": plant, "session_id": f"{plant}_s",
+            "hardware_id": "h", "source_id": "src",
+            "label_event_start_ts": ts + pd.Timedelta(seconds=30),
+            "label_event_end_ts": ts + pd.Timedelta(seconds=35),
+        }))
+    df = pd.concat(frames, ignore_index=True).sample(frac=1.0, random_state=seed).reset_index(drop=True)
+    return apply_contract_dtypes(df)
+
+CONFIG = PreprocessConfig(target_hz=10, window_seconds=10, stride_seconds=2)
+
+def test_windows_are_strided_views_on_the_resampled_grid():
+    df = _continuous()
+    DataCleaner(CONFIG)._apply_scaling(df)
+    sessions = list(SessionWindower(CONFIG).iter_sessions(df))
+
+    # Each session is cut where its label turns 1 at t = 30 s.
+    assert [s.n_windows for s in sessions] == [10, 28, 10, 11]
+    assert [s.rows["label"].nunique() for s in sessions] == [1, 1, 1, 1]
+    session = sessions[1]
+    assert np.diff(session.grid_ns).max() == np.diff(session.grid_ns).min() == 100_000_000
+    assert np.shares_memory(session.matrix(), session.signals["value_uv"])
+    assert session.matrix().shape == (28, 100)
+
+    rows = session.window_rows(np.arange(session.n_windows), SessionWindower(CONFIG).output_columns(df))
+    starts = rows["window_start_ts"].drop_duplicates()
+    assert (starts.diff().dropna() == pd.Timedelta(seconds=2)).all()
+    assert (rows.groupby("window_start_ts").size() == 100).all()
+    assert ((rows["window_end_ts"] - rows["window_start_ts"]) == pd.Timedelta(seconds=10)).all()
+
+def test_resampling_is_exact_for_linear_signals():
+    t_ns = np.array([0, 70_000_000, 250_000_000, 260_000_000, 410_000_000])
+    grid = np.arange(0, 400_000_001, 100_000_000)
+    values = 3.0 * t_ns / 1e9 + 1.0
+    resampled = SessionWindower(CONFIG).resample(t_ns + 1_767_268_800 * 10**9, values, grid + 1_767_268_800 * 10**9)
+    np.testing.assert_allclose(resampled, 3.0 * grid / 1e9 + 1.0)
+
+def test_continuous_path_matches_cleaning_materialized_windows():
+    df = _continuous()
+    cont = DataCleaner(CONFIG)
+    clean_c, rejected_c, _ = cont.run(df.copy())
+
+    materialized = df.copy()
+    DataCleaner(CONFIG)._apply_scaling(materialized)
+    windower = SessionWindower(CONFIG)
+    columns = windower.output_columns(materialized)
+    long_rows = pd.concat([
+        s.window_rows(np.arange(s.n_windows), columns) for s in windower.iter_sessions(materialized)
+    ], ignore_index=True).drop(columns=["value_uv"])
+    mat = DataCleaner(CONFIG)
+    clean_m, rejected_m, _ = mat.run(long_rows)
+
+    assert cont.stats["total_windows"] == 59
+    assert cont.stats["reasons"] == mat.stats["reasons"] and "flatline" in cont.stats["reasons"]
+    assert cont.stats["by_source"] == mat.stats["by_source"]
+    pd.testing.assert_frame_equal(clean_c, clean_m[columns], check_exact=False, rtol=1e-12)
+    pd.testing.assert_frame_equal(rejected_c, rejected_m[columns + ["rejection_reason"]],
+                                  check_exact=False, rtol=1e-12)
+
+def test_long_gaps_cut_sessions_instead_of_being_interpolated():
+    df = _continuous()
+    df = df[df["label"] == 1].reset_index(drop=True)
+    t = df["timestamp_utc"]
+    df["timestamp_utc"] = t.where(t < t.min() + pd.Timedelta(seconds=50), t + pd.Timedelta(hours=2))
+    DataCleaner(CONFIG)._apply_scaling(df)
+
+    # p1 is cut into 30-80 s and 80-95 s by the two-hour gap; p2 ends at 61.3 s, before it.
+    sessions = list(SessionWindower(CONFIG).iter_sessions(df))
+    assert [s.n_windows for s in sessions] == [20, 3, 11]
+    for s in sessions:
+        sample_ns = to_ns(s.rows["timestamp_utc"])
+        assert np.diff(sample_ns).max() <= 10**9
+        assert s.grid_ns[s.starts[-1] + s.win_len - 1] <= sample_ns[-1]
+
+    bridged = list(SessionWindower(CONFIG.model_copy(update={"max_gap_seconds": None})).iter_sessions(df))
+    assert len(bridged) == 2
+    assert sum(s.n_windows for s in bridged) > sum(s.n_windows for s in sessions) + 3000
+
+def test_prefix_sum_stats_agree_with_direct_computation():
+    rng = np.random.default_rng(5)
+    t = np.arange(200_000) / 10.0
+    signal = 150 + 40 * np.sin(2 * np.pi * 0.01 * t) + 0.05 * t + rng.normal(0, 1.0, len(t))
+    signal[5_000:6_500] = 123.25
+    signal[9_000:9_040] = 10_000.0
+    config = PreprocessConfig(target_hz=10, window_seconds=60, stride_seconds=10)
+    win_len, stride = 600, 100
+    n_windows = (len(signal) - win_len) // stride + 1
+
+    direct = strided_window_metrics(signal, win_len, stride, n_windows, config)
+    prefix = prefix_window_metrics(signal, win_len, stride, n_windows, config)
+
+    np.testing.assert_allclose(prefix["std"], direct["std"], rtol=1e-7, atol=1e-6)
+    np.testing.assert_allclose(prefix["slope_uv_s"], direct["slope_uv_s"], rtol=1e-7, atol=1e-6)
+    finite = np.isfinite(direct["snr_db"])
+    np.testing.assert_allclose(prefix["snr_db"][finite], direct["snr_db"][finite], rtol=1e-7, atol=1e-6)
+    np.testing.assert_array_equal(prefix["clip_fraction"], direct["clip_fraction"])
+
+    flat = (np.arange(n_windows) * stride >= 5_000) & (np.arange(n_windows) * stride + win_len <= 6_500)
+    assert flat.any() and (prefix["std"][flat] == 0.0).all()
+
+def test_incremental_mode_matches_direct_cleaning():
+    df = _continuous()
+    clean_d, rejected_d, _ = DataCleaner(CONFIG).run(df.copy())
+    incremental = CONFIG.model_copy(update={"incremental_window_stats": True})
+    clean_i, rejected_i, _ = DataCleaner(incremental).run(df.copy())
+
+    pd.testing.assert_frame_equal(clean_i, clean_d)
+    pd.testing.assert_frame_equal(rejected_i, rejected_d)